@@ -0,0 +1,12 @@
+"""
+MCPALL 公共模块
+
+各服务模块共用的基础设施，只依赖标准库（SSE相关功能使用mcp自带的starlette/uvicorn）
+"""
+
+from .admission import AdmissionControl, Shed, ToolLimits, install_metadata
+from .metrics import (REGISTRY, CallbackMetric, Counter, Gauge, Histogram, Registry, instrument_tool, run_sse,
+                      sse_app)
+
+__all__ = ["REGISTRY", "Registry", "Counter", "Gauge", "Histogram", "CallbackMetric", "instrument_tool",
+           "sse_app", "run_sse", "AdmissionControl", "ToolLimits", "Shed", "install_metadata"]
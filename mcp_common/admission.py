@@ -0,0 +1,296 @@
+"""
+MCPALL 准入控制模块
+
+在工具调用的分派路径上按工具限制并发：超出并发上限的调用进入有界的等待队列，每个排队的调用带有截止时间。
+队列已满、按当前处理速度预计等不到名额，或排队超过截止时间的调用立即以"繁忙，请重试"的结果返回，
+不再排在后面占用资源、等到客户端超时后才被处理。排队时间和准入结果写入工具响应的_meta.admission
+
+用法:
+    admission = AdmissionControl("xmol", on_busy=render_busy)
+
+    @mcp.tool()
+    @admission.tool()
+    @instrument_tool("xmol")
+    async def search(...): ...
+
+    install_metadata(mcp)
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import time
+from collections import deque
+
+from .metrics import REGISTRY
+
+
+QUEUE_SECONDS = REGISTRY.histogram("mcp_tool_queue_seconds", "MCP工具调用的排队时间(秒)", ("server", "tool"))
+SHED = REGISTRY.counter("mcp_tool_shed", "因繁忙被拒绝的MCP工具调用数", ("server", "tool", "reason"))
+REGISTRY.callback("mcp_tool_queue_depth", "MCP工具调用的排队数",
+                  lambda: {(gate.server, gate.tool): gate.waiting for control in _CONTROLS
+                           for gate in control.gates.values()},
+                  labelnames=("server", "tool"))
+
+# 平均处理时间的指数滑动平均系数
+EWMA_ALPHA = 0.2
+
+# 拒绝原因
+QUEUE_FULL = "queue_full"
+PREDICTED_TIMEOUT = "predicted_timeout"
+QUEUE_TIMEOUT = "queue_timeout"
+
+REASONS = {
+    QUEUE_FULL: "等待队列已满",
+    PREDICTED_TIMEOUT: "预计排队时间超过上限",
+    QUEUE_TIMEOUT: "排队超时",
+}
+
+# 进程内所有的准入控制，供排队数指标采集
+_CONTROLS = []
+
+# 当前工具调用的准入信息，由install_metadata安装的处理函数创建，准入控制写入
+_CALL_INFO = contextvars.ContextVar("mcp_admission_info", default=None)
+
+
+class Shed(Exception):
+    """
+    调用因繁忙被拒绝
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(REASONS.get(reason, reason))
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ToolLimits():
+    """
+    单个工具的准入参数
+
+    参数:
+    concurrency: 同时执行的调用数，0表示不限
+    queue: 等待队列长度，队列已满时新调用直接拒绝
+    timeout: 排队的截止时间(秒)，超出后拒绝
+    """
+
+    def __init__(self, concurrency: int = 0, queue: int = 32, timeout: float = 10.0):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, prefix: str, tool: str, default: "ToolLimits" = None, environ=None) -> "ToolLimits":
+        """
+        读取<prefix>_<工具名大写>_CONCURRENCY/QUEUE/TIMEOUT，未设置的使用default
+        """
+        environ = os.environ if environ is None else environ
+        default = default or cls()
+        name = f"{prefix}_{tool.upper()}_"
+        return cls(
+            concurrency=int(environ.get(name + "CONCURRENCY", default.concurrency)),
+            queue=int(environ.get(name + "QUEUE", default.queue)),
+            timeout=float(environ.get(name + "TIMEOUT", default.timeout)),
+        )
+
+
+class ToolGate():
+    """
+    单个工具的并发名额和先进先出的等待队列
+    """
+
+    def __init__(self, server: str, tool: str, limits: ToolLimits):
+        self.server = server
+        self.tool = tool
+        self.limits = limits
+        self.active = 0
+        self._waiters = deque()
+        self.service_time = None  # 平均处理时间(秒)
+
+        # 统计
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {reason: 0 for reason in REASONS}
+
+    @property
+    def waiting(self) -> int:
+        return sum(not waiter.done() for waiter in self._waiters)
+
+    def _estimate(self, position: int) -> float:
+        """
+        排在第position位时预计的等待时间(秒)
+        """
+        if not self.service_time or self.limits.concurrency <= 0:
+            return 0.0
+        return position / self.limits.concurrency * self.service_time
+
+    def _reject(self, reason: str) -> Shed:
+        self.shed[reason] += 1
+        SHED.labels(self.server, self.tool, reason).inc()
+        retry_after = max(1.0, round(self._estimate(self.waiting + 1) or self.limits.timeout, 1))
+        return Shed(reason, retry_after)
+
+    async def acquire(self) -> float:
+        """
+        获取名额，返回排队时间(秒)；被拒绝时抛出Shed
+        """
+        if self.limits.concurrency <= 0 or (self.active < self.limits.concurrency and not self.waiting):
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+        if self.waiting >= self.limits.queue:
+            raise self._reject(QUEUE_FULL)
+        if self._estimate(self.waiting + 1) > self.limits.timeout:
+            raise self._reject(PREDICTED_TIMEOUT)
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        start = time.perf_counter()
+        timer = loop.call_later(self.limits.timeout, lambda: waiter.done() or waiter.set_result(False))
+        try:
+            granted = await waiter
+        except asyncio.CancelledError:
+            # 客户端取消时，已经转交的名额要还回去
+            if not waiter.done():
+                waiter.cancel()
+            elif not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+        if not granted:
+            raise self._reject(QUEUE_TIMEOUT)
+        self.admitted += 1
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        """
+        释放名额，直接转交给队列中第一个仍在等待的调用
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def observe(self, seconds: float) -> None:
+        if self.service_time is None:
+            self.service_time = seconds
+        else:
+            self.service_time += EWMA_ALPHA * (seconds - self.service_time)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.limits.concurrency,
+            "queue": self.limits.queue,
+            "timeout": self.limits.timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "avg_service_ms": round(self.service_time * 1000, 1) if self.service_time is not None else None,
+        }
+
+
+class AdmissionControl():
+    """
+    一个服务的准入控制
+
+    参数:
+    server: 服务名，用作指标标签
+    on_busy: 被拒绝时的返回值，on_busy(tool, kwargs, shed)；为空时抛出Shed，由FastMCP作为工具错误返回
+    default: 未单独配置的工具使用的参数
+    limits: {工具名: ToolLimits}
+    env_prefix: 设置后工具参数可被环境变量<env_prefix>_<工具名大写>_CONCURRENCY/QUEUE/TIMEOUT覆盖
+    """
+
+    def __init__(self, server: str, on_busy=None, default: ToolLimits = None, limits: dict = None,
+                 env_prefix: str = None):
+        self.server = server
+        self.on_busy = on_busy
+        self.default = default or ToolLimits()
+        self.limits = dict(limits or {})
+        self.env_prefix = env_prefix
+        self.gates = {}
+        _CONTROLS.append(self)
+
+    def gate(self, tool: str) -> ToolGate:
+        gate = self.gates.get(tool)
+        if gate is None:
+            limits = self.limits.get(tool, self.default)
+            if self.env_prefix:
+                limits = ToolLimits.from_env(self.env_prefix, tool, limits)
+            gate = self.gates[tool] = ToolGate(self.server, tool, limits)
+        return gate
+
+    def tool(self, name: str = None):
+        """
+        工具的准入控制装饰器，放在@mcp.tool()下方；保留原函数签名，只支持异步函数
+        """
+        def decorator(fn):
+            if not inspect.iscoroutinefunction(fn):
+                raise TypeError(f"准入控制只支持异步工具: {fn.__name__}")
+            gate = self.gate(name or fn.__name__)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                info = _CALL_INFO.get()
+                try:
+                    waited = await gate.acquire()
+                except Shed as shed:
+                    if info is not None:
+                        info.update(status="shed", reason=shed.reason, retry_after=shed.retry_after,
+                                    queue_ms=0.0)
+                    if self.on_busy is None:
+                        raise
+                    return self.on_busy(gate.tool, kwargs, shed)
+                QUEUE_SECONDS.labels(self.server, gate.tool).observe(waited)
+                if info is not None:
+                    info.update(status="admitted", queue_ms=round(waited * 1000, 2))
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    gate.observe(time.perf_counter() - start)
+                    gate.release()
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict:
+        return {name: gate.stats() for name, gate in self.gates.items()}
+
+
+def install_metadata(mcp) -> None:
+    """
+    在FastMCP服务的工具调用处理函数上加入准入信息：有准入控制的工具在响应的_meta.admission中返回
+    status、queue_ms等；被拒绝的调用标记为isError，客户端据retry_after重试
+    """
+    from mcp import types
+
+    server = mcp._mcp_server
+    original = server.request_handlers[types.CallToolRequest]
+    if getattr(original, "admission", False):
+        return
+
+    async def handler(request):
+        info = {}
+        token = _CALL_INFO.set(info)
+        try:
+            result = await original(request)
+        finally:
+            _CALL_INFO.reset(token)
+        if info:
+            result.root.meta = {**(result.root.meta or {}), "admission": info}
+            if info.get("status") == "shed":
+                result.root.isError = True
+        return result
+
+    handler.admission = True
+    server.request_handlers[types.CallToolRequest] = handler
@@ -0,0 +1,333 @@
+"""
+MCPALL 网关
+
+在一个进程中加载仓库里按module_name/core/server.py结构组织的模块，把各模块FastMCP服务上的工具、资源和提示
+以模块名为前缀挂载到同一个服务上：工具和提示为"<模块>_<名称>"，资源为"<模块>-<原URI>"，
+模块在core/server.py中声明的ROUTES挂载在"/<模块><路径>"。各模块共用一个事件循环、HTTP服务和指标注册表；
+各模块服务的lifespan（如xmol的后台预热）与单独运行时一样在每个会话开始时进入。
+
+每个模块的并发和执行方式通过环境变量配置（模块名大写）：
+- MCP_GATEWAY_MODULES: 逗号分隔的模块名，默认加载发现的全部模块
+- MCP_GATEWAY_<模块>_CONCURRENCY: 该模块同时执行的工具调用和资源读取数，0表示不限
+- MCP_GATEWAY_<模块>_ISOLATION: thread（默认）在模块专属线程池中执行同步函数，inline直接在事件循环中执行
+- MCP_GATEWAY_<模块>_WORKERS: 模块线程池的线程数
+
+用法:
+    python -m mcp_common.gateway --transport sse --port 8000
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+
+from pydantic import AnyUrl
+
+from .admission import install_metadata
+from .metrics import REGISTRY, run_sse
+
+
+# 获取日志记录器
+logger = logging.getLogger("MCPALL.gateway")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ISOLATIONS = ("thread", "inline")
+
+
+def discover_modules(root: Path = ROOT) -> list:
+    """
+    发现符合module_name/core/server.py结构的模块
+    """
+    return sorted(
+        path.name for path in Path(root).iterdir()
+        if path.is_dir() and path.name.isidentifier() and (path / "core" / "server.py").is_file()
+    )
+
+
+class ModuleLimits():
+    """
+    单个模块的并发上限和执行方式
+
+    参数:
+    concurrency: 同时执行的工具调用和资源读取数，0表示不限；超出时排队等待
+    isolation: 'thread'在模块专属线程池中执行同步函数，慢模块不会阻塞事件循环和其他模块；'inline'直接执行
+    workers: 线程池的线程数
+    """
+
+    def __init__(self, concurrency: int = 0, isolation: str = "thread", workers: int = 4):
+        if isolation not in ISOLATIONS:
+            raise ValueError(f"不支持的隔离方式: {isolation}，可选值为{', '.join(ISOLATIONS)}")
+        self.concurrency = concurrency
+        self.isolation = isolation
+        self.workers = workers
+
+    @classmethod
+    def from_env(cls, module: str, environ=None) -> "ModuleLimits":
+        environ = os.environ if environ is None else environ
+        prefix = f"MCP_GATEWAY_{module.upper()}_"
+        return cls(
+            concurrency=int(environ.get(prefix + "CONCURRENCY", "0")),
+            isolation=environ.get(prefix + "ISOLATION", "thread"),
+            workers=int(environ.get(prefix + "WORKERS", "4")),
+        )
+
+
+class MountedModule():
+    """
+    已挂载的模块，负责并发控制和同步函数的执行
+    """
+
+    def __init__(self, name: str, server, limits: ModuleLimits):
+        self.name = name
+        self.server = server
+        self.limits = limits
+        self._semaphore = asyncio.Semaphore(limits.concurrency) if limits.concurrency > 0 else None
+        self._executor = None
+        if limits.isolation == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=limits.workers, thread_name_prefix=f"gateway-{name}")
+        self.tools = []
+        self.resources = []
+        self.prompts = []
+        self.routes = []
+
+        # 指标
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.wait_time = 0.0
+
+    @asynccontextmanager
+    async def _slot(self):
+        if self._semaphore is not None:
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.wait_time += time.perf_counter() - start
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def wrap(self, fn, is_async: bool):
+        """
+        包装工具或资源函数：占用模块并发名额，同步函数按配置放到模块线程池中执行
+        """
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async with self._slot():
+                if is_async:
+                    return await fn(*args, **kwargs)
+                if self._executor is None:
+                    return fn(*args, **kwargs)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        return wrapper
+
+    def stats(self) -> dict:
+        return {
+            "tools": self.tools,
+            "resources": self.resources,
+            "prompts": self.prompts,
+            "routes": [path for path, _ in self.routes],
+            "concurrency": self.limits.concurrency,
+            "isolation": self.limits.isolation,
+            "workers": self.limits.workers if self._executor is not None else 0,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "wait_seconds": round(self.wait_time, 3),
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+class Gateway():
+    """
+    多模块网关
+
+    参数:
+    name: 网关服务名称
+    settings: 传给FastMCP的配置，如host、port、sse_path
+    """
+
+    def __init__(self, name: str = "MCPALL网关", **settings):
+        from mcp.server.fastmcp import FastMCP
+
+        self.mcp = FastMCP(name, lifespan=self._lifespan, **settings)
+        self.modules = {}
+        self.failed = {}
+        self.mcp.resource("status://")(self.status)
+        # 模块工具的准入控制信息同样写入网关响应的_meta
+        install_metadata(self.mcp)
+
+        REGISTRY.callback("mcp_gateway_in_flight", "网关中各模块正在执行的调用数",
+                          lambda: {(name, ): module.in_flight for name, module in self.modules.items()},
+                          labelnames=("module", ))
+        REGISTRY.callback("mcp_gateway_waiting", "网关中各模块因并发上限排队的调用数",
+                          lambda: {(name, ): module.waiting for name, module in self.modules.items()},
+                          labelnames=("module", ))
+
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        """
+        依次进入已挂载模块的lifespan；某个模块的lifespan出错只记录错误，不影响其他模块和会话
+        """
+        async with AsyncExitStack() as stack:
+            for name, module in self.modules.items():
+                lifespan = module.server.settings.lifespan
+                if lifespan is None:
+                    continue
+                try:
+                    await stack.enter_async_context(lifespan(module.server))
+                except Exception as e:
+                    logger.error(f"进入模块{name}的lifespan时出错: {str(e)}")
+            yield {}
+
+    @property
+    def routes(self) -> list:
+        return [route for module in self.modules.values() for route in module.routes]
+
+    def load(self, name: str, limits: ModuleLimits = None) -> bool:
+        """
+        导入<name>.core.server并挂载其中的mcp服务；模块导入失败（包括缺少配置时退出）只记录错误，不影响其他模块
+        """
+        if str(ROOT) not in sys.path:
+            sys.path.insert(0, str(ROOT))
+        try:
+            module = importlib.import_module(f"{name}.core.server")
+            server = getattr(module, "mcp")
+        except SystemExit as e:
+            reason = f"模块初始化时退出(状态码{e.code})，请检查其配置"
+        except Exception as e:
+            reason = f"{type(e).__name__}: {e}"
+        else:
+            self.mount(name, server, limits or ModuleLimits.from_env(name), getattr(module, "ROUTES", ()))
+            return True
+        self.failed[name] = reason
+        logger.error(f"加载模块{name}失败: {reason}")
+        return False
+
+    def mount(self, name: str, server, limits: ModuleLimits = None, routes=()) -> MountedModule:
+        """
+        将FastMCP服务的工具、资源、资源模板和提示以模块名为前缀复制到网关上
+        """
+        if name in self.modules:
+            raise ValueError(f"模块{name}已挂载")
+        mounted = MountedModule(name, server, limits or ModuleLimits())
+
+        # FastMCP 1.6没有公开的挂载接口，这里直接读写各管理器的注册表
+        for tool in server._tool_manager.list_tools():
+            tool_name = f"{name}_{tool.name}"
+            self.mcp._tool_manager._tools[tool_name] = tool.model_copy(update={
+                "name": tool_name,
+                "fn": mounted.wrap(tool.fn, tool.is_async),
+                "is_async": True,
+            })
+            mounted.tools.append(tool_name)
+
+        for resource in server._resource_manager.list_resources():
+            url = AnyUrl(f"{name}-{resource.uri}")
+            uri = str(url)
+            update = {"uri": url}
+            if hasattr(resource, "fn"):
+                update["fn"] = mounted.wrap(resource.fn, asyncio.iscoroutinefunction(resource.fn))
+            self.mcp._resource_manager._resources[uri] = resource.model_copy(update=update)
+            mounted.resources.append(uri)
+
+        for template in server._resource_manager.list_templates():
+            uri_template = f"{name}-{template.uri_template}"
+            self.mcp._resource_manager._templates[uri_template] = template.model_copy(update={
+                "uri_template": uri_template,
+                "fn": mounted.wrap(template.fn, asyncio.iscoroutinefunction(template.fn)),
+            })
+            mounted.resources.append(uri_template)
+
+        for prompt in server._prompt_manager.list_prompts():
+            prompt_name = f"{name}_{prompt.name}"
+            self.mcp._prompt_manager._prompts[prompt_name] = prompt.model_copy(update={"name": prompt_name})
+            mounted.prompts.append(prompt_name)
+
+        mounted.routes = [(f"/{name}{path}", endpoint) for path, endpoint in routes]
+        self.modules[name] = mounted
+        logger.info(f"已挂载模块{name}: {len(mounted.tools)}个工具，{len(mounted.resources)}个资源，"
+                    f"{len(mounted.prompts)}个提示，并发上限{mounted.limits.concurrency}")
+        return mounted
+
+    def status(self) -> dict:
+        """
+        网关状态：已挂载的模块及其并发情况，以及加载失败的模块
+        """
+        return {
+            "status": "ok" if self.modules else "error",
+            "service": self.mcp.name,
+            "modules": {name: module.stats() for name, module in self.modules.items()},
+            "failed": self.failed,
+        }
+
+    def run(self, transport: str = "stdio") -> None:
+        if transport == "sse":
+            # 与mcp.run("sse")相同，另外提供/metrics指标端点和各模块声明的HTTP端点
+            run_sse(self.mcp, routes=self.routes)
+        else:
+            self.mcp.run(transport=transport)
+
+
+def create_gateway(modules: list = None, **settings) -> Gateway:
+    """
+    创建网关并加载模块；modules为空时读取MCP_GATEWAY_MODULES，仍为空则加载发现的全部模块
+    """
+    if not modules:
+        modules = [name.strip() for name in os.getenv("MCP_GATEWAY_MODULES", "").split(",") if name.strip()]
+    gateway = Gateway(**settings)
+    for name in modules or discover_modules():
+        gateway.load(name)
+    return gateway
+
+
+def main():
+    """主入口函数，处理命令行参数并运行网关"""
+    parser = argparse.ArgumentParser(description="MCPALL多模块网关")
+    parser.add_argument("--port", type=int, default=8000, help="服务器端口号")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="服务器主机地址")
+    parser.add_argument("--ssepath", type=str, default="/sse", help="SSE路径")
+    parser.add_argument("--modules", nargs="+", help="要加载的模块，默认加载全部")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="sse",
+                        help="传输协议: stdio(标准IO)或sse(服务器发送事件)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    gateway = create_gateway(args.modules, host=args.host, port=args.port, sse_path=args.ssepath)
+    if not gateway.modules:
+        logger.error(f"没有可用的模块: {gateway.failed}")
+        return 1
+    # STDIO模式下标准输出用于协议通信，提示信息只写日志
+    logger.info(f"已加载模块: {', '.join(gateway.modules)}")
+    if gateway.failed:
+        logger.warning(f"加载失败的模块: {', '.join(gateway.failed)}")
+    if args.transport == "sse":
+        logger.info(f"使用SSE模式启动网关，地址: {args.host}:{args.port}，SSE路径: {args.ssepath}，指标路径: /metrics")
+    else:
+        logger.info("使用STDIO模式启动网关")
+    gateway.run(args.transport)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
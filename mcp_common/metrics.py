@@ -0,0 +1,371 @@
+"""
+MCPALL 指标模块
+
+进程内的计数器、仪表和直方图，按Prometheus文本格式输出；只依赖标准库，
+各服务模块共用同一个注册表REGISTRY。SSE模式下通过/metrics暴露，同时可作为MCP资源读取
+"""
+
+import asyncio
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 默认直方图桶（秒），覆盖毫秒级的本地操作到几十秒的上游请求
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric():
+    """
+    指标基类，按标签值组合保存子指标；没有标签的指标直接在自身上操作
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **labels):
+        """
+        获取指定标签值的子指标，例如histogram.labels(stage="parse")
+        """
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"指标{self.name}需要标签{self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """
+        产出(后缀, 标签名, 标签值, 附加标签, 值)
+        """
+        for key, child in list(self._children.items()):
+            yield from child.samples(self.labelnames, key)
+
+
+class _CounterChild():
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, names, key):
+        yield "_total", names, key, "", self.value
+
+
+class Counter(_Metric):
+    """
+    只增不减的计数器，输出时名称追加_total
+    """
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild():
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def samples(self, names, key):
+        yield "", names, key, "", self.value
+
+
+class Gauge(_Metric):
+    """
+    可增可减的仪表
+    """
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class _HistogramChild():
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        """
+        计时上下文，同步和异步代码中都可使用
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, names, key):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            yield "_bucket", names, key, f'le="{_format_value(float(bound))}"', cumulative
+        yield "_sum", names, key, "", self.sum
+        yield "_count", names, key, "", self.count
+
+
+class Histogram(_Metric):
+    """
+    直方图，桶为累计计数
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self, **labels):
+        """
+        计时上下文：with histogram.time(stage="parse"): ...
+        """
+        return (self.labels(**labels) if labels else self._default()).time()
+
+
+class CallbackMetric(_Metric):
+    """
+    采集时才取值的指标，用于从已有的stats()中导出缓存命中率、限速等待等数据
+
+    callback返回{标签值元组: 值}，没有标签时可直接返回数值
+    """
+
+    def __init__(self, name: str, documentation: str, callback, labelnames=(), type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        suffix = "_total" if self.type == "counter" else ""
+        for key, value in values.items():
+            if value is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            yield suffix, self.labelnames, key, "", float(value)
+
+
+class Registry():
+    """
+    指标注册表；同名指标重复注册时返回已有的指标，便于模块重复导入
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"指标{metric.name}已注册为不同的类型或标签")
+                if isinstance(metric, CallbackMetric):
+                    existing.callback = metric.callback
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, callback, labelnames=(), type: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, type))
+
+    def render(self) -> str:
+        """
+        按Prometheus文本格式输出全部指标；单个回调出错不影响其他指标
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                lines.append(f"# {metric.name} 采集失败: {_escape(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, names, key, extra, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(names, key, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls", "MCP工具调用次数", ("server", "tool", "status"))
+TOOL_SECONDS = REGISTRY.histogram("mcp_tool_seconds", "MCP工具调用耗时(秒)", ("server", "tool"))
+TOOL_IN_FLIGHT = REGISTRY.gauge("mcp_tool_in_flight", "正在执行的MCP工具调用数", ("server", "tool"))
+
+
+def instrument_tool(server: str):
+    """
+    工具调用计数、耗时和并发数的装饰器，放在@mcp.tool()下方；保留原函数签名，FastMCP可照常识别参数
+
+    用法:
+        @mcp.tool()
+        @instrument_tool("xmol")
+        async def search(...): ...
+    """
+    def decorator(fn):
+        tool = fn.__name__
+
+        @contextmanager
+        def track():
+            status = "ok"
+            start = time.perf_counter()
+            with TOOL_IN_FLIGHT.labels(server, tool).track_inprogress():
+                try:
+                    yield
+                except BaseException as e:
+                    status = "cancelled" if isinstance(e, asyncio.CancelledError) else "exception"
+                    raise
+                finally:
+                    TOOL_SECONDS.labels(server, tool).observe(time.perf_counter() - start)
+                    TOOL_CALLS.labels(server, tool, status).inc()
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with track():
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with track():
+                    return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def sse_app(mcp, registry: Registry = None, path: str = "/metrics", routes=()):
+    """
+    FastMCP的SSE应用，并在path上挂载指标端点；routes为额外的(路径, 处理函数)，均为GET
+    """
+    from starlette.responses import Response
+
+    registry = registry or REGISTRY
+
+    async def metrics(request):
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    app = mcp.sse_app()
+    app.add_route(path, metrics, methods=["GET"])
+    for route_path, endpoint in routes:
+        app.add_route(route_path, endpoint, methods=["GET"])
+    return app
+
+
+def run_sse(mcp, registry: Registry = None, path: str = "/metrics", routes=(), **config) -> None:
+    """
+    以SSE模式运行FastMCP服务，与mcp.run("sse")相同，另外提供指标端点；config为额外的uvicorn配置
+    """
+    import anyio
+    import uvicorn
+
+    app = sse_app(mcp, registry, path, routes)
+    config = uvicorn.Config(app, host=mcp.settings.host, port=mcp.settings.port,
+                            log_level=mcp.settings.log_level.lower(), **config)
+    anyio.run(uvicorn.Server(config).serve)
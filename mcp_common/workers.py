@@ -0,0 +1,411 @@
+"""
+MCPALL 多进程SSE服务
+
+单个FastMCP进程只能用到一个CPU核心。这里由主进程启动N个工作进程，每个工作进程在本机端口上运行
+完整的SSE服务，主进程作为前端代理对外监听：
+
+- 新的SSE连接分配给当前连接数最少的工作进程；工作进程的消息路径为"/w<编号>/messages/"，
+  客户端从endpoint事件拿到的地址带有工作进程编号，之后的POST请求由代理按编号转发，会话始终落在同一进程
+- /metrics汇总各工作进程的指标，每条样本追加worker标签，另外输出代理自身的工作进程状态
+- 其他路径（如/export/users）轮询转发
+- 工作进程异常退出时自动重启，该进程上的SSE会话断开，客户端重连后分配到可用的工作进程
+
+工作进程之间不共享内存，缓存和限速需要放在各进程都能访问的存储中，例如xmol的SQLite持久层和
+XMOL_RATE_LIMIT_DB指定的共享令牌桶
+
+用法:
+    python -m mcp_common.workers --target xmol.core.server --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import importlib
+import itertools
+import logging
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from .metrics import CONTENT_TYPE, Registry, run_sse
+
+
+# 获取日志记录器
+logger = logging.getLogger("MCPALL.workers")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 工作进程的内部路径前缀，消息路径为/w<编号>/messages/
+WORKER_PATH = re.compile(r"^/w(\d+)/")
+
+# 转发时不透传的逐跳头
+HOP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+               "proxy-authorization", "proxy-authenticate", "content-length"}
+
+READY_TIMEOUT = 60.0
+RESTART_DELAY = 1.0
+
+# 停止时等待SSE连接关闭的时间(秒)，超出后强制断开
+SHUTDOWN_TIMEOUT = 5
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _with_label(line: str, label: str) -> str:
+    """
+    在一行Prometheus样本上追加标签
+    """
+    name, sep, rest = line.partition("{")
+    if sep:
+        return f"{name}{{{label},{rest}"
+    name, _, value = line.partition(" ")
+    return f"{name}{{{label}}} {value}"
+
+
+def merge_metrics(texts: dict) -> str:
+    """
+    合并各工作进程的指标文本，texts为{编号: 文本}；同名指标的HELP/TYPE只保留一份，样本追加worker标签
+    """
+    families = {}
+    for worker, text in texts.items():
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            match = re.match(r"# (HELP|TYPE) (\S+)", line)
+            if match:
+                family = families.setdefault(match.group(2), {"headers": {}, "samples": []})
+                family["headers"].setdefault(match.group(1), line)
+            elif line.startswith("#"):
+                families.setdefault(line, {"headers": {"": line}, "samples": []})
+            elif family is not None:
+                family["samples"].append(_with_label(line, f'worker="{worker}"'))
+    lines = []
+    for family in families.values():
+        lines.extend(family["headers"].values())
+        lines.extend(family["samples"])
+    return "\n".join(lines) + "\n"
+
+
+class Worker():
+    """
+    一个工作进程
+    """
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process = None
+        self.streams = 0
+        self.restarts = 0
+        self.ready = False
+
+    @property
+    def prefix(self) -> str:
+        return f"/w{self.index}"
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+
+class WorkerPool():
+    """
+    多进程SSE服务：启动和监控工作进程，并作为前端代理转发请求
+
+    参数:
+    target: 工作进程导入的模块，需提供FastMCP实例mcp，可选提供ROUTES
+    workers: 工作进程数
+    host/port: 代理对外监听的地址
+    sse_path: SSE路径，与单进程模式相同
+    metrics_path: 汇总指标的路径
+    env: 传给工作进程的额外环境变量
+    """
+
+    def __init__(self, target: str, workers: int = 2, host: str = "0.0.0.0", port: int = 8000,
+                 sse_path: str = "/sse", metrics_path: str = "/metrics", env: dict = None):
+        if workers < 1:
+            raise ValueError("工作进程数至少为1")
+        self.target = target
+        self.host = host
+        self.port = port
+        self.sse_path = sse_path
+        self.metrics_path = metrics_path
+        self.env = dict(env or {})
+        self.workers = [Worker(index, _free_port()) for index in range(workers)]
+        self._round_robin = itertools.cycle(self.workers)
+        self._client = None
+        self._stopping = False
+
+        self.registry = Registry()
+        self.registry.callback("mcp_workers_alive", "存活的工作进程数",
+                               lambda: sum(worker.alive for worker in self.workers))
+        self.registry.callback("mcp_worker_streams", "各工作进程上经代理建立的SSE连接数",
+                               lambda: {(str(worker.index), ): worker.streams for worker in self.workers},
+                               labelnames=("worker", ))
+        self.registry.callback("mcp_worker_restarts", "各工作进程的重启次数",
+                               lambda: {(str(worker.index), ): worker.restarts for worker in self.workers},
+                               labelnames=("worker", ), type="counter")
+
+    def _command(self, worker: Worker) -> list:
+        return [sys.executable, "-m", "mcp_common.workers", "--worker", "--target", self.target,
+                "--port", str(worker.port), "--message-path", f"{worker.prefix}/messages/",
+                "--ssepath", self.sse_path]
+
+    def _spawn(self, worker: Worker) -> None:
+        env = {**os.environ, **self.env, "MCP_WORKER_ID": str(worker.index)}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+        worker.process = subprocess.Popen(self._command(worker), env=env)
+        worker.ready = False
+        worker.streams = 0
+        logger.info(f"已启动工作进程{worker.index}，pid: {worker.process.pid}，端口: {worker.port}")
+
+    async def _wait_ready(self, worker: Worker, timeout: float = READY_TIMEOUT) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not worker.alive:
+                return False
+            try:
+                response = await self._client.get(f"http://127.0.0.1:{worker.port}{self.metrics_path}", timeout=2.0)
+                if response.status_code == 200:
+                    worker.ready = True
+                    return True
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+        return False
+
+    async def _supervise(self) -> None:
+        """
+        工作进程退出后重启
+        """
+        while not self._stopping:
+            await asyncio.sleep(RESTART_DELAY)
+            for worker in self.workers:
+                if self._stopping or worker.alive:
+                    continue
+                logger.warning(f"工作进程{worker.index}已退出(状态码{worker.process.returncode})，正在重启")
+                worker.restarts += 1
+                self._spawn(worker)
+                if not await self._wait_ready(worker):
+                    logger.error(f"工作进程{worker.index}重启后未能就绪")
+
+    def _terminate_workers(self) -> None:
+        self._stopping = True
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()
+
+    def _stop_workers(self) -> None:
+        self._terminate_workers()
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            try:
+                worker.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        import httpx
+
+        # SSE连接长期占用上游连接，不限制连接数
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0), trust_env=False,
+                                         limits=httpx.Limits(max_connections=None, max_keepalive_connections=64))
+        for worker in self.workers:
+            self._spawn(worker)
+        ready = await asyncio.gather(*(self._wait_ready(worker) for worker in self.workers))
+        if not any(ready):
+            self._stop_workers()
+            await self._client.aclose()
+            raise RuntimeError(f"工作进程均未能启动，请检查{self.target}的配置和日志")
+        logger.info(f"{sum(ready)}/{len(self.workers)}个工作进程已就绪")
+        supervisor = asyncio.create_task(self._supervise())
+        try:
+            yield
+        finally:
+            supervisor.cancel()
+            self._stop_workers()
+            await self._client.aclose()
+
+    def _pick(self, path: str) -> Worker:
+        """
+        选择转发的工作进程：带工作进程前缀的按编号，SSE连接选连接数最少的，其他轮询
+        """
+        match = WORKER_PATH.match(path)
+        if match:
+            index = int(match.group(1))
+            return self.workers[index] if index < len(self.workers) else None
+        candidates = [worker for worker in self.workers if worker.alive and worker.ready]
+        if not candidates:
+            return None
+        if path == self.sse_path:
+            return min(candidates, key=lambda worker: worker.streams)
+        for worker in self._round_robin:
+            if worker in candidates:
+                return worker
+
+    async def metrics(self, request):
+        from starlette.responses import Response
+
+        async def fetch(worker: Worker):
+            try:
+                response = await self._client.get(f"http://127.0.0.1:{worker.port}{self.metrics_path}", timeout=5.0)
+                return worker.index, response.text
+            except Exception as e:
+                logger.warning(f"获取工作进程{worker.index}的指标失败: {str(e)}")
+                return worker.index, ""
+
+        texts = dict(await asyncio.gather(*(fetch(worker) for worker in self.workers if worker.alive)))
+        return Response(merge_metrics(texts) + self.registry.render(), media_type=CONTENT_TYPE)
+
+    async def proxy(self, request):
+        """
+        将请求原样转发给工作进程，响应体以流的方式返回，SSE事件不会被缓冲
+        """
+        import httpx
+        from starlette.background import BackgroundTask
+        from starlette.responses import JSONResponse, StreamingResponse
+
+        path = request.url.path
+        worker = self._pick(path)
+        if worker is None or not worker.alive:
+            return JSONResponse({"error": "没有可用的工作进程", "suggestion": "请稍后重试，SSE会话需要重新连接"},
+                                status_code=503)
+
+        # 连接数在转发前计入，同时到达的SSE连接不会都分给同一个工作进程
+        is_stream = path == self.sse_path
+        if is_stream:
+            worker.streams += 1
+
+        headers = [(key, value) for key, value in request.headers.items() if key.lower() not in HOP_HEADERS]
+        upstream = self._client.build_request(
+            request.method, f"http://127.0.0.1:{worker.port}{path}", params=request.url.query,
+            headers=headers, content=await request.body(),
+        )
+        try:
+            response = await self._client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            if is_stream:
+                worker.streams -= 1
+            logger.warning(f"转发到工作进程{worker.index}失败: {str(e)}")
+            return JSONResponse({"error": f"工作进程{worker.index}不可用", "suggestion": "请稍后重试"},
+                                status_code=502)
+
+        async def body():
+            # 工作进程退出时结束响应，客户端据此重新连接
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            except httpx.TransportError as e:
+                logger.warning(f"工作进程{worker.index}的响应中断: {str(e)}")
+
+        async def close():
+            await response.aclose()
+            if is_stream:
+                worker.streams -= 1
+
+        return StreamingResponse(
+            body(),
+            status_code=response.status_code,
+            headers={key: value for key, value in response.headers.items() if key.lower() not in HOP_HEADERS},
+            background=BackgroundTask(close),
+        )
+
+    def app(self):
+        from starlette.applications import Starlette
+        from starlette.routing import Route
+
+        methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+        return Starlette(
+            routes=[
+                Route(self.metrics_path, self.metrics, methods=["GET"]),
+                Route("/{path:path}", self.proxy, methods=methods),
+            ],
+            lifespan=self.lifespan,
+        )
+
+    def run(self, log_level: str = "info") -> None:
+        import anyio
+        import uvicorn
+
+        pool = self
+
+        class Server(uvicorn.Server):
+            def handle_exit(self, sig, frame):
+                # 先停止工作进程，经代理的SSE连接随之结束，否则uvicorn会一直等待这些连接关闭
+                pool._terminate_workers()
+                super().handle_exit(sig, frame)
+
+        config = uvicorn.Config(self.app(), host=self.host, port=self.port, log_level=log_level.lower(),
+                                timeout_graceful_shutdown=SHUTDOWN_TIMEOUT)
+        anyio.run(Server(config).serve)
+
+
+def serve_workers(target: str, workers: int, host: str = "0.0.0.0", port: int = 8000, sse_path: str = "/sse",
+                  env: dict = None, log_level: str = "info") -> None:
+    """
+    以多进程方式运行target模块中的SSE服务
+    """
+    logger.info(f"使用{workers}个工作进程启动{target}，地址: {host}:{port}，SSE路径: {sse_path}")
+    WorkerPool(target, workers, host=host, port=port, sse_path=sse_path, env=env).run(log_level)
+
+
+def _watch_parent(parent: int) -> None:
+    """
+    主进程被强制结束时工作进程随之退出，不留下占用端口的孤儿进程
+    """
+    while os.getppid() == parent:
+        time.sleep(1.0)
+    logger.warning("主进程已退出，工作进程随之退出")
+    os._exit(0)
+
+
+def run_worker(target: str, port: int, message_path: str, sse_path: str = "/sse") -> None:
+    """
+    工作进程入口：导入target模块，只在本机地址上运行其SSE服务
+    """
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    module = importlib.import_module(target)
+    mcp = module.mcp
+    mcp.settings.host = "127.0.0.1"
+    mcp.settings.port = port
+    mcp.settings.sse_path = sse_path
+    mcp.settings.message_path = message_path
+    threading.Thread(target=_watch_parent, args=(os.getppid(), ), daemon=True).start()
+    run_sse(mcp, routes=getattr(module, "ROUTES", ()), timeout_graceful_shutdown=SHUTDOWN_TIMEOUT)
+
+
+def main():
+    """主入口函数，处理命令行参数并运行多进程服务"""
+    parser = argparse.ArgumentParser(description="MCPALL多进程SSE服务")
+    parser.add_argument("--target", type=str, required=True, help="服务模块，如xmol.core.server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数，默认为CPU核心数")
+    parser.add_argument("--port", type=int, default=8000, help="服务器端口号")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="服务器主机地址")
+    parser.add_argument("--ssepath", type=str, default="/sse", help="SSE路径")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--message-path", type=str, default="/messages/", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.worker:
+        run_worker(args.target, args.port, args.message_path, args.ssepath)
+    else:
+        serve_workers(args.target, args.workers, args.host, args.port, args.ssepath)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
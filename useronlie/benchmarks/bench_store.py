@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+用户存储基准测试
+
+生成指定数量的随机用户，分别写入SQLite和排序映射文件，测量首次加载耗时、精确/前缀/模糊查找延迟，
+数据变化后重建users://all序列化结果的耗时和内存峰值，以及流式导出的内存峰值
+
+用法:
+    python benchmarks/bench_store.py --users 1000000
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core.server  # noqa: E402
+from core.store import MemoryStore, SQLiteStore, SortedFileStore, write_sorted_file  # noqa: E402
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰"
+
+
+def make_users(count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    users = {}
+    while len(users) < count:
+        name = rng.choice(SURNAMES) + "".join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+        name += str(rng.randint(0, 99999))
+        users[name] = f"1{rng.randint(3, 9)}{rng.randint(0, 999999999):09d}"
+    return users
+
+
+def timed(fn, queries: list) -> float:
+    """
+    返回每次查询的中位延迟(微秒)
+    """
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def peak_memory(fn) -> float:
+    """
+    执行fn期间的内存分配峰值(MB)
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用户存储基准测试")
+    parser.add_argument("--users", type=int, default=1000000, help="用户数")
+    parser.add_argument("--queries", type=int, default=2000, help="每类查询的次数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    logging.getLogger("用户电话查询服务").setLevel(logging.WARNING)
+    users = make_users(args.users)
+    names = list(users)
+    rng = random.Random(1)
+    exact = [rng.choice(names) for _ in range(args.queries)]
+    prefixes = [name[:2] for name in exact]
+    typos = [name[:-1] + "9" for name in exact]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        stores = {"memory": MemoryStore(users)}
+        SQLiteStore(Path(workdir) / "users.db").import_users(users.items())
+        stores["sqlite"] = SQLiteStore(Path(workdir) / "users.db")
+        write_sorted_file(Path(workdir) / "users.tsv", users.items())
+        stores["mmap"] = SortedFileStore(Path(workdir) / "users.tsv")
+
+        print(f"{'backend':>8}{'load ms':>10}{'get us':>9}{'prefix us':>11}{'fuzzy us':>10}"
+              f"{'all build ms':>14}{'all peak MB':>13}{'export peak MB':>16}")
+        for backend, store in stores.items():
+            start = time.perf_counter()
+            store.get(names[0])  # 首次查询时打开数据库/建立偏移索引
+            load = (time.perf_counter() - start) * 1000
+            get_us = timed(store.get, exact)
+            prefix_us = timed(lambda prefix: store.prefix(prefix, 20), prefixes)
+            fuzzy_us = timed(lambda query: store.fuzzy(query, 10), typos[:200])
+            start = time.perf_counter()
+            core.server._serialize_all_users(store)
+            build = (time.perf_counter() - start) * 1000
+            all_peak = peak_memory(lambda: core.server._serialize_all_users(store))
+            core.server.store = store
+            export_peak = peak_memory(lambda: sum(map(len, core.server.iter_export("jsonl"))))
+            print(f"{backend:>8}{load:>10.1f}{get_us:>9.1f}{prefix_us:>11.1f}{fuzzy_us:>10.1f}"
+                  f"{build:>14.1f}{all_peak:>13.1f}{export_peak:>16.1f}")
+            if isinstance(store, SortedFileStore):
+                store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,9 @@
-# core 包初始化文件 
\ No newline at end of file
+# core 包初始化文件
+
+import sys
+from pathlib import Path
+
+# 公共模块mcp_common位于仓库根目录，从模块目录直接运行时加入导入路径
+_ROOT = Path(__file__).resolve().parents[2]
+if (_ROOT / "mcp_common").is_dir() and str(_ROOT) not in sys.path:
+    sys.path.append(str(_ROOT))
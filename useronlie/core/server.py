@@ -1,40 +1,174 @@
 from mcp.server.fastmcp import FastMCP, Context
 from typing import Dict, Optional
+import base64
+import binascii
+import json
+import os
+import threading
+from mcp_common.metrics import REGISTRY, instrument_tool
+from .store import after, get_store
 
 # 创建MCP服务器实例
 mcp = FastMCP("用户电话查询服务")
 
-# 模拟用户数据库
-USER_DATABASE: Dict[str, str] = {
-    "张三": "13812345678",
-    "李四": "13987654321",
-    "王五": "15912345678",
-    "赵六": "18612345678",
-    "钱七": "17712345678"
-}
+# 用户数据存储：默认为内置演示数据，可通过USERONLIE_STORE切换为sqlite或mmap，首次查询时才加载
+store = get_store()
+
+# 搜索用户单次返回的数量上限
+MAX_SEARCH_LIMIT = 100
+SEARCH_MODES = ("prefix", "fuzzy")
+
+# 分页资源每页的用户数上限，以及流式导出每批读取的用户数
+MAX_PAGE_LIMIT = 1000
+EXPORT_BATCH = 5000
+
+# users://all完整返回的用户数上限，超出时只返回第一页并给出下一页地址，避免整表序列化
+ALL_USERS_MAX = int(os.getenv("USERONLIE_ALL_MAX_USERS", "10000"))
+
+# users://all的序列化结果，存储版本变化后重建
+_all_users_lock = threading.Lock()
+_all_users_payload = (None, "")
 
 # 添加电话查询工具
 @mcp.tool()
+@instrument_tool("useronlie")
 def 查询电话(username: str) -> Dict[str, str]:
     """根据用户名查询电话号码"""
     
-    phone = USER_DATABASE.get(username)
+    phone = store.get(username)
     if phone:
         return {"用户名": username, "电话": phone, "状态": "成功"}
     else:
         return {"用户名": username, "电话": "", "状态": "未找到用户"}
 
+# 添加用户搜索工具
+@mcp.tool()
+@instrument_tool("useronlie")
+def 搜索用户(keyword: str, mode: str = "prefix", limit: int = 20) -> Dict[str, object]:
+    """按用户名前缀(mode='prefix')或模糊匹配(mode='fuzzy')搜索用户及其电话号码"""
+
+    if mode not in SEARCH_MODES:
+        return {"关键词": keyword, "用户": [], "状态": f"不支持的搜索方式: {mode}，可选值为prefix或fuzzy"}
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    if mode == "prefix":
+        users = [{"用户名": name, "电话": phone} for name, phone in store.prefix(keyword, limit)]
+    else:
+        users = [{"用户名": name, "电话": phone, "相似度": score}
+                 for name, phone, score in store.fuzzy(keyword, limit)]
+    return {"关键词": keyword, "用户": users, "数量": len(users), "状态": "成功" if users else "未找到用户"}
+
+def _user_fragments(rows):
+    """逐个用户生成'"用户名": {"电话": 电话}'片段"""
+    phone_key = json.dumps("电话")
+    for name, phone in rows:
+        yield f"{json.dumps(name)}: {{{phone_key}: {json.dumps(phone)}}}"
+
+def _serialize_all_users(store) -> str:
+    """逐个用户拼接JSON，与直接序列化{"用户": {用户名: {"电话": 电话}}}的结果相同"""
+    users = ", ".join(_user_fragments(store.iter_users()))
+    return f"{{{json.dumps('用户')}: {{{users}}}}}"
+
+def _encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> str:
+    """游标为上一页最后一个用户名的URL安全base64编码（不带填充），无效时抛出ValueError"""
+    try:
+        name = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"无效的游标: {cursor}")
+    # 非规范的编码（多余的填充位等）也能解码，重新编码后不一致时同样视为无效
+    if _encode_cursor(name) != cursor:
+        raise ValueError(f"无效的游标: {cursor}")
+    return name
+
+def _page(limit: int, cursor: str = None) -> Dict[str, object]:
+    """从游标之后读取一页用户，最多多读一个以判断是否还有下一页"""
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    start = after(_decode_cursor(cursor)) if cursor else ""
+    rows = store.scan(start, limit=limit + 1)
+    page, more = rows[:limit], len(rows) > limit
+    next_cursor = _encode_cursor(page[-1][0]) if more else None
+    return {
+        "用户": {name: {"电话": phone} for name, phone in page},
+        "数量": len(page),
+        "游标": next_cursor,
+        "下一页": f"users://page/{limit}/{next_cursor}" if more else None,
+    }
+
 # 添加资源 - 获取所有用户列表
 @mcp.resource("users://all")
-def 获取所有用户() -> Dict[str, Dict[str, str]]:
-    """获取所有用户的电话信息"""
-    return {"用户": {name: {"电话": phone} for name, phone in USER_DATABASE.items()}}
+def 获取所有用户() -> str:
+    """获取所有用户的电话信息；用户数超过上限时只返回第一页，其余通过users://page/{limit}/{cursor}分页获取"""
+    global _all_users_payload
+    total = store.count()
+    if total > ALL_USERS_MAX:
+        return json.dumps({**_page(MAX_PAGE_LIMIT), "总数": total, "截断": True})
+    version = store.version()
+    if _all_users_payload[0] != version:
+        with _all_users_lock:
+            if _all_users_payload[0] != version:
+                _all_users_payload = (version, _serialize_all_users(store))
+    return _all_users_payload[1]
+
+# 添加分页资源 - 第一页
+@mcp.resource("users://page/{limit}")
+def 分页获取用户(limit: int) -> Dict[str, object]:
+    """按用户名顺序获取第一页用户，返回中的"下一页"为下一页资源地址，没有更多用户时为null"""
+    return _page(limit)
+
+# 添加分页资源 - 游标之后的一页
+@mcp.resource("users://page/{limit}/{cursor}")
+def 分页获取用户_游标(limit: int, cursor: str) -> Dict[str, object]:
+    """获取游标之后的一页用户，游标取自上一页返回的"游标"字段"""
+    return _page(limit, cursor)
+
+def iter_export(export_format: str = "jsonl", batch: int = EXPORT_BATCH):
+    """
+    逐批读取并序列化全部用户，内存占用只与批大小有关
+
+    export_format: 'jsonl'每行一个{"用户名", "电话"}；'json'与users://all的格式相同
+    """
+    rows = store.iter_users(batch)
+    if export_format == "jsonl":
+        chunk = []
+        for name, phone in rows:
+            chunk.append(json.dumps({"用户名": name, "电话": phone}, ensure_ascii=False) + "\n")
+            if len(chunk) >= batch:
+                yield "".join(chunk).encode("utf-8")
+                chunk.clear()
+        yield "".join(chunk).encode("utf-8")
+        return
+    yield f"{{{json.dumps('用户')}: {{".encode("utf-8")
+    chunk = []
+    first = True
+    for fragment in _user_fragments(rows):
+        chunk.append(fragment if first else ", " + fragment)
+        first = False
+        if len(chunk) >= batch:
+            yield "".join(chunk).encode("utf-8")
+            chunk.clear()
+    chunk.append("}}")
+    yield "".join(chunk).encode("utf-8")
+
+async def 导出用户(request):
+    """SSE模式下的流式导出端点: GET /export/users?format=jsonl|json"""
+    from starlette.responses import JSONResponse, StreamingResponse
+
+    export_format = request.query_params.get("format", "jsonl")
+    if export_format not in ("jsonl", "json"):
+        return JSONResponse({"状态": f"不支持的导出格式: {export_format}，可选值为jsonl或json"}, status_code=400)
+    media_type = "application/x-ndjson" if export_format == "jsonl" else "application/json"
+    return StreamingResponse(iter_export(export_format), media_type=media_type)
+
+# SSE模式下额外提供的HTTP端点，run.py和网关按此挂载
+ROUTES = [("/export/users", 导出用户)]
 
 # 添加动态资源 - 根据用户名获取指定用户
 @mcp.resource("user://{name}")
 def 获取用户(name: str) -> Dict[str, Optional[str]]:
     """获取指定用户的电话信息"""
-    phone = USER_DATABASE.get(name)
+    phone = store.get(name)
     if phone:
         return {"用户名": name, "电话": phone}
     else:
@@ -48,6 +182,14 @@ def 获取状态() -> Dict[str, any]:
         "status": "ok",
         "service": "用户电话查询服务",
         "version": "1.0.0",
-        "tools": ["查询电话"],
-        "resources": ["users://all", "user://{name}", "status://"]
-    } 
\ No newline at end of file
+        "tools": ["查询电话", "搜索用户"],
+        "resources": ["users://all", "users://page/{limit}", "users://page/{limit}/{cursor}", "user://{name}",
+                      "status://", "metrics://"],
+        "store": store.stats()
+    }
+
+# 添加指标资源
+@mcp.resource("metrics://", mime_type="text/plain")
+def 获取指标() -> str:
+    """获取Prometheus文本格式的指标"""
+    return REGISTRY.render() 
\ No newline at end of file
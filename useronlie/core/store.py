@@ -0,0 +1,473 @@
+"""
+用户电话目录存储模块
+
+提供可替换的存储后端：memory（内置演示数据）、sqlite和mmap（按用户名排序的映射文件，只读）。
+后端在首次查询时才打开，数据按用户名有序存放，精确、前缀和模糊查找都只访问索引中的一段区间；
+version()在数据变化时改变，供上层缓存users://all等序列化结果
+
+生成数据文件:
+    python -m core.store users.csv data/users.db    # SQLite
+    python -m core.store users.csv data/users.tsv   # 排序映射文件
+CSV每行为"用户名,电话"，不带表头
+"""
+
+import bisect
+import csv
+import difflib
+import heapq
+import logging
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# 获取日志记录器
+logger = logging.getLogger("用户电话查询服务.store")
+
+# 内置演示数据
+SAMPLE_USERS: Dict[str, str] = {
+    "张三": "13812345678",
+    "李四": "13987654321",
+    "王五": "15912345678",
+    "赵六": "18612345678",
+    "钱七": "17712345678"
+}
+
+BACKENDS = ("memory", "sqlite", "mmap")
+
+# 默认数据目录，Docker部署时映射到卷
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# 模糊查找时每个前缀最多检查的候选数
+FUZZY_SCAN_LIMIT = 10000
+
+# 批量写入SQLite时每批的行数
+IMPORT_BATCH = 10000
+
+
+def prefix_end(prefix: str) -> Optional[str]:
+    """
+    以prefix开头的用户名的上界（不含）；按码点排序时，将最后一个字符加一即可
+    """
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def after(name: str) -> str:
+    """
+    比name大的最小字符串，用于从上一页最后一个用户名之后继续遍历
+    """
+    return name + "\0"
+
+
+class UserStore():
+    """
+    存储后端基类
+
+    子类实现get、scan、count和version，前缀和模糊查找基于按用户名有序的scan实现
+    """
+
+    backend = ""
+    writable = False
+
+    def get(self, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def scan(self, start: str = "", end: str = None, limit: int = None) -> List[Tuple[str, str]]:
+        """
+        按用户名升序返回start <= 用户名 < end的(用户名, 电话)，最多limit条
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def version(self):
+        """
+        数据版本，数据变化后返回不同的值
+        """
+        raise NotImplementedError
+
+    def set(self, name: str, phone: str) -> None:
+        raise RuntimeError(f"{self.backend}存储为只读")
+
+    def delete(self, name: str) -> bool:
+        raise RuntimeError(f"{self.backend}存储为只读")
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def iter_users(self, batch: int = 10000):
+        """
+        分批遍历全部用户，内存中最多保留一批
+        """
+        start = ""
+        while True:
+            rows = self.scan(start, limit=batch)
+            yield from rows
+            if len(rows) < batch:
+                return
+            start = after(rows[-1][0])
+
+    def prefix(self, prefix: str, limit: int = 20) -> List[Tuple[str, str]]:
+        """
+        前缀查找，按用户名排序返回前limit个
+        """
+        return self.scan(prefix, prefix_end(prefix), limit)
+
+    def fuzzy(self, query: str, limit: int = 10, cutoff: float = 0.5) -> List[Tuple[str, str, float]]:
+        """
+        模糊查找，返回(用户名, 电话, 相似度)，按相似度降序
+
+        候选从与query共同前缀最长的用户名开始，逐步缩短前缀直到凑够limit个结果，最短到首字
+        （中文姓名即同姓）；每个前缀最多检查FUZZY_SCAN_LIMIT个用户名。包含query的用户名相似度不低于cutoff
+        """
+        query = query.strip()
+        if not query:
+            return []
+        matcher = difflib.SequenceMatcher(b=query)
+        seen = set()
+        scored = []
+        for size in range(len(query), 0, -1):
+            prefix = query[:size]
+            for name, phone in self.scan(prefix, prefix_end(prefix), FUZZY_SCAN_LIMIT):
+                if name in seen:
+                    continue
+                seen.add(name)
+                matcher.set_seq1(name)
+                if matcher.real_quick_ratio() < cutoff and query not in name:
+                    continue
+                score = matcher.ratio()
+                if query in name:
+                    score = max(score, cutoff)
+                if score >= cutoff:
+                    scored.append((name, phone, round(score, 3)))
+            if len(scored) >= limit:
+                break
+        return heapq.nlargest(limit, scored, key=lambda item: (item[2], -len(item[0])))
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "writable": self.writable}
+
+
+class MemoryStore(UserStore):
+    """
+    内存存储，有序用户名列表在首次查找时建立，数据变化后重建
+    """
+
+    backend = "memory"
+    writable = True
+
+    def __init__(self, users: Dict[str, str] = None):
+        self._users = dict(SAMPLE_USERS if users is None else users)
+        self._names = None
+        self._version = 0
+
+    def _sorted_names(self) -> list:
+        if self._names is None:
+            self._names = sorted(self._users)
+        return self._names
+
+    def get(self, name: str) -> Optional[str]:
+        return self._users.get(name)
+
+    def scan(self, start: str = "", end: str = None, limit: int = None) -> List[Tuple[str, str]]:
+        names = self._sorted_names()
+        lo = bisect.bisect_left(names, start)
+        hi = bisect.bisect_left(names, end, lo) if end is not None else len(names)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [(name, self._users[name]) for name in names[lo:hi]]
+
+    def count(self) -> int:
+        return len(self._users)
+
+    def version(self):
+        return self._version
+
+    def set(self, name: str, phone: str) -> None:
+        if name not in self._users:
+            self._names = None
+        self._users[name] = phone
+        self._version += 1
+
+    def delete(self, name: str) -> bool:
+        if self._users.pop(name, None) is None:
+            return False
+        self._names = None
+        self._version += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**super().stats(), "users": len(self._users)}
+
+
+class SQLiteStore(UserStore):
+    """
+    SQLite存储，以用户名为主键（WITHOUT ROWID表即按用户名组织的B树）
+
+    连接在首次查询时打开；version包含PRAGMA data_version，其他进程写入后同样能感知
+    """
+
+    backend = "sqlite"
+    writable = True
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.RLock()
+        self._changes = 0
+        self._count = None  # (version, 用户数)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("CREATE TABLE IF NOT EXISTS users "
+                                 "(name TEXT PRIMARY KEY, phone TEXT NOT NULL) WITHOUT ROWID")
+                    conn.commit()
+                    self._conn = conn
+                    logger.info(f"已打开用户数据库: {self.path}")
+        return self._conn
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._db().execute("SELECT phone FROM users WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def scan(self, start: str = "", end: str = None, limit: int = None) -> List[Tuple[str, str]]:
+        sql = "SELECT name, phone FROM users WHERE name >= ?"
+        params = [start]
+        if end is not None:
+            sql += " AND name < ?"
+            params.append(end)
+        sql += " ORDER BY name LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            return self._db().execute(sql, params).fetchall()
+
+    def count(self) -> int:
+        version = self.version()
+        if self._count is None or self._count[0] != version:
+            with self._lock:
+                self._count = (version, self._db().execute("SELECT count(*) FROM users").fetchone()[0])
+        return self._count[1]
+
+    def version(self):
+        with self._lock:
+            return (self._changes, self._db().execute("PRAGMA data_version").fetchone()[0])
+
+    def set(self, name: str, phone: str) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO users (name, phone) VALUES (?, ?)", (name, phone))
+            db.commit()
+            self._changes += 1
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            db = self._db()
+            deleted = db.execute("DELETE FROM users WHERE name = ?", (name,)).rowcount > 0
+            db.commit()
+            if deleted:
+                self._changes += 1
+        return deleted
+
+    def import_users(self, rows) -> int:
+        """
+        批量写入(用户名, 电话)，已存在的用户名覆盖
+        """
+        total = 0
+        batch = []
+        with self._lock:
+            db = self._db()
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= IMPORT_BATCH:
+                    db.executemany("INSERT OR REPLACE INTO users (name, phone) VALUES (?, ?)", batch)
+                    total += len(batch)
+                    batch.clear()
+            db.executemany("INSERT OR REPLACE INTO users (name, phone) VALUES (?, ?)", batch)
+            db.commit()
+            self._changes += 1
+        return total + len(batch)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "path": str(self.path), "users": self.count()}
+
+
+class SortedFileStore(UserStore):
+    """
+    排序映射文件存储（只读）
+
+    文件每行为"用户名\\t电话"，按用户名的UTF-8字节序排列（与码点顺序一致）；
+    首次查询时mmap文件并建立行偏移索引，之后按二分查找定位，文件修改后自动重新加载
+    """
+
+    backend = "mmap"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._snapshot = None  # (mmap, 行偏移, 加载时文件的(mtime_ns, size))，整体替换
+
+    def _stat(self) -> tuple:
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _index(self):
+        """
+        返回当前的(mmap, 行偏移)；文件变化时加载新文件并整体替换快照。
+        查询全程使用取到的快照，旧映射不主动关闭，最后一个使用它的查询结束后由引用计数回收并关闭
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[2] != self._stat():
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot[2] != self._stat():
+                    snapshot = self._snapshot = self._load()
+        return snapshot[0], snapshot[1]
+
+    def _load(self) -> tuple:
+        start = time.perf_counter()
+        with open(self.path, "rb") as f:
+            # 以打开的文件为准记录版本，加载期间文件被替换时下次查询会重新加载
+            stat = os.fstat(f.fileno())
+            loaded = (stat.st_mtime_ns, stat.st_size)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+        offsets = array("Q")
+        if mm is not None:
+            position = 0
+            while position < len(mm):
+                offsets.append(position)
+                newline = mm.find(b"\n", position)
+                position = len(mm) if newline < 0 else newline + 1
+        logger.info(f"已加载用户文件{self.path}: {len(offsets)}个用户，耗时{time.perf_counter() - start:.2f}秒")
+        return mm, offsets, loaded
+
+    def close(self) -> None:
+        """
+        释放当前快照；正在进行的查询仍持有旧映射，结束后才关闭
+        """
+        self._snapshot = None
+
+    def _row(self, mm, offset: int) -> Tuple[str, str]:
+        newline = mm.find(b"\n", offset)
+        line = mm[offset:newline if newline >= 0 else len(mm)].decode("utf-8")
+        name, _, phone = line.partition("\t")
+        return name, phone
+
+    def _key(self, mm, offset: int) -> bytes:
+        return mm[offset:mm.find(b"\t", offset)]
+
+    def _position(self, mm, offsets, key: str) -> int:
+        return bisect.bisect_left(offsets, key.encode("utf-8"), key=lambda offset: self._key(mm, offset))
+
+    def get(self, name: str) -> Optional[str]:
+        mm, offsets = self._index()
+        index = self._position(mm, offsets, name)
+        if index < len(offsets):
+            found, phone = self._row(mm, offsets[index])
+            if found == name:
+                return phone
+        return None
+
+    def scan(self, start: str = "", end: str = None, limit: int = None) -> List[Tuple[str, str]]:
+        mm, offsets = self._index()
+        lo = self._position(mm, offsets, start) if start else 0
+        hi = self._position(mm, offsets, end) if end is not None else len(offsets)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self._row(mm, offsets[index]) for index in range(lo, hi)]
+
+    def count(self) -> int:
+        return len(self._index()[1])
+
+    def version(self):
+        return self._stat()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "path": str(self.path), "users": self.count()}
+
+
+def write_sorted_file(path, rows) -> int:
+    """
+    将(用户名, 电话)写为排序映射文件，同名用户保留最后一条；先写临时文件再替换，读取方不会看到半个文件
+    """
+    users = {}
+    for name, phone in rows:
+        if "\t" in name or "\n" in name or "\n" in phone:
+            raise ValueError(f"用户名或电话中含有制表符或换行: {name!r}")
+        users[name] = phone
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(path.name + ".tmp")
+    with open(temp, "w", encoding="utf-8", newline="\n") as f:
+        for name in sorted(users):
+            f.write(f"{name}\t{users[name]}\n")
+    os.replace(temp, path)
+    return len(users)
+
+
+def create_store(backend: str = "memory", path=None) -> UserStore:
+    """
+    创建存储后端；sqlite默认使用data/users.db，mmap默认使用data/users.tsv
+    """
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(path or DATA_DIR / "users.db")
+    if backend == "mmap":
+        return SortedFileStore(path or DATA_DIR / "users.tsv")
+    raise ValueError(f"不支持的存储后端: {backend}，可选值为{', '.join(BACKENDS)}")
+
+
+_shared_store = None
+
+
+def get_store() -> UserStore:
+    """
+    获取进程内共享的存储后端，通过环境变量USERONLIE_STORE和USERONLIE_STORE_PATH配置；
+    只创建对象，数据在首次查询时才加载
+    """
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = create_store(os.getenv("USERONLIE_STORE", "memory"),
+                                     os.getenv("USERONLIE_STORE_PATH") or None)
+    return _shared_store
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[0].strip():
+                yield row[0].strip(), row[1].strip()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("用法: python -m core.store <users.csv> <输出文件.db|输出文件.tsv>")
+        return 1
+    source, target = argv
+    start = time.perf_counter()
+    if target.endswith(".db"):
+        total = SQLiteStore(target).import_users(read_csv(source))
+    else:
+        total = write_sorted_file(target, read_csv(source))
+    print(f"已写入{total}个用户到{target}，耗时{time.perf_counter() - start:.1f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,9 @@
 
 import argparse
 import os
-from core.server import mcp
+from core.server import mcp, ROUTES
+from mcp_common.metrics import run_sse
+from mcp_common.workers import serve_workers
 
 def main():
     """主入口函数，处理命令行参数并运行服务器"""
@@ -22,13 +24,14 @@ def main():
         default="sse",
         help="传输协议: stdio(标准IO)或sse(服务器发送事件)"
     )
+    parser.add_argument("--workers", type=int, default=1, help="SSE模式下的工作进程数，大于1时以多进程方式运行")
 
     args = parser.parse_args()
     
     # 输出可用功能
     print("启动用户电话查询MCP服务...")
-    print("可用工具: 查询电话")
-    print("可用资源: users://all, user://{name}, status://")
+    print("可用工具: 查询电话, 搜索用户")
+    print("可用资源: users://all, users://page/{limit}/{cursor}, user://{name}, status://, metrics://")
     
     # 设置环境变量以配置SSE服务器
     if args.transport == "sse":
@@ -37,6 +40,16 @@ def main():
         mcp.settings.port = args.port
         mcp.settings.sse_path = args.ssepath
         print(f"使用SSE模式启动服务器，地址: {args.host}:{args.port}")
+        print("指标路径: /metrics")
+        print("导出路径: /export/users")
+        if args.workers > 1:
+            # 各工作进程打开同一个用户存储（sqlite/mmap后端），memory后端为各进程独立的示例数据
+            print(f"工作进程数: {args.workers}，用户存储: {os.getenv('USERONLIE_STORE', 'memory')}")
+            serve_workers("useronlie.core.server", args.workers, args.host, args.port, args.ssepath)
+            return
+        # 与mcp.run("sse")相同，另外提供/metrics指标端点和用户流式导出端点
+        run_sse(mcp, routes=ROUTES)
+        return
     else:
         print("使用STDIO模式启动服务器")
     
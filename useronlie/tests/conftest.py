@@ -0,0 +1,8 @@
+"""
+测试公共夹具：useronlie目录（core包）加入导入路径，导入core时再加入仓库根目录（mcp_common）
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
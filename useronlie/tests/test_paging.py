@@ -0,0 +1,56 @@
+"""
+users://page分页资源：游标翻页覆盖全部用户，无效游标报错而不是从头开始
+"""
+
+import pytest
+
+from core import server
+from core.store import MemoryStore, SortedFileStore, SQLiteStore, write_sorted_file
+
+USERS = {f"用户{i:03d}": f"138{i:08d}" for i in range(57)}
+USERS.update({"alice": "1", "bob": "2", "Zed": "3", "a b/c": "4"})
+
+
+@pytest.fixture(params=["memory", "sqlite", "mmap"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        store = MemoryStore(dict(USERS))
+    elif request.param == "sqlite":
+        store = SQLiteStore(tmp_path / "users.db")
+        store.import_users(USERS.items())
+    else:
+        write_sorted_file(tmp_path / "users.tsv", USERS.items())
+        store = SortedFileStore(tmp_path / "users.tsv")
+    monkeypatch.setattr(server, "store", store)
+    return store
+
+
+def read_all_pages(limit: int) -> list:
+    names = []
+    page = server.分页获取用户(limit)
+    while True:
+        assert page["数量"] == len(page["用户"]) <= limit
+        names += page["用户"]
+        if page["游标"] is None:
+            assert page["下一页"] is None
+            return names
+        assert page["下一页"] == f"users://page/{limit}/{page['游标']}"
+        page = server.分页获取用户_游标(limit, page["游标"])
+
+
+@pytest.mark.parametrize("limit", [1, 7, 61, 1000])
+def test_pages_cover_every_user_once_in_order(store, limit):
+    assert read_all_pages(limit) == sorted(USERS)
+
+
+def test_cursor_roundtrip():
+    for name in USERS:
+        cursor = server._encode_cursor(name)
+        assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+        assert server._decode_cursor(cursor) == name
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "YWJj=", "YWJ", "YW+j", "YW/j", "5L2g5aW9x"])
+def test_invalid_cursor_is_rejected(store, cursor):
+    with pytest.raises(ValueError):
+        server.分页获取用户_游标(10, cursor)
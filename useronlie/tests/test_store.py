@@ -0,0 +1,109 @@
+"""
+用户存储后端：精确、前缀和模糊查找，数据变化后的版本号和users://all缓存，文件替换时的并发读取
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from core import server
+from core.store import MemoryStore, SortedFileStore, SQLiteStore, write_sorted_file
+
+USERS = {"张三": "13812345678", "张三丰": "13800000001", "张伟": "13800000002", "李四": "13987654321",
+         "alice": "1", "alicia": "2", "bob": "3"}
+
+
+@pytest.fixture(params=["memory", "sqlite", "mmap"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore(dict(USERS))
+    if request.param == "sqlite":
+        store = SQLiteStore(tmp_path / "users.db")
+        store.import_users(USERS.items())
+        return store
+    write_sorted_file(tmp_path / "users.tsv", USERS.items())
+    return SortedFileStore(tmp_path / "users.tsv")
+
+
+def test_exact_lookup_and_count(store):
+    assert store.get("张三") == "13812345678"
+    assert store.get("张") is None and store.get("zzz") is None
+    assert store.count() == len(USERS)
+
+
+def test_prefix_lookup_is_sorted_and_limited(store):
+    assert [name for name, _ in store.prefix("张")] == sorted(name for name in USERS if name.startswith("张"))
+    assert store.prefix("ali", limit=1) == [("alice", "1")]
+    assert store.prefix("x") == []
+
+
+def test_fuzzy_lookup_prefers_closest_names(store):
+    names = [name for name, _, _ in store.fuzzy("张三", limit=3)]
+    assert names[0] == "张三" and "张三丰" in names
+    assert [name for name, _, _ in store.fuzzy("alise", limit=2)] == ["alice", "alicia"]
+
+
+def test_iter_users_batches_cover_everything(store):
+    assert list(store.iter_users(batch=2)) == sorted(USERS.items())
+
+
+def test_writes_change_version(tmp_path):
+    store = SQLiteStore(tmp_path / "users.db")
+    store.import_users(USERS.items())
+    version = store.version()
+    store.set("新用户", "100")
+    assert store.version() != version and store.get("新用户") == "100"
+    assert store.delete("新用户") and store.get("新用户") is None
+
+
+def test_replaced_sorted_file_is_reloaded(tmp_path):
+    path = tmp_path / "users.tsv"
+    write_sorted_file(path, USERS.items())
+    store = SortedFileStore(path)
+    assert store.get("bob") == "3"
+    write_sorted_file(path, [("bob", "4")])
+    os.utime(path, ns=(0, store.version()[0] + 1))
+    assert store.get("bob") == "4" and store.count() == 1
+
+
+
+def test_reload_does_not_break_concurrent_reads(tmp_path):
+    path = tmp_path / "users.tsv"
+    write_sorted_file(path, ((f"u{i:04d}", str(i)) for i in range(2000)))
+    store = SortedFileStore(path)
+    store.count()
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                rows = store.scan("u", limit=500)
+                assert all(name == f"u{int(phone):04d}" for name, phone in rows)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    # 每次替换的用户数不同，文件大小随之变化，查询方会在读取途中触发重新加载
+    for step in range(50):
+        write_sorted_file(path, ((f"u{i:04d}", str(i)) for i in range(1000 + step * 20)))
+        time.sleep(0.002)
+    done.set()
+    for thread in readers:
+        thread.join()
+    assert errors == []
+    assert store.count() == 1000 + 49 * 20
+
+def test_all_users_payload_matches_json_and_follows_changes(monkeypatch):
+    store = MemoryStore(dict(USERS))
+    monkeypatch.setattr(server, "store", store)
+    expected = {"用户": {name: {"电话": phone} for name, phone in sorted(USERS.items())}}
+    assert json.loads(server.获取所有用户()) == expected
+    store.set("新用户", "100")
+    assert json.loads(server.获取所有用户())["用户"]["新用户"] == {"电话": "100"}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+准入控制基准测试
+
+桩服务器以固定延迟响应并限速，多个SSE客户端同时发起一波search_title_by_keywords调用（各不相同，不命中缓存），
+分别在不启用和启用准入控制时统计：在客户端超时前完成的调用数、被拒绝的调用数及其返回耗时、
+完成调用的延迟，以及响应_meta.admission中报告的排队时间。
+不启用准入控制时所有调用都排在限速器后面，靠后的调用等到客户端超时；启用后超出队列和截止时间的调用立即返回繁忙
+
+用法:
+    python benchmarks/bench_admission.py --burst 60 --rate 10 --client-timeout 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from stub_server import StubServer
+from bench_e2e import RUN_SCRIPT, free_port, server_env
+from bench_fetch import percentile
+from bench_workers import wait_ready
+
+TOOL = "search_title_by_keywords"
+PREFIX = "XMOL_ADMISSION_SEARCH_TITLE_BY_KEYWORDS_"
+
+
+def summarize(values: list) -> str:
+    if not values:
+        return "-"
+    return f"{statistics.median(values) * 1000:.0f}/{percentile(values, 95) * 1000:.0f}"
+
+
+async def run_mode(stub: StubServer, mode: str, args) -> dict:
+    port = free_port()
+    env = server_env(stub.base_url, port)
+    env["XMOL_RATE"] = str(args.rate)
+    env["XMOL_BURST"] = str(args.rate)
+    env["XMOL_WARMER_INTERVAL"] = "0"
+    if mode == "on":
+        env.update({PREFIX + "CONCURRENCY": str(args.concurrency), PREFIX + "QUEUE": str(args.queue),
+                    PREFIX + "TIMEOUT": str(args.queue_timeout)})
+    else:
+        env[PREFIX + "CONCURRENCY"] = "0"
+
+    with tempfile.TemporaryDirectory(prefix="xmol-bench-") as workdir, \
+            open(Path(workdir) / "server.log", "w") as errlog:
+        process = subprocess.Popen(
+            [sys.executable, str(RUN_SCRIPT), "--transport", "sse", "--host", "127.0.0.1", "--port", str(port)],
+            env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=errlog,
+        )
+        try:
+            await wait_ready(port, process)
+            async with sse_client(f"http://127.0.0.1:{port}/sse", timeout=30) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    done, shed, timed_out, queue_ms = [], [], 0, []
+
+                    async def one(i: int) -> None:
+                        nonlocal timed_out
+                        start = time.perf_counter()
+                        try:
+                            result = await asyncio.wait_for(
+                                session.call_tool(TOOL, {"keywords": [f"burst {mode} {i}"], "output_format": "json"}),
+                                args.client_timeout,
+                            )
+                        except Exception:
+                            timed_out += 1
+                            return
+                        elapsed = time.perf_counter() - start
+                        admission = (result.meta or {}).get("admission", {})
+                        if admission.get("status") == "shed":
+                            shed.append(elapsed)
+                        else:
+                            done.append(elapsed)
+                            if "queue_ms" in admission:
+                                queue_ms.append(admission["queue_ms"] / 1000)
+
+                    await asyncio.gather(*(one(i) for i in range(args.burst)))
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {"mode": mode, "done": done, "shed": shed, "timed_out": timed_out, "queue": queue_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="准入控制基准测试")
+    parser.add_argument("--burst", type=int, default=60, help="同时发起的调用数")
+    parser.add_argument("--rate", type=float, default=10, help="上游限速(请求/秒)，每次搜索约需2个请求")
+    parser.add_argument("--latency", type=float, default=0.05, help="桩服务器每个请求的延迟(秒)")
+    parser.add_argument("--client-timeout", type=float, default=5, help="客户端等待单次调用的超时(秒)")
+    parser.add_argument("--concurrency", type=int, default=8, help="启用准入控制时的并发上限")
+    parser.add_argument("--queue", type=int, default=16, help="启用准入控制时的队列长度")
+    parser.add_argument("--queue-timeout", type=float, default=3, help="启用准入控制时的排队截止时间(秒)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubServer(latency=args.latency).start()
+    try:
+        results = [asyncio.run(run_mode(stub, mode, args)) for mode in ("off", "on")]
+    finally:
+        stub.stop()
+
+    print(f"一波{args.burst}个调用，上游限速{args.rate}/s，客户端超时{args.client_timeout}s；"
+          f"准入控制: 并发{args.concurrency}，队列{args.queue}，截止{args.queue_timeout}s")
+    print(f"{'admission':>9} {'done':>5} {'shed':>5} {'timeout':>8} {'done p50/p95 ms':>16} "
+          f"{'shed p50/p95 ms':>16} {'queue p50/p95 ms':>17}")
+    for item in results:
+        print(f"{item['mode']:>9} {len(item['done']):>5} {len(item['shed']):>5} {item['timed_out']:>8} "
+              f"{summarize(item['done']):>16} {summarize(item['shed']):>16} {summarize(item['queue']):>17}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
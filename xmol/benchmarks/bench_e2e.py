@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+端到端回放基准测试
+
+桩服务器回放 fixtures/ 下保存的结果页和详情页（由桩服务器生成），以子进程方式启动真实的MCP服务（run.py），
+分别通过STDIO和SSE传输以MCP客户端调用search_title_by_keywords和get_literature_detail，
+在不同并发下统计吞吐量、p50/p95/p99延迟和服务进程的内存占用(RSS)。
+
+--output 将结果写入JSON基线文件；--compare 与已有基线比较，吞吐量下降、p95延迟、峰值RSS
+超出容差或出现新的错误时以非零状态退出，可在部署前发现解析、缓存或传输层的性能回退
+
+用法:
+    python benchmarks/bench_e2e.py --transports stdio sse --concurrency 1 8 --requests 200 --output baseline.json
+    python benchmarks/bench_e2e.py --compare benchmarks/baseline_e2e.json --tolerance 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.stdio import StdioServerParameters, get_default_environment, stdio_client
+
+from stub_server import StubServer
+from bench_fetch import percentile
+
+BENCH_DIR = Path(__file__).resolve().parent
+RUN_SCRIPT = BENCH_DIR.parent / "run.py"
+FIXTURES = BENCH_DIR / "fixtures"
+
+DOI_PATTERN = re.compile(r'"doi":\s*"([^"]+)"')
+
+
+def read_rss(pid: int) -> dict:
+    """
+    从/proc读取进程当前和峰值RSS(MB)；非Linux系统返回空值
+    """
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return {"rss_mb": None, "peak_rss_mb": None}
+    values = dict(re.findall(r"^(VmRSS|VmHWM):\s+(\d+) kB", status, re.M))
+    return {
+        "rss_mb": round(int(values["VmRSS"]) / 1024, 1) if "VmRSS" in values else None,
+        "peak_rss_mb": round(int(values["VmHWM"]) / 1024, 1) if "VmHWM" in values else None,
+    }
+
+
+def find_server_pid() -> int:
+    """
+    查找由stdio_client启动的服务子进程
+    """
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes().decode(errors="ignore")
+        except OSError:
+            continue
+        if int(stat.rsplit(")", 1)[1].split()[1]) == os.getpid() and str(RUN_SCRIPT) in cmdline:
+            return int(entry.name)
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(base_url: str, port: int = None) -> dict:
+    """
+    服务进程的环境变量：指向桩服务器，不限速，日志只输出警告
+    """
+    env = get_default_environment()
+    env.update({
+        "PYTHONPATH": os.pathsep.join([str(BENCH_DIR.parent), str(BENCH_DIR.parent.parent)]),
+        "XMOL_BASE_URL": base_url,
+        "Cookie": "atk0210=stub",
+        "XMOL_RATE": "0",
+        "FASTMCP_log_level": "WARNING",
+    })
+    if port is not None:
+        env.update({"FASTMCP_host": "127.0.0.1", "FASTMCP_port": str(port)})
+    return env
+
+
+@asynccontextmanager
+async def stdio_session(base_url: str, workdir: Path, errlog):
+    params = StdioServerParameters(command=sys.executable, args=[str(RUN_SCRIPT), "--transport", "stdio"],
+                                   env=server_env(base_url), cwd=str(workdir))
+    async with stdio_client(params, errlog=errlog) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session, find_server_pid()
+
+
+@asynccontextmanager
+async def sse_session(base_url: str, workdir: Path, errlog):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(RUN_SCRIPT), "--transport", "sse", "--host", "127.0.0.1", "--port", str(port)],
+        env=server_env(base_url, port), cwd=str(workdir), stdout=subprocess.DEVNULL, stderr=errlog,
+    )
+    try:
+        # 等待服务就绪
+        deadline = time.monotonic() + 30
+        async with httpx.AsyncClient() as client:
+            while True:
+                try:
+                    if (await client.get(f"http://127.0.0.1:{port}/metrics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("SSE服务启动失败，详见服务日志")
+                await asyncio.sleep(0.1)
+        async with sse_client(f"http://127.0.0.1:{port}/sse", timeout=30) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+TRANSPORTS = {"stdio": stdio_session, "sse": sse_session}
+
+
+def tool_error(result) -> bool:
+    if result.isError:
+        return True
+    text = "".join(getattr(item, "text", "") for item in result.content)
+    try:
+        return "error" in json.loads(text)
+    except ValueError:
+        return True
+
+
+async def run_level(session, concurrency: int, total: int, keywords: int, detail_ratio: float, dois: list) -> dict:
+    """
+    以指定并发发起total次工具调用；搜索在keywords个关键词间循环，重复的关键词命中缓存，
+    每detail_ratio比例的调用改为按DOI获取详情。关键词带上并发等级，各等级之间不共享缓存
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {"search_title_by_keywords": [], "get_literature_detail": []}
+    errors = 0
+    detail_every = round(1 / detail_ratio) if detail_ratio > 0 else 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        if detail_every and i % detail_every == detail_every - 1:
+            tool, arguments = "get_literature_detail", {"doi": dois[i % len(dois)], "output_format": "json"}
+        else:
+            tool = "search_title_by_keywords"
+            arguments = {"keywords": [f"catalysis c{concurrency} {i % keywords}"], "output_format": "json"}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                failed = tool_error(await session.call_tool(tool, arguments))
+            except Exception:
+                failed = True
+            latencies[tool].append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    def summarize(values: list) -> dict:
+        if not values:
+            return {"calls": 0}
+        return {
+            "calls": len(values),
+            "p50_ms": round(statistics.median(values) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+
+    overall = summarize([value for values in latencies.values() for value in values])
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": round(total / elapsed, 2),
+        "errors": errors,
+        **{key: value for key, value in overall.items() if key != "calls"},
+        "calls": overall["calls"],
+        "tools": {tool: summarize(values) for tool, values in latencies.items()},
+    }
+
+
+async def run_transport(transport: str, base_url: str, args) -> list:
+    """
+    启动一个全新的服务进程（空缓存），依次跑各个并发等级
+    """
+    with tempfile.TemporaryDirectory(prefix="xmol-bench-") as workdir:
+        with open(Path(workdir) / "server.log", "w") as errlog:
+            async with TRANSPORTS[transport](base_url, Path(workdir), errlog) as (session, pid):
+                # 预热：列出工具并做一次搜索，取得详情调用用到的DOI
+                await session.list_tools()
+                warmup = await session.call_tool("search_title_by_keywords",
+                                                 {"keywords": ["warmup"], "output_format": "json"})
+                dois = DOI_PATTERN.findall("".join(getattr(item, "text", "") for item in warmup.content))
+                if not dois:
+                    raise RuntimeError(f"{transport}预热搜索没有返回文献: {warmup.content}")
+                results = []
+                for concurrency in args.concurrency:
+                    result = await run_level(session, concurrency, args.requests, args.keywords,
+                                             args.detail_ratio, dois)
+                    results.append({"transport": transport, **result, **read_rss(pid)})
+                return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    与基线比较，返回回退说明列表
+    """
+    reference = {(item["transport"], item["concurrency"]): item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        base = reference.get((item["transport"], item["concurrency"]))
+        if base is None:
+            continue
+        name = f"{item['transport']}/c{item['concurrency']}"
+        if item["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name} 吞吐量 {base['throughput_rps']} -> {item['throughput_rps']} req/s")
+        if item["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name} p95 {base['p95_ms']} -> {item['p95_ms']} ms")
+        if item["errors"] > base["errors"]:
+            regressions.append(f"{name} 错误数 {base['errors']} -> {item['errors']}")
+        if item["peak_rss_mb"] and base.get("peak_rss_mb") and \
+                item["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name} 峰值RSS {base['peak_rss_mb']} -> {item['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端回放基准测试")
+    parser.add_argument("--transports", nargs="+", choices=list(TRANSPORTS), default=list(TRANSPORTS),
+                        help="MCP传输方式")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="并发等级")
+    parser.add_argument("--requests", type=int, default=200, help="每个并发等级的工具调用次数")
+    parser.add_argument("--keywords", type=int, default=50, help="搜索轮换的关键词数，越少缓存命中越多")
+    parser.add_argument("--detail-ratio", type=float, default=0.25, help="获取详情调用的比例")
+    parser.add_argument("--latency", type=float, default=0.01, help="桩服务器每次响应的模拟延迟(秒)")
+    parser.add_argument("--papers", type=int, default=20, choices=[20, 50], help="回放的结果页每页文献数")
+    parser.add_argument("--output", type=Path, help="将结果写入JSON基线文件")
+    parser.add_argument("--compare", type=Path, help="与JSON基线比较，出现回退时以状态1退出")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="比较时允许的相对波动")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    server = StubServer(latency=args.latency, papers=args.papers, fixtures=FIXTURES).start()
+    results = []
+    try:
+        for transport in args.transports:
+            results.extend(asyncio.run(run_transport(transport, server.base_url, args)))
+    finally:
+        server.stop()
+
+    print(f"{'transport':>9}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+          f"{'rss MB':>8}{'peak MB':>9}")
+    for item in results:
+        print(f"{item['transport']:>9}{item['concurrency']:>6}{item['throughput_rps']:>9.1f}{item['p50_ms']:>9.2f}"
+              f"{item['p95_ms']:>9.2f}{item['p99_ms']:>9.2f}{item['errors']:>8}"
+              f"{item['rss_mb'] or 0:>8.1f}{item['peak_rss_mb'] or 0:>9.1f}")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "requests": args.requests,
+            "keywords": args.keywords,
+            "detail_ratio": args.detail_ratio,
+            "latency": args.latency,
+            "papers": args.papers,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"基线已写入 {args.output}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"回退: {line}")
+        if regressions:
+            return 1
+        print(f"与基线 {args.compare} 相比没有超出 {args.tolerance:.0%} 的回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
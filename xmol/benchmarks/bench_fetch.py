@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+get_content 抓取引擎基准测试
+
+在本地桩服务器上并发执行搜索，输出吞吐量与p50/p99延迟
+
+用法:
+    python benchmarks/bench_fetch.py --requests 200 --concurrency 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_server import StubServer  # noqa: E402
+from core.content import AsyncFetcher, RateLimiter, get_content  # noqa: E402
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    计算百分位数（最近秩法）
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(base_url: str, total: int, concurrency: int, max_connections: int,
+                        limiter: RateLimiter = None) -> dict:
+    fetcher = AsyncFetcher(base_url=base_url, max_connections=max_connections,
+                           max_keepalive=max_connections, limiter=limiter)
+    tool = get_content(fetcher=fetcher)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await tool.get_page_content(
+                keywordList=[f"catalysis{i % 50}", "materials"], ck="atk0210=stub",
+                impact="8", searchSort="", pageindex=1 + i % 5,
+            )
+            latencies.append(time.perf_counter() - start)
+            if isinstance(result, dict):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    await fetcher.aclose()
+    result = {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+    if limiter is not None:
+        result["limiter"] = limiter.metrics()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_content 抓取引擎基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--latency", type=float, default=0.02, help="桩服务器每次响应的模拟延迟(秒)")
+    parser.add_argument("--papers", type=int, default=20, help="每页文献数")
+    parser.add_argument("--max-connections", type=int, default=20, help="连接池上限")
+    parser.add_argument("--rate", type=float, default=0, help="限速器每秒请求数，0表示不限速")
+    parser.add_argument("--burst", type=float, default=4, help="限速器突发容量")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = StubServer(latency=args.latency, papers=args.papers).start()
+    limiter = RateLimiter(rate=args.rate, burst=args.burst) if args.rate > 0 else None
+    try:
+        result = asyncio.run(run_benchmark(server.base_url, args.requests, args.concurrency,
+                                           args.max_connections, limiter))
+    finally:
+        server.stop()
+
+    result["upstream_calls"] = dict(server.counters)
+    for key, value in result.items():
+        print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
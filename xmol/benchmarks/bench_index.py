@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地文献索引基准测试
+
+建立指定数量文献的索引，输出建索引耗时、内存占用以及精确/前缀/容错/DOI查询的延迟。
+样例文献的标题和摘要共用同一组英文单词，单个常见词的查询需要遍历全部文献，延迟明显高于多词查询
+
+用法:
+    python benchmarks/bench_index.py --docs 100000
+"""
+
+import argparse
+import gc
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_paper_memory import raw_fields  # noqa: E402
+from core.content.index import PaperIndex  # noqa: E402
+from core.content.paper import Paper  # noqa: E402
+
+
+def timed(fn, queries: list) -> dict:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地文献索引基准测试")
+    parser.add_argument("--docs", type=int, default=100000, help="索引的文献数")
+    parser.add_argument("--queries", type=int, default=200, help="每类查询的次数")
+    args = parser.parse_args()
+
+    papers = [Paper.create(**raw_fields(i)) for i in range(args.docs)]
+    index = PaperIndex(max_docs=args.docs)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index.add_many(papers)
+    build = time.perf_counter() - start
+    memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) * 1024
+    gc.collect()  # 避免建索引产生的大量对象触发的GC停顿计入查询延迟
+
+    step = max(1, args.docs // args.queries)
+    sample = papers[::step][:args.queries]
+    runs = {
+        "title": lambda paper: index.search(paper.title, limit=10),
+        "prefix": lambda paper: index.search(f"catalysis {paper.title.split()[2][:5]}", limit=10),
+        "fuzzy": lambda paper: index.search(f"catalysis {paper.title.split()[2][:-1]}x", limit=10),
+        "doi": lambda paper: index.lookup_doi(paper.doi.upper()),
+        "doi(similar)": lambda paper: index.similar_dois(paper.doi[:-1] + "#"),
+    }
+    print(f"索引文献数: {len(index)}, 词项数: {index.stats()['terms']}")
+    print(f"建索引: {build:.2f}秒, 索引内存(RSS增量): {memory / 1024 / 1024:.1f}MB")
+    print(f"{'query':<12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, fn in runs.items():
+        result = timed(fn, sample)
+        print(f"{name:<12}{result['p50']:>10.2f}{result['p99']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
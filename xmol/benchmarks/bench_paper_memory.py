@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文献记录内存基准测试
+
+比较原先的每篇文献一个dict（影响因子、日期为字符串，期刊名各自一份）与Paper记录
+在内存缓存中每条占用的字节数
+
+用法:
+    python benchmarks/bench_paper_memory.py --entries 100000
+"""
+
+import argparse
+import hashlib
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from core.content.cache import LRUCache  # noqa: E402
+from core.content.paper import Paper  # noqa: E402
+from stub_server import JOURNALS  # noqa: E402
+
+BASEURL = "https://www.x-mol.com/"
+
+
+def raw_fields(index: int) -> dict:
+    """
+    生成一篇文献解析后的原始字符串字段，每个字符串都是新对象，与解析HTML时一致
+    """
+    digest = hashlib.md5(str(index).encode()).hexdigest()
+    return {
+        "title": f"Stub paper {digest[:8]} on catalysis and materials #{index}",
+        "journal": "".join(JOURNALS[index % len(JOURNALS)]),
+        "impact": f"{8 + (int(digest[:4], 16) % 4000) / 100:.3f}",
+        "pubdate": f"2024-{1 + index % 12:02d}-{1 + index % 28:02d}",
+        "doi": f"10.{1000 + index % 5000}/stub.{digest[:10]}",
+        "url": f"{BASEURL}paper/{digest[:12]}",
+        "abstract": f"Abstract of stub paper {digest}. "
+                    "We report a scalable route towards efficient catalysts with high selectivity.",
+    }
+
+
+def legacy_record(fields: dict) -> dict:
+    return {
+        "title": fields["title"],
+        "jounal": fields["journal"],
+        "impact": fields["impact"],
+        "pubdata": fields["pubdate"],
+        "doi": fields["doi"],
+        "url": fields["url"],
+        "abstract": fields["abstract"],
+    }
+
+
+def paper_record(fields: dict) -> Paper:
+    return Paper.create(**fields)
+
+
+def measure(build, entries: int, encode=None) -> dict:
+    """
+    按DOI写入内存LRU缓存，返回每条记录的内存占用和估算的JSON字节数
+    """
+    cache = LRUCache(max_entries=entries, max_bytes=1 << 40, encode=encode)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(entries):
+        record = build(raw_fields(index))
+        cache.set(record["doi"] if isinstance(record, dict) else record.doi, record)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "bytes_per_entry": allocated / entries,
+        "json_bytes_per_entry": cache.bytes / entries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文献记录内存基准测试")
+    parser.add_argument("--entries", type=int, default=100000, help="缓存的文献数")
+    args = parser.parse_args()
+
+    sample = raw_fields(0)
+    legacy = legacy_record(sample)
+    paper = paper_record(sample)
+    if Paper.from_dict(legacy) != paper or Paper.from_dict(paper.to_dict()) != paper:
+        print("Paper与原字典格式转换结果不一致")
+        return 1
+
+    runs = {
+        "dict(原格式)": measure(legacy_record, args.entries),
+        "Paper": measure(paper_record, args.entries, encode=Paper.to_dict),
+    }
+    print(f"缓存文献数: {args.entries}")
+    print(f"{'record':<16}{'bytes/paper':>14}{'json bytes':>14}")
+    for name, result in runs.items():
+        print(f"{name:<16}{result['bytes_per_entry']:>14.0f}{result['json_bytes_per_entry']:>14.0f}")
+    saved = 1 - runs["Paper"]["bytes_per_entry"] / runs["dict(原格式)"]["bytes_per_entry"]
+    print(f"每篇节省: {saved:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+结果页解析基准测试
+
+对 fixtures/ 下保存的结果页逐个后端解析，输出每秒页数和每页内存分配，
+并校验各后端解析结果与 html.parser 一致
+
+用法:
+    python benchmarks/bench_parser.py --iterations 50
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.content.paper import Paper  # noqa: E402
+from core.content.parser import BACKENDS, available_backends, parse_result_page  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+BASEURL = "https://www.x-mol.com/"
+
+
+def parse_with(html: str, backend: str):
+    return parse_result_page(html, BASEURL, backend)
+
+
+def legacy_parse(html: str):
+    """
+    原实现：整页BeautifulSoup解析，逐条find/select并现场编译正则
+    """
+    import re
+    from bs4 import BeautifulSoup as bs
+
+    soup = bs(html, "html.parser")
+    content_list = soup.find("div", {"class": "magazine-senior-search-results-list"})
+    paper_all = []
+    for content in content_list.find_all("li"):
+        title = content.find("div", {"class": "it-bold space-bottom-m10"})
+        info = content.find("div", {"class": "div-text-line-one it-new-gary"})
+        jounal = info.find("em", {"class": "it-blue"})
+        impact = info.find("span")
+        doi_match = re.search('DOI:(.*)', info.text)
+        url_elements = content.select("a")
+        pubdata = re.search(r"Pub Date\s*:\s*(\d{4}-\d{2}-\d{2})", info.text)
+        url = url_elements[3] if len(url_elements) > 3 else {"href": ""}
+        abstract = content.find("div", {"class": "div-text-line-three itsmlink"})
+        paper_all.append({
+            'title': title.text.strip() if title else "未知标题",
+            'jounal': jounal.text.strip() if jounal else "未知期刊",
+            'impact': impact.text.strip() if impact else "未知影响因子",
+            'pubdata': pubdata.group(1).strip() if pubdata else "未知发布日期",
+            'doi': doi_match.group(1).strip() if doi_match else "未知DOI",
+            'url': BASEURL + url['href'].strip(),
+            'abstract': abstract.text.strip() if abstract else "未知摘要",
+        })
+    return paper_all
+
+
+def measure(fn, pages: list, iterations: int) -> dict:
+    fn(pages[0])  # 预热导入和缓存
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            fn(html)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    blocks = 0
+    peak = 0
+    for html in pages:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        fn(html)
+        after = tracemalloc.take_snapshot()
+        blocks += sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    total = iterations * len(pages)
+    return {
+        "pages_per_sec": total / elapsed,
+        "ms_per_page": elapsed / total * 1000,
+        "peak_kb_per_page": peak / 1024,
+        "retained_blocks": blocks / len(pages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结果页解析基准测试")
+    parser.add_argument("--iterations", type=int, default=30, help="每个后端重复解析的轮数")
+    parser.add_argument("--backend", action="append", help="只测试指定后端，可重复")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("*.html"))]
+    if not pages:
+        print(f"未找到样例页面: {FIXTURES}")
+        return 1
+
+    expected = [[Paper.from_dict(item) for item in legacy_parse(html)] for html in pages]
+    backends = args.backend or available_backends()
+    runs = {"legacy(bs4 整页)": legacy_parse}
+    for backend in backends:
+        if backend not in BACKENDS:
+            print(f"未知后端: {backend}")
+            return 1
+        got = [parse_with(html, backend) for html in pages]
+        if got != expected:
+            print(f"后端{backend}的解析结果与原实现不一致")
+            return 1
+        runs[backend] = lambda html, backend=backend: parse_with(html, backend)
+
+    print(f"样例页面: {len(pages)}个, 可用后端: {', '.join(backends)}")
+    print(f"{'backend':<18}{'pages/s':>10}{'ms/page':>10}{'peak KB':>10}{'blocks':>10}")
+    for name, fn in runs.items():
+        result = measure(fn, pages, args.iterations)
+        print(f"{name:<18}{result['pages_per_sec']:>10.1f}{result['ms_per_page']:>10.2f}"
+              f"{result['peak_kb_per_page']:>10.1f}{result['retained_blocks']:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
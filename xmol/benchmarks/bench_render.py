@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+输出渲染基准测试
+
+分别以每次响应50/500/5000篇文献，比较原先逐行+=拼接的Markdown渲染、
+模板渲染（首次渲染与复用缓存片段）以及紧凑JSON输出的耗时
+
+用法:
+    python benchmarks/bench_render.py --sizes 50 500 5000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_paper_memory import raw_fields  # noqa: E402
+from core.content.paper import Paper  # noqa: E402
+from core.content.render import render_papers  # noqa: E402
+
+
+def legacy_render(literature_list: list) -> str:
+    """
+    原实现：逐行+=拼接
+    """
+    markdown = "### 搜索结果\n\n"
+    for i, paper in enumerate(literature_list):
+        markdown += f"{i+1}. **{paper.title}**\n"
+        markdown += f"   - 期刊: {paper.journal}\n"
+        markdown += f"   - 影响因子: {paper.impact_text}\n"
+        markdown += f"   - 发布日期: {paper.pubdate_text}\n"
+        markdown += f"   - DOI: {paper.doi}\n"
+        markdown += f"   - [文献链接]({paper.url})\n\n"
+    markdown += "\n请继续使用 `get_literature_detail` 工具获取特定文献的详细信息，提供DOI作为参数。"
+    return markdown
+
+
+def clear(papers: list) -> None:
+    for paper in papers:
+        paper._markdown = None
+        paper._json = None
+
+
+def measure(fn, papers: list, min_time: float, cold: bool) -> float:
+    """
+    返回每次渲染的平均毫秒数；cold为True时每次渲染前清空片段缓存（不计入耗时）
+    """
+    fn(papers)
+    total = 0.0
+    runs = 0
+    while total < min_time:
+        if cold:
+            clear(papers)
+        start = time.perf_counter()
+        fn(papers)
+        total += time.perf_counter() - start
+        runs += 1
+    return total / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输出渲染基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="每次响应的文献数")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每项至少运行的秒数")
+    args = parser.parse_args()
+
+    papers = [Paper.create(**raw_fields(i)) for i in range(max(args.sizes))]
+    if render_papers(papers[:50]) != legacy_render(papers[:50]):
+        print("模板渲染结果与原实现不一致")
+        return 1
+    json.loads(render_papers(papers[:50], "json"))
+
+    runs = {
+        "legacy +=": (legacy_render, False),
+        "template(cold)": (render_papers, True),
+        "template(warm)": (render_papers, False),
+        "json(cold)": (lambda items: render_papers(items, "json"), True),
+        "json(warm)": (lambda items: render_papers(items, "json"), False),
+    }
+    print(f"{'renderer':<16}" + "".join(f"{f'{size} ms':>12}" for size in args.sizes))
+    for name, (fn, cold) in runs.items():
+        row = [measure(fn, papers[:size], args.min_time, cold) for size in args.sizes]
+        print(f"{name:<16}" + "".join(f"{value:>12.3f}" for value in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
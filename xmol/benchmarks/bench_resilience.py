@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+上游故障基准测试
+
+brownout: 桩服务器按比例返回503并让部分请求长时间无响应，比较不重试且只有长超时
+（相当于原先的行为）与短读取超时加抖动重试时的成功率和尾延迟；
+outage: 上游完全不可用时，比较有无熔断器的请求延迟和打到上游的请求数，并验证搜索缓存返回旧结果兜底
+
+用法:
+    python benchmarks/bench_resilience.py --requests 200 --error-rate 0.2 --stall-rate 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_server import StubServer  # noqa: E402
+from bench_fetch import percentile  # noqa: E402
+from core.content import (AsyncFetcher, CircuitBreaker, LRUCache, SearchCache, SessionPool,  # noqa: E402
+                          TieredCache, encode_entry, get_content)
+
+
+def summarize(latencies: list, errors: int) -> dict:
+    return {
+        "ok": 1 - errors / len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_searches(tool, total: int, concurrency: int, keyword=lambda i: f"catalysis{i}", cache=None) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            fetch = lambda: tool.get_page_content(keywordList=[keyword(i)], impact="8", searchSort="")  # noqa: E731
+            result = await (cache.get_or_fetch(keyword(i), fetch) if cache is not None else fetch())
+            latencies.append(time.perf_counter() - start)
+            if isinstance(result, dict):
+                errors += 1
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return summarize(latencies, errors)
+
+
+def make_tool(base_url: str, **options):
+    fetcher = AsyncFetcher(base_url=base_url, max_connections=50, max_keepalive=50, **options)
+    return get_content(fetcher=fetcher, sessions=SessionPool(["atk0210=stub"])), fetcher
+
+
+async def brownout(server: StubServer, args) -> None:
+    configs = {
+        "no retry, read 10s": {"retries": 0, "read_timeout": 10.0},
+        f"retry x{args.retries}, read {args.read_timeout:g}s": {
+            "retries": args.retries, "read_timeout": args.read_timeout, "backoff": 0.05,
+        },
+    }
+    print(f"brownout: 503 {args.error_rate:.0%}, 无响应{args.stall:g}秒 {args.stall_rate:.0%}")
+    print(f"{'config':<24}{'ok':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'retried':>9}")
+    for name, options in configs.items():
+        server.error_rate, server.stall_rate = args.error_rate, args.stall_rate
+        tool, fetcher = make_tool(server.base_url, **options)
+        result = await run_searches(tool, args.requests, args.concurrency)
+        print(f"{name:<24}{result['ok']:>8.1%}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{fetcher.retried:>9}")
+        await fetcher.aclose()
+
+
+async def outage(server: StubServer, args) -> None:
+    print("outage: 上游全部返回503，查询均已缓存但超过新鲜期")
+    print(f"{'config':<24}{'ok':>8}{'p50 ms':>10}{'p99 ms':>10}{'upstream':>10}{'fallbacks':>10}")
+    for name, breaker in {"no breaker": None, "breaker": CircuitBreaker(failure_threshold=5, reset_timeout=30)}.items():
+        server.error_rate, server.stall_rate = 0.0, 0.0
+        tool, fetcher = make_tool(server.base_url, retries=args.retries, read_timeout=args.read_timeout,
+                                  backoff=0.05, breaker=breaker)
+        cache = SearchCache(TieredCache(LRUCache(max_entries=10000, encode=encode_entry)), ttl=0, stale_ttl=0,
+                            fallback_ttl=3600)
+        keyword = lambda i: f"outage{i % 50}"  # noqa: E731
+        await run_searches(tool, 50, args.concurrency, keyword, cache)
+        server.error_rate = 1.0
+        before = sum(server.counters.values())
+        result = await run_searches(tool, args.requests, args.concurrency, keyword, cache)
+        upstream = sum(server.counters.values()) - before
+        print(f"{name:<24}{result['ok']:>8.1%}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{upstream:>10}{cache.fallbacks:>10}")
+        await fetcher.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上游故障基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每种配置的搜索次数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--latency", type=float, default=0.01, help="桩服务器每次响应的模拟延迟(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="返回503的请求比例")
+    parser.add_argument("--stall-rate", type=float, default=0.05, help="长时间无响应的请求比例")
+    parser.add_argument("--stall", type=float, default=3.0, help="无响应的秒数")
+    parser.add_argument("--retries", type=int, default=2, help="GET重试次数")
+    parser.add_argument("--read-timeout", type=float, default=0.5, help="重试配置的读取超时(秒)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    server = StubServer(latency=args.latency, stall=args.stall).start()
+    try:
+        asyncio.run(brownout(server, args))
+        asyncio.run(outage(server, args))
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+会话池基准测试
+
+每个账号会话按XMOL_SESSION_RATE限速、不设全局限速时，比较1/2/4...个会话的搜索吞吐量；
+--expired指定的会话使用失效Cookie，验证其被隔离后请求自动转到其他会话
+
+用法:
+    python benchmarks/bench_sessions.py --sessions 1 2 4 --session-rate 5 --requests 100
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_server import StubServer  # noqa: E402
+from core.content import AsyncFetcher, RateLimiter, SessionPool, get_content  # noqa: E402
+
+
+async def run_benchmark(base_url: str, sessions: int, expired: int, total: int, concurrency: int,
+                        session_rate: float, strategy: str) -> dict:
+    limiter = RateLimiter(rate=0, session_rate=session_rate, session_burst=1)
+    fetcher = AsyncFetcher(base_url=base_url, max_connections=concurrency, max_keepalive=concurrency,
+                           limiter=limiter)
+    cookies = [f"atk0210={'expired' if i < expired else 'stub'}{i}" for i in range(sessions)]
+    pool = SessionPool(cookies, strategy=strategy)
+    tool = get_content(fetcher=fetcher, sessions=pool)
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            # 每次使用不同的关键词，保证都需要搜索POST和结果页GET两次请求
+            result = await tool.get_page_content(keywordList=[f"catalysis{i}"], impact="8", searchSort="")
+            if isinstance(result, dict):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    await fetcher.aclose()
+    stats = pool.stats()
+    return {
+        "throughput_rps": total / elapsed,
+        "errors": errors,
+        "available": stats["available"],
+        "requests_per_session": [item["requests"] for item in stats["per_session"].values()],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话池基准测试")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4], help="会话数")
+    parser.add_argument("--session-rate", type=float, default=5, help="每个会话每秒的上游请求数")
+    parser.add_argument("--requests", type=int, default=100, help="每轮搜索次数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--latency", type=float, default=0.01, help="桩服务器每次响应的模拟延迟(秒)")
+    parser.add_argument("--expired", type=int, default=0, help="使用失效Cookie的会话数")
+    parser.add_argument("--strategy", default="least_loaded", help="分派策略: least_loaded或round_robin")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    server = StubServer(latency=args.latency).start()
+    try:
+        print(f"{'sessions':>8}{'searches/s':>12}{'errors':>8}{'available':>10}  requests per session")
+        for sessions in args.sessions:
+            result = asyncio.run(run_benchmark(server.base_url, sessions, min(args.expired, sessions - 1),
+                                               args.requests, args.concurrency, args.session_rate, args.strategy))
+            print(f"{sessions:>8}{result['throughput_rps']:>12.2f}{result['errors']:>8}{result['available']:>10}  "
+                  f"{result['requests_per_session']}")
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+
+每个STDIO客户端都会启动一个新的服务进程，进程在回应initialize之前的耗时直接影响客户端的等待时间。
+这里分别测量：
+- python -X importtime 导入core.server的总耗时和自身耗时最多的模块
+- 以STDIO方式启动run.py到完成initialize、到第一次tools/list返回的时间
+- 到第一次需要本地索引的工具调用(search_local_literature)返回的时间，延迟初始化的工作在这里体现
+
+--papers 在临时缓存目录中预先写入指定数量的文献，模拟运行一段时间后的持久层；
+--budget-ms 指定tools/list的耗时上限，中位数超出时以非零状态退出
+
+用法:
+    python benchmarks/bench_startup.py --papers 10000 --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, get_default_environment, stdio_client
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from bench_paper_memory import raw_fields  # noqa: E402
+from core.content import Paper, create_cache  # noqa: E402
+
+RUN_SCRIPT = BENCH_DIR.parent / "run.py"
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def server_env(cache_dir: Path) -> dict:
+    env = get_default_environment()
+    env.update({
+        "PYTHONPATH": os.pathsep.join([str(BENCH_DIR.parent), str(BENCH_DIR.parent.parent)]),
+        "XMOL_CACHE_DIR": str(cache_dir),
+        "Cookie": "atk0210=stub",
+        "XMOL_BASE_URL": "http://127.0.0.1:9",
+        "FASTMCP_log_level": "WARNING",
+    })
+    return env
+
+
+def populate(cache_dir: Path, papers: int) -> None:
+    """
+    在持久层写入papers篇文献，其中十分之一同时写入详情缓存
+    """
+    literature = create_cache("literature", cache_dir, warm=False, encode=Paper.to_dict, decode=Paper.from_dict)
+    detail = create_cache("detail", cache_dir, warm=False, encode=Paper.to_dict, decode=Paper.from_dict)
+    items = [(f"10.1000/bench.{i}", Paper.create(**{**raw_fields(i), "doi": f"10.1000/bench.{i}"}))
+             for i in range(papers)]
+    literature.set_many(items)
+    detail.set_many(items[::10])
+
+
+def import_time(env: dict, cwd: Path, top: int) -> dict:
+    """
+    用-X importtime导入core.server，返回总耗时(ms)和自身耗时最多的模块
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import core.server"],
+                            env=env, cwd=str(cwd), capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"导入core.server失败: {result.stderr[-2000:]}")
+    modules = []
+    total = 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, name = int(match.group(1)), int(match.group(2)), match.group(3)
+        modules.append((own, name))
+        if name == "core.server":
+            total = cumulative
+    modules.sort(reverse=True)
+    return {
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(total / 1000, 1),
+        "top": [(name, round(own / 1000, 1)) for own, name in modules[:top]],
+    }
+
+
+async def handshake(env: dict, cwd: Path) -> dict:
+    """
+    启动STDIO服务，记录initialize、tools/list和第一次本地检索完成的时间(ms)
+    """
+    params = StdioServerParameters(command=sys.executable, args=[str(RUN_SCRIPT), "--transport", "stdio"],
+                                   env=env, cwd=str(cwd))
+    with open(os.devnull, "w") as errlog:
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                await session.list_tools()
+                listed = time.perf_counter()
+                await session.call_tool("search_local_literature", {"query": "catalysis", "output_format": "json"})
+                first_call = time.perf_counter()
+    return {
+        "initialize_ms": (initialized - start) * 1000,
+        "tools_list_ms": (listed - start) * 1000,
+        "first_local_search_ms": (first_call - start) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--papers", type=int, default=10000, help="预先写入持久层的文献数")
+    parser.add_argument("--runs", type=int, default=5, help="重复启动次数，取中位数")
+    parser.add_argument("--top", type=int, default=10, help="列出自身导入耗时最多的模块数")
+    parser.add_argument("--budget-ms", type=float, default=None, help="tools/list耗时上限(ms)，中位数超出时返回非零状态")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="xmol-startup-") as workdir:
+        workdir = Path(workdir)
+        cache_dir = workdir / "cache"
+        populate(cache_dir, args.papers)
+        env = server_env(cache_dir)
+
+        imports = import_time(env, workdir, args.top)
+        print(f"导入core.server: {imports['import_ms']} ms（进程总耗时{imports['wall_ms']} ms）")
+        print("自身导入耗时最多的模块:")
+        for name, own in imports["top"]:
+            print(f"  {own:>8.1f} ms  {name}")
+
+        runs = [asyncio.run(handshake(env, workdir)) for _ in range(args.runs)]
+
+    print(f"\nSTDIO启动（持久层{args.papers}篇文献，{args.runs}次中位数）:")
+    summary = {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+    for key, value in summary.items():
+        print(f"  {key:<24} {value:>8.1f} ms")
+
+    if args.budget_ms is not None and summary["tools_list_ms"] > args.budget_ms:
+        print(f"tools/list耗时{summary['tools_list_ms']} ms超出预算{args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
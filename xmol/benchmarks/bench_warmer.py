@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热门查询预热基准测试
+
+模拟智能体反复检索少数热门主题（按发布日期排序，查询频次服从Zipf分布）：搜索缓存的新鲜期很短且不返回过期结果，
+分别在关闭和开启后台预热时持续发起查询，统计缓存命中率、延迟和桩服务器收到的上游请求数。
+开启预热后热门查询在过期前被刷新，交互调用大多直接命中缓存，代价是少量额外的上游请求
+
+用法:
+    python benchmarks/bench_warmer.py --duration 20 --topics 30 --ttl 4 --interval 1
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from stub_server import StubServer  # noqa: E402
+from bench_fetch import percentile  # noqa: E402
+
+
+async def run(server, mode: str, args) -> dict:
+    """
+    以固定速率发起查询，主题按Zipf分布抽取；mode为off时关闭预热
+    """
+    warmer = server.cache_warmer
+    warmer.stop()
+    warmer.interval = args.interval if mode == "on" else 0
+    warmer.refresh_after = max(0.0, args.ttl - args.interval)
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(args.topics)]
+    before = dict(server.search_cache.stats())
+    latencies = []
+
+    async def one(topic: int) -> None:
+        start = time.perf_counter()
+        await server.search_title_by_keywords([f"{mode} topic {topic}"], searchSort="publishDate",
+                                               output_format="json")
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        topic = rng.choices(range(args.topics), weights)[0]
+        tasks.append(asyncio.create_task(one(topic)))
+        await asyncio.sleep(1 / args.qps)
+    await asyncio.gather(*tasks)
+    warmer.stop()
+
+    after = server.search_cache.stats()
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "mode": mode,
+        "calls": len(latencies),
+        "hit_ratio": round(hits / max(1, hits + misses), 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "warmed": warmer.refreshed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热门查询预热基准测试")
+    parser.add_argument("--duration", type=float, default=20, help="每种模式的运行时间(秒)")
+    parser.add_argument("--qps", type=float, default=10, help="每秒查询数")
+    parser.add_argument("--topics", type=int, default=30, help="主题数")
+    parser.add_argument("--ttl", type=float, default=4, help="搜索缓存新鲜期(秒)")
+    parser.add_argument("--interval", type=float, default=1, help="预热周期(秒)")
+    parser.add_argument("--latency", type=float, default=0.1, help="桩服务器每个请求的延迟(秒)")
+    args = parser.parse_args()
+
+    stub = StubServer(latency=args.latency).start()
+    workdir = tempfile.mkdtemp(prefix="xmol-warmer-")
+    os.environ.update({
+        "XMOL_BASE_URL": stub.base_url,
+        "Cookie": "atk0210=stub",
+        "XMOL_RATE": "0",
+        "XMOL_CACHE_DIR": workdir,
+        "XMOL_SEARCH_CACHE_TTL": str(args.ttl),
+        # 不返回过期结果，只有新鲜期内的结果算命中
+        "XMOL_SEARCH_CACHE_STALE_TTL": "0",
+        "XMOL_WARMUP_DELAY": "-1",
+    })
+    from core import server
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    try:
+        for mode in ("off", "on"):
+            upstream = stub.counters["get"]
+            result = asyncio.run(run(server, mode, args))
+            result["upstream"] = stub.counters["get"] - upstream
+            results.append(result)
+    finally:
+        stub.stop()
+
+    print(f"主题数: {args.topics}，{args.qps}次/秒，持续{args.duration}秒，缓存新鲜期{args.ttl}秒，预热周期{args.interval}秒")
+    print(f"{'warmer':>7} {'calls':>6} {'hit':>6} {'p50 ms':>8} {'p95 ms':>8} {'warmed':>7} {'upstream':>9}")
+    for item in results:
+        print(f"{item['mode']:>7} {item['calls']:>6} {item['hit_ratio']:>6} {item['p50_ms']:>8} {item['p95_ms']:>8} "
+              f"{item['warmed']:>7} {item['upstream']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多进程SSE服务基准测试
+
+以不同的工作进程数（run.py --workers N）启动SSE服务，多个MCP客户端各自建立SSE会话并发调用
+search_title_by_keywords，统计吞吐量、延迟，以及桩服务器收到的上游请求数和上游请求速率。
+各工作进程共享缓存持久层和限速令牌桶，因此工作进程数增加时上游请求数和速率应基本不变；
+吞吐量的提升取决于机器的CPU核心数
+
+用法:
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 8 --requests 400 --rate 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from stub_server import StubServer
+from bench_fetch import percentile
+from bench_e2e import RUN_SCRIPT, free_port, server_env, tool_error
+
+
+async def wait_ready(port: int, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"http://127.0.0.1:{port}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("SSE服务启动失败，详见服务日志")
+            await asyncio.sleep(0.1)
+
+
+async def run_workers(stub: StubServer, workers: int, args) -> dict:
+    """
+    启动一个全新的服务（空缓存），clients个会话共发起requests次搜索，关键词在keywords个之间循环
+    """
+    port = free_port()
+    env = server_env(stub.base_url, port)
+    env["XMOL_RATE"] = str(args.rate)
+    with tempfile.TemporaryDirectory(prefix="xmol-bench-") as workdir, \
+            open(Path(workdir) / "server.log", "w") as errlog:
+        process = subprocess.Popen(
+            [sys.executable, str(RUN_SCRIPT), "--transport", "sse", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers)],
+            env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=errlog,
+        )
+        try:
+            await wait_ready(port, process)
+            before = dict(stub.counters)
+            latencies = []
+            errors = 0
+            counter = iter(range(args.requests))
+
+            async def client() -> None:
+                nonlocal errors
+                async with sse_client(f"http://127.0.0.1:{port}/sse", timeout=30) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        for i in counter:
+                            arguments = {"keywords": [f"catalysis w{workers} {i % args.keywords}"],
+                                         "output_format": "json"}
+                            start = time.perf_counter()
+                            try:
+                                failed = tool_error(await session.call_tool("search_title_by_keywords", arguments))
+                            except Exception:
+                                failed = True
+                            latencies.append(time.perf_counter() - start)
+                            errors += failed
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(args.clients)))
+            elapsed = time.perf_counter() - start
+            upstream = stub.counters["post"] - before["post"]
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "workers": workers,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "errors": errors,
+        "upstream_searches": upstream,
+        "upstream_rps": round(upstream / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程SSE服务基准测试")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="工作进程数")
+    parser.add_argument("--clients", type=int, default=8, help="并发的SSE会话数")
+    parser.add_argument("--requests", type=int, default=400, help="总调用次数")
+    parser.add_argument("--keywords", type=int, default=40, help="轮换的关键词数，决定需要访问上游的次数")
+    parser.add_argument("--rate", type=float, default=20, help="共享的上游全局速率(次/秒)")
+    parser.add_argument("--latency", type=float, default=0.05, help="桩服务器每个请求的延迟(秒)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubServer(latency=args.latency).start()
+    try:
+        results = [asyncio.run(run_workers(stub, workers, args)) for workers in args.workers]
+    finally:
+        stub.stop()
+
+    print(f"CPU核心数: {os.cpu_count()}，会话数: {args.clients}，调用次数: {args.requests}，"
+          f"关键词数: {args.keywords}，共享速率: {args.rate}/s")
+    print(f"{'workers':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'upstream':>9} {'up/s':>6}")
+    for item in results:
+        print(f"{item['workers']:>8} {item['throughput_rps']:>8} {item['p50_ms']:>8} {item['p95_ms']:>8} "
+              f"{item['errors']:>7} {item['upstream_searches']:>9} {item['upstream_rps']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+X-MOL 本地桩服务器
+
+模拟 /paper/search/searchPaper（Cookie中含expired时按失效处理）、/paper/search/result、DOI快速检索 /q 和文献详情页 /paper/<id>，
+用于在无网络环境下测量吞吐量和延迟；可按比例注入503错误和长时间无响应，模拟上游故障。
+指定fixtures目录时回放其中保存的结果页和详情页，而不是现场生成页面；
+这些页面同样由本模块的生成函数生成，不是真实X-MOL页面的抓取
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+
+JOURNALS = ["Nature", "Science", "Cell", "Nature Materials", "Advanced Materials", "JACS"]
+
+
+def make_paper_item(seed: str, index: int) -> str:
+    """
+    生成一条与X-MOL结果页结构一致的<li>
+    """
+    digest = hashlib.md5(f"{seed}-{index}".encode()).hexdigest()
+    journal = JOURNALS[index % len(JOURNALS)]
+    impact = 8 + (int(digest[:4], 16) % 4000) / 100
+    doi = f"10.{1000 + index}/stub.{digest[:10]}"
+    return (
+        "<li>\n"
+        '<div class="magazine-model-btn">'
+        '<a href="javascript:;">收藏</a><a href="javascript:;">分享</a><a href="javascript:;">引用</a>'
+        "</div>\n"
+        f'<div class="it-bold space-bottom-m10"><a href="paper/doi/{quote(doi, safe="")}">Stub paper {digest[:8]} on catalysis and materials #{index}</a></div>\n'
+        f'<div class="div-text-line-one it-new-gary"><em class="it-blue">{journal}</em> '
+        f"<span>{impact:.3f}</span> Pub Date : 2024-{1 + index % 12:02d}-{1 + index % 28:02d} "
+        f"DOI:{doi}</div>\n"
+        f'<div class="div-text-line-three itsmlink">Abstract of stub paper {digest}. '
+        "We report a scalable route towards efficient catalysts with high selectivity.</div>\n"
+        "</li>\n"
+    )
+
+
+def _page_chrome() -> tuple:
+    """
+    页头（导航、脚本、筛选栏）与页脚，体量接近真实结果页
+    """
+    nav = "".join(f'<li class="nav-item"><a href="/journal/{i}">Journal category {i}</a></li>' for i in range(300))
+    script = "var config = {" + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(400)) + "};"
+    facets = "".join(
+        f'<div class="facet"><input type="checkbox" id="f{i}"><label for="f{i}">Facet {i}</label></div>'
+        for i in range(150)
+    )
+    head = (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>X-MOL</title>"
+        f"<script>{script}</script></head><body>\n"
+        f'<div class="header"><a href="/">X-MOL</a><ul class="nav">{nav}</ul></div>\n'
+        f'<div class="magazine-senior-search-left">{facets}</div>\n'
+    )
+    foot = f'<div class="footer"><ul>{nav}</ul></div><script>{script}</script></body></html>'
+    return head, foot
+
+
+PAGE_HEAD, PAGE_FOOT = _page_chrome()
+
+
+def make_result_page(seed: str, papers: int = 20) -> str:
+    """
+    生成完整的搜索结果页
+    """
+    items = "".join(make_paper_item(seed, i) for i in range(papers))
+    return (
+        f"{PAGE_HEAD}"
+        f'<div class="magazine-senior-search-results-list"><ul>\n{items}</ul></div>\n'
+        '<div class="pagination"><a href="?pageIndex=1">1</a><a href="?pageIndex=2">2</a></div>\n'
+        f"{PAGE_FOOT}"
+    )
+
+
+def make_detail_page(doi: str) -> str:
+    """
+    生成文献详情页
+    """
+    digest = hashlib.md5(doi.encode()).hexdigest()
+    journal = JOURNALS[int(digest[:2], 16) % len(JOURNALS)]
+    authors = "".join(f"<span>Author {digest[i:i + 4]}</span>, " for i in range(0, 20, 4))
+    return (
+        f"{PAGE_HEAD}"
+        '<div class="magazine-paper-detail">\n'
+        f'<h1 class="paper-detail-title">Stub paper {digest[:8]} on catalysis and materials</h1>\n'
+        f'<div class="paper-detail-authors">{authors}</div>\n'
+        f'<div class="paper-detail-info"><em class="it-blue">{journal}</em> '
+        f"<span>{8 + int(digest[:4], 16) % 4000 / 100:.3f}</span> Pub Date : 2024-03-15 DOI:{doi}</div>\n"
+        f'<div class="paper-detail-abstract">Full abstract of stub paper {digest}. '
+        "We report a scalable route towards efficient catalysts with high selectivity, "
+        "and discuss the mechanism in detail.</div>\n"
+        f'<div class="paper-detail-citation">被引次数：{int(digest[4:6], 16)}</div>\n'
+        "</div>\n"
+        f"{PAGE_FOOT}"
+    )
+
+
+def load_fixtures(directory: Path, papers: int = 20) -> dict:
+    """
+    读取保存的结果页result_page_<papers>.html和详情页detail_page.html
+    """
+    directory = Path(directory)
+    detail = (directory / "detail_page.html").read_text(encoding="utf-8")
+    match = re.search(r"DOI:([^<\s]+)", detail)
+    if match is None:
+        raise ValueError(f"{directory / 'detail_page.html'}中没有DOI")
+    return {
+        "result": (directory / f"result_page_{papers}.html").read_bytes(),
+        "detail": detail,
+        "detail_doi": match.group(1),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    桩服务器请求处理器，支持HTTP/1.1 keep-alive
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # 静默访问日志
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict = None) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self) -> bool:
+        """
+        按配置注入故障，已发送错误响应时返回True
+        """
+        fault = self.server.draw_fault()
+        if fault == "stall":
+            time.sleep(self.server.stall)
+        elif fault == "error":
+            self._send(503, b"Service Unavailable", {"Retry-After": "0"})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.count("post")
+        time.sleep(self.server.latency)
+        if self._fault():
+            return
+        if self.path.startswith("/paper/search/searchPaper"):
+            if "expired" in self.headers.get("Cookie", ""):
+                # 模拟Cookie失效：重定向到登录页，Location中没有searchLogId
+                self._send(302, headers={"Location": "/login"})
+                return
+            log_id = self.server.issue_id(hashlib.md5(body).hexdigest()[:16])
+            location = f"/paper/search/result?searchLogId={log_id}&readMode=zh&searchSort=&pageIndex=1"
+            self._send(302, headers={"Location": location})
+        else:
+            self._send(404)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self.server.count("get")
+        time.sleep(self.server.latency)
+        if self._fault():
+            return
+        if parts.path == "/paper/search/result":
+            query = parse_qs(parts.query)
+            if not self.server.id_valid(query.get("searchLogId", [""])[0]):
+                # 模拟上游拒绝过期的searchLogId
+                self._send(302, headers={"Location": "/paper/search"})
+                return
+            seed = f"{query.get('searchLogId', [''])[0]}-{query.get('pageIndex', ['1'])[0]}"
+            body = self.server.result_page(seed)
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+        elif parts.path == "/q":
+            # DOI快速检索重定向到详情页；不存在的DOI返回没有匹配文献的结果页
+            doi = parse_qs(parts.query).get("option", [""])[0]
+            if doi.lower() in self.server.missing_dois:
+                self._send(200, make_result_page(doi, 0).encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+                return
+            self._send(302, headers={"Location": f"/paper/doi/{quote(doi, safe='')}"})
+        elif parts.path.startswith("/paper/doi/"):
+            body = self.server.detail_page(unquote(parts.path[len("/paper/doi/"):]))
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+        elif parts.path == "/paper/search":
+            body = b"<html><body><form class=\"senior-search\"></form></body></html>"
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+        else:
+            self._send(404)
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    可在后台线程中启动的桩服务器
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, papers: int = 20,
+                 id_ttl: float = None, error_rate: float = 0.0, stall_rate: float = 0.0, stall: float = 5.0,
+                 seed: int = 0, fixtures: Path = None, missing_dois=()):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate  # 返回503的请求比例
+        self.stall_rate = stall_rate  # 延迟stall秒才响应的请求比例
+        self.stall = stall
+        self._random = random.Random(seed)
+        self.papers = papers
+        self.missing_dois = {doi.lower() for doi in missing_dois}  # DOI快速检索找不到的DOI
+        self.id_ttl = id_ttl
+        self.issued = {}
+        self.counters = {"post": 0, "get": 0}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.replay = None
+        if fixtures is not None:
+            self.replay = load_fixtures(fixtures, papers)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def issue_id(self, seed: str) -> str:
+        """
+        签发searchLogId，配置了id_ttl时每次签发不同的id并记录签发时间
+        """
+        if self.id_ttl is None:
+            return seed
+        with self._lock:
+            log_id = f"{seed}{len(self.issued):06d}"
+            self.issued[log_id] = time.monotonic()
+        return log_id
+
+    def result_page(self, seed: str) -> bytes:
+        if self.replay is not None:
+            return self.replay["result"]
+        return make_result_page(seed, self.papers).encode("utf-8")
+
+    def detail_page(self, doi: str) -> bytes:
+        if self.replay is not None:
+            # 保存的详情页只有一份，回放时把其中的DOI换成请求的DOI
+            return self.replay["detail"].replace(self.replay["detail_doi"], doi).encode("utf-8")
+        return make_detail_page(doi).encode("utf-8")
+
+    def handle_error(self, request, client_address):
+        # 客户端超时后断开连接，写回响应时的连接错误不打印
+        pass
+
+    def draw_fault(self):
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return "error"
+        if roll < self.error_rate + self.stall_rate:
+            return "stall"
+        return None
+
+    def id_valid(self, log_id: str) -> bool:
+        if self.id_ttl is None:
+            return True
+        issued = self.issued.get(log_id)
+        return issued is not None and time.monotonic() - issued < self.id_ttl
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -5,4 +5,12 @@ XMol 文献检索和问答系统
 能够根据用户提供的关键词获取相关文献，并回显文献内容。
 """
 
-__version__ = "0.1.0" 
\ No newline at end of file
+import sys
+from pathlib import Path
+
+__version__ = "0.1.0"
+
+# 公共模块mcp_common位于仓库根目录，从模块目录直接运行时加入导入路径
+_ROOT = Path(__file__).resolve().parents[2]
+if (_ROOT / "mcp_common").is_dir() and str(_ROOT) not in sys.path:
+    sys.path.append(str(_ROOT))
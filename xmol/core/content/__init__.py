@@ -4,7 +4,36 @@ XMol 核心功能模块
 包含文献获取等基础功能
 """
 
+from .breaker import CircuitBreaker, CircuitOpenError
+from .cache import LRUCache, SQLiteCache, TieredCache, create_cache
+from .coalesce import SingleFlight
 from .content import get_content
+from .fetcher import AsyncFetcher, get_fetcher
+from .filters import SearchFilter, rank_papers
+from .index import PaperIndex, looks_like_doi, normalize_doi
+from .lazy import Lazy, load_all, warm_in_background
 from .logger import setup_logger
+from .pager import PageIterator
+from .paper import Paper
+from .parser import available_backends, iter_result_page, parse_detail_page, parse_result_page
+from .render import (paper_json, paper_line, paper_markdown, render_batch, render_detail, render_error,
+                     render_papers)
+from .ratelimit import RateLimiter, TokenBucket, get_rate_limiter
+from .search_cache import SearchCache, decode_entry, encode_entry, search_key
+from .session import Session, SessionPool, get_session_pool, load_cookies, parse_cookie
+from .ttlcache import TTLCache
+from .warmer import CacheWarmer
 
-__all__ = ["get_content", "setup_logger"] 
\ No newline at end of file
+__all__ = ["get_content", "AsyncFetcher", "get_fetcher", "setup_logger",
+           "RateLimiter", "TokenBucket", "get_rate_limiter", "TTLCache",
+           "LRUCache", "SQLiteCache", "TieredCache", "create_cache",
+           "SingleFlight", "SearchCache", "search_key",
+           "parse_result_page", "iter_result_page", "parse_detail_page", "available_backends",
+           "PageIterator", "Paper", "encode_entry", "decode_entry",
+           "PaperIndex", "normalize_doi", "looks_like_doi",
+           "render_papers", "render_batch", "render_detail", "render_error",
+           "paper_markdown", "paper_json", "paper_line",
+           "SearchFilter", "rank_papers",
+           "Session", "SessionPool", "get_session_pool", "load_cookies", "parse_cookie",
+           "CircuitBreaker", "CircuitOpenError", "Lazy", "load_all", "warm_in_background",
+           "CacheWarmer"] 
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+XMol 熔断器模块
+
+上游连续失败达到阈值后熔断，熔断期间请求直接失败而不再占用连接和等待超时；
+冷却时间过后放行一个探测请求，成功则恢复，失败则重新熔断
+"""
+
+import logging
+import time
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    熔断期间拒绝请求
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name}暂时不可用（已熔断），约{retry_after:.0f}秒后重试")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker():
+    """
+    熔断器
+
+    参数:
+    name: 名称，用于日志和错误信息
+    failure_threshold: 连续失败多少次后熔断，0表示不启用
+    reset_timeout: 熔断后等待多少秒放行探测请求
+    """
+
+    def __init__(self, name: str = "X-MOL", failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0  # 连续失败次数
+        self.opened_at = 0.0
+        self._probing = False
+
+        # 指标
+        self.opened = 0
+        self.rejected = 0
+
+    def before(self) -> None:
+        """
+        请求前检查，熔断中时抛出CircuitOpenError；半开状态只放行一个探测请求
+        """
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+            logger.info(f"{self.name}熔断冷却结束，放行探测请求")
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(remaining, 0.0))
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"{self.name}探测请求成功，恢复正常")
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self) -> None:
+        """
+        请求被取消等未得出结果时释放探测名额
+        """
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.opened += 1
+            logger.warning(f"{self.name}连续失败{self.failures}次，熔断{self.reset_timeout:.0f}秒")
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,416 @@
+"""
+XMol 文献缓存模块
+
+内存LRU层（按条目数和字节数限制）+ SQLite持久层，支持按条目设置过期时间。
+事件循环中使用aget/aset/aset_many：内存层在事件循环上直接访问，持久层的读写和提交放到线程中执行，
+共享的数据库被其他进程锁住时也不会阻塞事件循环
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.cache")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class LRUCache():
+    """
+    内存LRU缓存
+    同时按条目数和序列化后的字节数限制容量，超出时淘汰最久未使用的条目
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: float = None,
+                 encode=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.encode = encode  # 值到可JSON序列化对象的转换，用于估算字节数
+        self.bytes = 0
+        self._data = OrderedDict()  # key -> (value, size, expires)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, size, expires = item
+            if expires is not None and expires <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None, expires: float = None, size: int = None) -> None:
+        """
+        写入缓存；expires为绝对过期时间戳，优先于ttl
+        """
+        if expires is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires = time.time() + ttl if ttl else None
+        if size is None:
+            size = len(_dumps(self.encode(value) if self.encode else value).encode("utf-8"))
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires)
+            self.bytes += size
+            while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _remove(self, key) -> None:
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data)
+
+    def values(self) -> list:
+        """
+        返回未过期的值，按最近使用时间升序
+        """
+        now = time.time()
+        with self._lock:
+            return [value for value, _, expires in self._data.values() if expires is None or expires > now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteCache():
+    """
+    基于SQLite的持久化缓存，值以JSON保存
+    encode/decode用于在值与可JSON序列化对象之间转换
+    """
+
+    def __init__(self, path, ttl: float = None, encode=None, decode=None):
+        self.path = Path(path)
+        self.encode = encode
+        self.decode = decode
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_updated ON cache(updated)")
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def _dump(self, value) -> str:
+        return _dumps(self.encode(value) if self.encode else value)
+
+    def _load(self, text: str):
+        value = json.loads(text)
+        return self.decode(value) if self.decode else value
+
+    def get_entry(self, key):
+        """
+        获取未过期的条目
+
+        返回:
+        (值, 过期时间戳) 或 None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires = row
+            if expires is not None and expires <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._load(value), expires
+
+    def get(self, key, default=None):
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl: float = None, expires: float = None) -> None:
+        if expires is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, updated) VALUES (?, ?, ?, ?)",
+                (key, self._dump(value), expires, time.time()),
+            )
+
+    def set_many(self, items: list, ttl: float = None) -> None:
+        """
+        批量写入[(key, value), ...]，在一个事务内完成
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires = now + ttl if ttl else None
+        rows = [(key, self._dump(value), expires, now) for key, value in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, expires, updated) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def recent(self, limit: int = -1) -> list:
+        """
+        按更新时间倒序返回未过期的条目[(key, value, expires), ...]，用于启动预热，limit为-1时不限数量
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires FROM cache WHERE expires IS NULL OR expires > ? "
+                "ORDER BY updated DESC LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [(key, self._load(value), expires) for key, value, expires in rows]
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+        }
+
+
+class TieredCache():
+    """
+    分层缓存：内存LRU层在前，持久层在后
+    持久层命中时回填内存层；persistent为None时退化为纯内存缓存
+    """
+
+    def __init__(self, memory: LRUCache, persistent: SQLiteCache = None, ttl: float = None):
+        self.memory = memory
+        self.persistent = persistent
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.persistent is None:
+            return default
+        entry = self.persistent.get_entry(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        self.memory.set(key, value, expires=expires)
+        return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        self.memory.set(key, value, expires=expires)
+        if self.persistent is not None:
+            self.persistent.set(key, value, expires=expires)
+
+    def set_many(self, items: list, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        for key, value in items:
+            self.memory.set(key, value, expires=expires)
+        if self.persistent is not None:
+            self.persistent.set_many(items, ttl=ttl)
+
+    def delete(self, key) -> None:
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    async def aget(self, key, default=None):
+        """
+        在事件循环中获取：内存层未命中时在线程中查询持久层
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.persistent is None:
+            return default
+        entry = await asyncio.to_thread(self.persistent.get_entry, key)
+        if entry is None:
+            return default
+        value, expires = entry
+        self.memory.set(key, value, expires=expires)
+        return value
+
+    async def areload(self, key, default=None):
+        """
+        跳过内存层，在线程中重新读取持久层并回填内存层；持久层由多个进程共享时用于读取其他进程写入的新值
+        """
+        if self.persistent is None:
+            return self.memory.get(key, default)
+        entry = await asyncio.to_thread(self.persistent.get_entry, key)
+        if entry is None:
+            return default
+        value, expires = entry
+        self.memory.set(key, value, expires=expires)
+        return value
+
+    async def aset(self, key, value, ttl: float = None) -> None:
+        """
+        在事件循环中写入：立即写入内存层，持久层在线程中写入
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        self.memory.set(key, value, expires=expires)
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set, key, value, expires=expires)
+
+    async def aset_many(self, items: list, ttl: float = None) -> None:
+        """
+        在事件循环中批量写入，持久层在线程中以一个事务写入
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        for key, value in items:
+            self.memory.set(key, value, expires=expires)
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set_many, items, ttl=ttl)
+
+    def warm(self, limit: int = None) -> int:
+        """
+        从持久层加载最近更新的条目到内存层，返回加载数量
+        """
+        if self.persistent is None:
+            return 0
+        limit = self.memory.max_entries if limit is None else limit
+        rows = self.persistent.recent(limit)
+        # 倒序写入，使最近更新的条目位于LRU队尾
+        for key, value, expires in reversed(rows):
+            self.memory.set(key, value, expires=expires)
+        return len(rows)
+
+    def values(self, limit: int = -1) -> list:
+        """
+        返回未过期的值，有持久层时从持久层按更新时间倒序读取，用于重建索引等
+        """
+        if self.persistent is None:
+            values = self.memory.values()[::-1]
+            return values if limit < 0 else values[:limit]
+        return [value for _, value, _ in self.persistent.recent(limit)]
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.persistent) if self.persistent is not None else len(self.memory)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        persistent = self.persistent.stats() if self.persistent is not None else None
+        hits = memory["hits"] + (persistent["hits"] if persistent else 0)
+        misses = persistent["misses"] if persistent else memory["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "memory": memory,
+            "persistent": persistent,
+        }
+
+
+def create_cache(name: str, cache_dir, backend: str = "sqlite", max_entries: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, ttl: float = None, warm: bool = True,
+                 encode=None, decode=None) -> TieredCache:
+    """
+    创建分层缓存
+
+    参数:
+    name: 缓存名称，持久层文件为 cache_dir/<name>.sqlite3
+    backend: 持久层类型，'sqlite' 或 'memory'（不持久化）
+    max_entries/max_bytes: 内存层容量上限
+    ttl: 条目默认过期时间(秒)，为空表示不过期
+    warm: 是否在创建时从持久层预热内存层
+    encode/decode: 值与可JSON序列化对象之间的转换，内存层保存原始对象，持久层保存JSON
+    """
+    memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes, encode=encode)
+    persistent = None
+    if backend == "sqlite":
+        try:
+            persistent = SQLiteCache(Path(cache_dir) / f"{name}.sqlite3", encode=encode, decode=decode)
+        except Exception as e:
+            logger.error(f"无法打开持久化缓存，仅使用内存缓存: {str(e)}")
+    elif backend != "memory":
+        logger.warning(f"未知的缓存后端: {backend}，仅使用内存缓存")
+    cache = TieredCache(memory, persistent, ttl=ttl)
+    if warm and persistent is not None:
+        loaded = cache.warm()
+        logger.info(f"缓存{name}已从持久层预热{loaded}条")
+    return cache
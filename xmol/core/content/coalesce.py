@@ -0,0 +1,50 @@
+"""
+XMol 请求合并模块
+"""
+
+import asyncio
+import logging
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.coalesce")
+
+
+class SingleFlight():
+    """
+    相同key的并发调用只执行一次，其余调用等待并共享同一结果
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    async def do(self, key, fn):
+        """
+        执行fn()并返回结果；若相同key正在执行，则等待已有的调用
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"合并并发请求: {key}")
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield保证单个调用方取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            # 取出异常，避免无人等待时出现"Task exception was never retrieved"
+            logger.debug(f"合并请求失败: {key}: {task.exception()!r}")
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "calls": self.calls, "coalesced": self.coalesced}
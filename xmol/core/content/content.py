@@ -2,17 +2,41 @@
 XMol 文献内容获取模块
 """
 
-import requests
-from bs4 import BeautifulSoup as bs
+import asyncio
+import os
 import random
 import re
-import time
 import logging
+from dataclasses import replace
+from urllib.parse import quote
+
+from .breaker import CircuitOpenError
+from .coalesce import SingleFlight
+from .fetcher import get_fetcher
+from .filters import SearchFilter
+from .metrics import STAGE_SECONDS
+from .pager import PageIterator
+from .paper import Paper
+from .parser import iter_result_page, parse_detail_page, parse_result_page
+from .session import Session, get_session_pool, parse_cookie
+from .ttlcache import TTLCache
 
 
 # 获取日志记录器
 logger = logging.getLogger("文献检索助手.content")
 
+CIRCUIT_OPEN_SUGGESTION = "X-MOL暂时不可用，请稍后重试，或先使用search_local_literature在已获取过的文献中检索"
+
+
+class SessionRejected(ValueError):
+    """
+    搜索请求被重定向且没有searchLogId，通常是该会话的Cookie已失效
+    """
+
+    def __init__(self, session: Session, location: str):
+        super().__init__(f"搜索ID提取失败，会话{session.name}被重定向到{location}")
+        self.session = session
+
 
 
 class get_content():
@@ -21,12 +45,22 @@ class get_content():
     用于从X-MOL网站获取科学文献内容
     """
 
-    def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
-        }
+    def __init__(self, fetcher=None, parser: str = None, sessions=None):
+        self.fetcher = fetcher or get_fetcher()
+        self.parser = parser  # 解析后端，为空时自动选择
+        self.sessions = sessions if sessions is not None else get_session_pool()  # 账号会话池
+        self.headers = self.fetcher.headers
+        # searchLogId缓存，同一会话下同一查询的不同页码和排序方式复用同一个id
+        self.search_ids = TTLCache(
+            maxsize=int(os.getenv("XMOL_SEARCH_ID_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("XMOL_SEARCH_ID_TTL", "600")),
+        )
+        self._search_id_flight = SingleFlight()
+        # DOI快速检索路径，X-MOL会将其重定向到文献详情页
+        self.doi_path = os.getenv("XMOL_DOI_PATH", "q?option={doi}")
+        self._detail_flight = SingleFlight()
 
-    def _get_post_data(self, keywordList: list, impact: str) -> dict:  # 关键词列表，影响因子
+    def _get_post_data(self, keywordList: list, impact: str, filters: SearchFilter = None) -> dict:  # 关键词列表，影响因子，过滤条件
         """
         获取post请求数据
         """
@@ -50,6 +84,8 @@ class get_content():
             "impactFactorStart": impact,
             "impactFactorEnd": ""
         })
+        if filters:
+            post_data.update(filters.post_fields())
 
         return post_data
 
@@ -57,118 +93,260 @@ class get_content():
         """
         获取cookie,将cookie转换为字典
         """
-        ck_dic = {}
-        cookies = ck.split(';')
-        for cookie in cookies:
-            try:
-                key, value = cookie.strip().split('=', 1)
-                if key in ["UM_distinctid", "atk0210", "rtk0210"]:
-                    ck_dic[key.strip()] = value.strip()
-            except ValueError:
-                logger.warning(f"无法解析Cookie部分: {cookie}")
-        return ck_dic
+        return parse_cookie(ck)
 
-    def _get_url(self, post_data: dict, cookies: str) -> str:  # 获取url
+    async def _get_url(self, post_data: dict, session: Session) -> str:  # 获取url
         """
         获取url
         """
         try:
             id = random.randint(333, 999)
-            url = f"https://www.x-mol.com/paper/search/searchPaper?date={id}"
-            resp = requests.post(url, headers=self.headers, data=post_data, cookies=cookies)
+            # 不跟随重定向，直接从Location中读取searchLogId，省去一次结果页请求；
+            # 搜索POST只是提交查询条件，重复提交没有副作用，按幂等请求重试
+            with STAGE_SECONDS.time(stage="search_post"):
+                resp = await self.fetcher.post(f"paper/search/searchPaper?date={id}", data=post_data,
+                                               cookies=session.cookies, session=session.name, idempotent=True)
+            if resp.status_code >= 400:
+                # 上游故障不代表Cookie失效，不隔离会话
+                raise ValueError(f"搜索请求失败: HTTP {resp.status_code}")
+            location = resp.headers.get("location") or str(resp.url)
             ex = 'searchLogId=(.*)&readMode'
-            id_match = re.search(ex, resp.url)
+            id_match = re.search(ex, location)
             if not id_match:
-                logger.error(f"无法从URL提取searchLogId: {resp.url}")
-                raise ValueError("搜索ID提取失败")
+                logger.error(f"无法从URL提取searchLogId: {location}")
+                raise SessionRejected(session, location)
             id_text = id_match.group(1).strip()
             return id_text
         except Exception as e:
             logger.error(f"获取URL时出错: {str(e)}")
             raise
 
-    def get_page_content(self, keywordList: list, ck: str, impact: str = 8,searchSort: str = 'publishDate', lang: str = 'zh', pageindex: int = 1) -> list[dict]:  # 获取页面内容
+    @staticmethod
+    def _search_key(post_data: dict, session: Session) -> tuple:  # searchLogId缓存键
+        """
+        会话名加规范化的post请求数据，作为searchLogId的缓存键；
+        searchLogId属于创建它的账号，不在会话之间共用，否则上游拒绝时会隔离复用它的会话
+        """
+        return (session.name,) + tuple(sorted((key, str(value).strip()) for key, value in post_data.items()))
+
+    async def _get_search_id(self, post_data: dict, session: Session, refresh: bool = False) -> tuple[str, bool]:
+        """
+        获取searchLogId，优先使用缓存
+
+        返回:
+        (searchLogId, 是否来自缓存)
+        """
+        key = self._search_key(post_data, session)
+        if not refresh:
+            id_text = self.search_ids.get(key)
+            if id_text is not None:
+                logger.debug(f"复用缓存的searchLogId: {id_text}")
+                return id_text, True
+
+        async def fetch():
+            id_text = await self._get_url(post_data, session)
+            self.search_ids.set(key, id_text)
+            return id_text
+
+        # 同一查询的多个页码并发请求时只发送一次搜索POST
+        return await self._search_id_flight.do(key, fetch), False
+
+    async def _get_result_page(self, id_text: str, session: Session, lang: str, searchSort: str, pageindex: int):
+        """
+        请求结果页并构建文档树
+
+        返回:
+        (响应对象, 逐篇产出文献的生成器；未找到文献列表时为None)
+        """
+        params = {"searchLogId": id_text, "readMode": lang, "searchSort": searchSort, "pageIndex": pageindex}
+        logger.debug(f"请求参数: {params}")
+
+        with STAGE_SECONDS.time(stage="result_get"):
+            resp = await self.fetcher.get("paper/search/result", params=params, cookies=session.cookies,
+                                          session=session.name)
+        resp.encoding = 'utf-8'
+        # 构建文档树属于CPU密集操作，放到线程中执行以免阻塞事件循环
+        with STAGE_SECONDS.time(stage="parse"):
+            papers = await asyncio.to_thread(iter_result_page, resp.text, self.fetcher.base_url, self.parser)
+        return resp, papers
+
+    @staticmethod
+    def _is_rejected(resp) -> bool:
+        """
+        判断上游是否明确拒绝了searchLogId：返回错误状态码，或被重定向到不带searchLogId的页面（过期或Cookie失效）。
+        页面中没有文献列表只说明查询没有结果，不视为拒绝
+        """
+        return resp.status_code != 200 or "searchLogId" not in str(resp.url)
+
+    @staticmethod
+    async def _collect(papers, on_paper=None):
+        """
+        收集文献；提供on_paper回调时每解析出一篇文献就立即回调
+        """
+        if papers is None:
+            logger.warning("未找到文献列表元素")
+            return {"error": "未找到文献列表"}
+        # 逐篇提取文献字段；流式输出时包含推送耗时
+        with STAGE_SECONDS.time(stage="extract"):
+            if on_paper is None:
+                paper_all = await asyncio.to_thread(list, papers)
+            else:
+                paper_all = []
+                for paper in papers:
+                    paper_all.append(paper)
+                    await on_paper(paper)
+        if not paper_all:
+            logger.warning("文献列表为空")
+            return {"error": "文献列表为空"}
+        logger.info(f"成功获取文献: {len(paper_all)}篇")
+        return paper_all
+
+    async def get_page_content(self, keywordList: list, ck: str = None, impact: str = 8,searchSort: str = 'publishDate', lang: str = 'zh', pageindex: int = 1, on_paper=None, filters: SearchFilter = None) -> list[Paper]:  # 获取页面内容
         """
         获取页面内容
         
         参数:
         keywordList: 关键词列表，如 ["CRISPR", "遗传疾病"]
-        ck: Cookie字符串
+        ck: Cookie字符串，为空时从会话池中分派
         impact: 影响因子下限，默认为8
         lang: 语言，默认为'zh'（中文）
         pageindex: 页码，默认为1
+        on_paper: 可选的异步回调，每解析出一篇文献即调用一次，用于流式输出
+        filters: 可选的过滤条件（发布日期、期刊、作者、影响因子上限），随检索请求提交给上游
         
         返回:
         包含文献信息的字典
         """
         try:
-            baseurl = 'https://www.x-mol.com/'
-
-            
-            paper_all = []
             logger.info(f"开始搜索关键词: {keywordList}, 影响因子: {impact}, 页码: {pageindex}")
             
-            # 通过关键词和影响因子获取页面url
-            post_data = self._get_post_data(keywordList, impact)
-            cookies = self._get_ck(ck)
-            id_text = self._get_url(post_data, cookies)
-
-            url = f"https://www.x-mol.com/paper/search/result?searchLogId={id_text}&readMode={lang}&searchSort={searchSort}&pageIndex={pageindex}"
-            logger.debug(f"请求URL: {url}")
-            
-            resp = requests.request("GET", url, headers=self.headers, cookies=cookies)
-            resp.encoding = 'utf-8'
-            soup = bs(resp.text, "html.parser")
-            
-            content_list = soup.find("div", {"class": "magazine-senior-search-results-list"})
-
-
-            if not content_list:
-                logger.warning("未找到文献列表元素")
-                return {"error": "未找到文献列表"}
-                
-            content_li = content_list.find_all("li")
-            if not content_li:
-                logger.warning("文献列表为空")
-                return {"error": "文献列表为空"}
-                
-            doi_re = 'DOI:(.*)'
-            date_pattern = r"Pub Date\s*:\s*(\d{4}-\d{2}-\d{2})"
-            for content in content_li:
-                paper = {}
-                title = content.find("div", {"class": "it-bold space-bottom-m10"}) # 标题
-                info = content.find("div", {"class": "div-text-line-one it-new-gary"}) # 期刊和影响因子
-                jounal = info.find("em", {"class": "it-blue"}) # 期刊
-                impact = info.find("span") # 影响因子
-                doi_match = re.search(doi_re, info.text)  # 匹配DOI
-                url_elements = content.select("a") # 链接
-                pubdata = re.search(date_pattern, info.text)  # 发布日期
-                
-      
-                if len(url_elements) > 3:
-                    url = url_elements[3]
-                else:
-                    logger.warning("未找到URL元素")
-                    url = {"href": ""}
-                    
-                abstract = content.find("div", {"class": "div-text-line-three itsmlink"}) # 摘要
-                
-                
-                paper['title'] = title.text.strip() if title else "未知标题"
-                paper['jounal'] = jounal.text.strip() if jounal else "未知期刊"
-                paper['impact'] = impact.text.strip() if impact else "未知影响因子"
-                paper['pubdata'] = pubdata.group(1).strip() if pubdata else "未知发布日期"
-                paper['doi'] = doi_match.group(1).strip() if doi_match else "未知DOI"
-                paper['url'] = baseurl + url['href'].strip() if url else "未知URL"
-                paper['abstract'] = abstract.text.strip() if abstract else "未知摘要"
-                    
-                paper_all.append(paper)
-                    
-
-            logger.info(f"成功获取文献: {len(paper_all)}篇")
-            time.sleep(1)  # 避免频繁请求
-            return paper_all
+            # 通过关键词和影响因子获取searchLogId，同一查询翻页时直接复用
+            post_data = self._get_post_data(keywordList, impact, filters)
+            tried = []
+            while True:
+                try:
+                    async with self.sessions.lease(ck, exclude=tried) as session:
+                        return await self._search_page(post_data, session, lang, searchSort, pageindex, on_paper)
+                except SessionRejected as e:
+                    # Cookie失效的会话先隔离，再换用其他会话重试
+                    self.sessions.quarantine(e.session, str(e))
+                    tried.append(e.session)
+                    if ck or len(tried) >= len(self.sessions):
+                        raise
+                    logger.info(f"会话{e.session.name}的Cookie已失效，换用其他会话重试")
             
+        except CircuitOpenError as e:
+            logger.warning(f"上游熔断中，跳过搜索: {str(e)}")
+            return {"error": f"获取文献内容失败: {str(e)}", "suggestion": CIRCUIT_OPEN_SUGGESTION}
         except Exception as e:
             logger.error(f"获取页面内容时出错: {str(e)}")
-            return {"error": f"获取文献内容失败: {str(e)}"} 
\ No newline at end of file
+            return {"error": f"获取文献内容失败: {str(e)}"}
+
+    async def _search_page(self, post_data: dict, session: Session, lang: str, searchSort: str, pageindex: int,
+                           on_paper=None):
+        """
+        使用指定会话获取一页结果
+        """
+        id_text, cached = await self._get_search_id(post_data, session)
+
+        resp, papers = await self._get_result_page(id_text, session, lang, searchSort, pageindex)
+        if cached and self._is_rejected(resp):
+            # 缓存的id已失效，重新获取后重试一次
+            logger.info(f"searchLogId已失效，重新获取: {id_text}")
+            id_text, _ = await self._get_search_id(post_data, session, refresh=True)
+            resp, papers = await self._get_result_page(id_text, session, lang, searchSort, pageindex)
+        return await self._collect(papers, on_paper)
+
+    def iter_papers(self, keywordList: list, ck: str = None, impact: str = 8, searchSort: str = 'publishDate', lang: str = 'zh',
+                    start_page: int = 1, max_results: int = None, max_pages: int = 10, read_ahead: int = 2,
+                    fetch_page=None, filters: SearchFilter = None) -> PageIterator:  # 跨页迭代文献
+        """
+        跨页逐篇迭代文献，消费当前页时在后台预取后续read_ahead页
+
+        参数:
+        start_page: 起始页码
+        max_results: 最多产出的文献数，为空表示不限
+        max_pages: 最多获取的页数
+        read_ahead: 预取窗口大小
+        fetch_page: 可选的取页函数fetch_page(page, on_paper)，默认直接调用get_page_content，
+                    可替换为带缓存的实现
+        filters: 可选的过滤条件，提交给上游的同时在本地再过滤一遍（作者只由上游过滤），
+                 不满足条件的文献不产出也不计入max_results
+
+        返回:
+        PageIterator，可用async for遍历，迭代结束后error属性记录终止原因
+        """
+        if fetch_page is None:
+            async def fetch_page(page: int, on_paper):
+                return await self.get_page_content(keywordList, ck, impact=impact, searchSort=searchSort,
+                                                   lang=lang, pageindex=page, on_paper=on_paper, filters=filters)
+        return PageIterator(fetch_page, start_page=start_page, max_results=max_results,
+                            max_pages=max_pages, read_ahead=read_ahead,
+                            accept=filters.matches if filters else None)
+
+    def _relative_path(self, url: str):
+        """
+        站内的绝对链接转换为相对路径，其他链接返回None
+        """
+        if url and url.startswith(self.fetcher.base_url):
+            return url[len(self.fetcher.base_url):]
+        return None
+
+    async def _get_detail_page(self, path: str, session: Session):
+        with STAGE_SECONDS.time(stage="detail_get"):
+            resp = await self.fetcher.get(path, cookies=session.cookies, session=session.name)
+        resp.encoding = 'utf-8'
+        with STAGE_SECONDS.time(stage="parse"):
+            paper = await asyncio.to_thread(parse_detail_page, resp.text, str(resp.url), self.parser)
+        return resp, paper
+
+    async def _fetch_detail(self, doi: str, session: Session, url: str = None):
+        path = self._relative_path(url) or self.doi_path.format(doi=quote(doi, safe="/"))
+        resp, paper = await self._get_detail_page(path, session)
+        if paper is None:
+            # 未跳转到详情页时，从返回的结果列表中找到DOI匹配的文献，再请求其详情页
+            papers = await asyncio.to_thread(parse_result_page, resp.text, self.fetcher.base_url, self.parser)
+            papers = papers if isinstance(papers, list) else []
+            match = next((item for item in papers if item.doi.lower() == doi.lower()), None)
+            if match is None:
+                logger.warning(f"未找到DOI对应的文献: {doi}")
+                return None
+            path = self._relative_path(match.url)
+            if path is None:
+                return match
+            _, paper = await self._get_detail_page(path, session)
+            if paper is None:
+                logger.warning(f"无法识别文献详情页的结构，只返回搜索结果中的信息: {match.url}")
+                return match
+        if not paper.has_doi:
+            paper = replace(paper, doi=doi)
+        logger.info(f"成功获取文献详情: {doi}")
+        return paper
+
+    async def get_literature_detail(self, doi: str, ck: str = None, lang: str = 'zh', url: str = None):  # 获取文献详情
+        """
+        根据DOI获取文献详情（完整摘要、作者和被引次数）
+
+        参数:
+        doi: 文献的DOI标识符
+        ck: Cookie字符串，为空时从会话池中分派
+        lang: 语言，保留参数，详情页不区分语言
+        url: 可选的文献详情页链接（例如搜索结果中的链接），提供时直接请求该页面
+
+        返回:
+        Paper记录；未找到时返回None；出错时返回包含error的字典
+        """
+        doi = doi.strip()
+        try:
+            async def fetch():
+                async with self.sessions.lease(ck) as session:
+                    return await self._fetch_detail(doi, session, url)
+
+            # 同一DOI的并发请求只访问一次上游
+            return await self._detail_flight.do(doi.lower(), fetch)
+        except CircuitOpenError as e:
+            logger.warning(f"上游熔断中，跳过文献详情请求: {str(e)}")
+            return {"error": f"获取文献详情失败: {str(e)}", "suggestion": CIRCUIT_OPEN_SUGGESTION}
+        except Exception as e:
+            logger.error(f"获取文献详情时出错: {str(e)}")
+            return {"error": f"获取文献详情失败: {str(e)}", "suggestion": "请检查网络连接或Cookie是否有效"}
@@ -0,0 +1,231 @@
+"""
+XMol 异步HTTP请求模块
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+
+from .breaker import CircuitBreaker, CircuitOpenError
+from .metrics import UPSTREAM_ERRORS, UPSTREAM_RESPONSES, UPSTREAM_RETRIES
+from .ratelimit import get_rate_limiter
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.fetcher")
+
+DEFAULT_BASE_URL = "https://www.x-mol.com/"
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+}
+
+# 视为上游故障、可重试的状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 请求尚未发出的错误，非幂等请求也可以安全重试
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class AsyncFetcher():
+    """
+    异步HTTP请求引擎
+    所有请求共享同一个httpx.AsyncClient，连接池有上限并保持keep-alive。
+    请求有连接/读取超时；GET在超时、连接错误和5xx/429时按带抖动的指数退避重试，
+    POST默认只在请求尚未发出时重试；上游连续失败时熔断，熔断期间直接抛出CircuitOpenError
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30.0, headers: dict = None,
+                 limiter=None, connect_timeout: float = 5.0, read_timeout: float = 15.0, retries: int = 2,
+                 backoff: float = 0.2, backoff_max: float = 2.0, deadline: float = 30.0, breaker=None):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.host = httpx.URL(self.base_url).host
+        self.limiter = limiter
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.deadline = deadline  # 单次调用（含重试）的总时长上限，超出后不再重试
+        self.breaker = breaker
+        self._client = None
+        self._loop = None
+
+        # 指标
+        self.requests = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        获取共享的AsyncClient，事件循环变化时重新创建
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+            self._loop = loop
+            logger.debug(f"创建HTTP连接池: {self.base_url}")
+        return self._client
+
+    @staticmethod
+    def _cookie_header(cookies: dict) -> dict:
+        """
+        将cookie字典转换为请求头，避免在共享客户端上保存会话状态
+        """
+        if not cookies:
+            return {}
+        return {"Cookie": "; ".join(f"{key}={value}" for key, value in cookies.items())}
+
+    def _delay(self, attempt: int, resp: httpx.Response = None) -> float:
+        """
+        第attempt次重试前的等待秒数：带完全抖动的指数退避，上游给出Retry-After时取两者较大值
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        if resp is not None:
+            try:
+                delay = max(delay, min(float(resp.headers.get("retry-after", 0)), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    async def _request(self, method: str, path: str, session: str = None, idempotent: bool = True,
+                       **kwargs) -> httpx.Response:
+        """
+        发送请求，处理熔断、限速、超时和重试
+        """
+        client = self._get_client()
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                try:
+                    self.breaker.before()
+                except CircuitOpenError:
+                    UPSTREAM_ERRORS.labels("circuit_open").inc()
+                    raise
+            resp = None
+            try:
+                # 限速等待也在保护范围内，探测请求在等待中被取消时同样释放探测名额
+                if self.limiter is not None:
+                    await self.limiter.acquire(self.host, session)
+                self.requests += 1
+                resp = await client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                self.failures += 1
+                if isinstance(e, httpx.TimeoutException):
+                    self.timeouts += 1
+                UPSTREAM_ERRORS.labels("timeout" if isinstance(e, httpx.TimeoutException) else "transport").inc()
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                retryable = idempotent or isinstance(e, UNSENT_ERRORS)
+                error = e
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+            else:
+                UPSTREAM_RESPONSES.labels(method, resp.status_code).inc()
+                if resp.status_code not in RETRY_STATUSES:
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    return resp
+                self.failures += 1
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                retryable = idempotent
+                error = None
+
+            delay = self._delay(attempt, resp)
+            if not retryable or attempt >= self.retries or time.monotonic() - start + delay > self.deadline:
+                if error is not None:
+                    raise error
+                return resp
+            attempt += 1
+            self.retried += 1
+            UPSTREAM_RETRIES.labels(method).inc()
+            reason = repr(error) if error is not None else f"HTTP {resp.status_code}"
+            logger.info(f"{method} {path} 失败({reason})，{delay:.2f}秒后第{attempt}次重试")
+            await asyncio.sleep(delay)
+
+    async def post(self, path: str, data: dict = None, cookies: dict = None,
+                   follow_redirects: bool = False, session: str = None, idempotent: bool = False) -> httpx.Response:
+        """
+        发送POST请求，默认不跟随重定向；session为会话名，用于按会话限速；
+        idempotent为True时与GET一样在失败时重试
+        """
+        return await self._request("POST", path, session=session, idempotent=idempotent, data=data,
+                                   headers=self._cookie_header(cookies), follow_redirects=follow_redirects)
+
+    async def get(self, path: str, params: dict = None, cookies: dict = None,
+                  follow_redirects: bool = True, session: str = None) -> httpx.Response:
+        """
+        发送GET请求
+        """
+        return await self._request("GET", path, session=session, params=params,
+                                   headers=self._cookie_header(cookies), follow_redirects=follow_redirects)
+
+    def metrics(self) -> dict:
+        """
+        返回请求、重试、超时和熔断指标
+        """
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "connect_timeout": self.timeout.connect,
+            "read_timeout": self.timeout.read,
+            "breaker": self.breaker.metrics() if self.breaker is not None else None,
+        }
+
+    async def aclose(self) -> None:
+        """
+        关闭连接池
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+_shared_fetcher = None
+
+
+def get_fetcher() -> AsyncFetcher:
+    """
+    获取进程内共享的请求引擎，连接池、超时、重试和熔断参数可通过环境变量配置，并使用共享限速器
+    """
+    global _shared_fetcher
+    if _shared_fetcher is None:
+        _shared_fetcher = AsyncFetcher(
+            base_url=os.getenv("XMOL_BASE_URL", DEFAULT_BASE_URL),
+            max_connections=int(os.getenv("XMOL_MAX_CONNECTIONS", "20")),
+            max_keepalive=int(os.getenv("XMOL_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("XMOL_KEEPALIVE_EXPIRY", "30")),
+            limiter=get_rate_limiter(),
+            connect_timeout=float(os.getenv("XMOL_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("XMOL_READ_TIMEOUT", "15")),
+            retries=int(os.getenv("XMOL_RETRIES", "2")),
+            backoff=float(os.getenv("XMOL_RETRY_BACKOFF", "0.2")),
+            deadline=float(os.getenv("XMOL_REQUEST_DEADLINE", "30")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("XMOL_BREAKER_FAILURES", "5")),
+                reset_timeout=float(os.getenv("XMOL_BREAKER_RESET", "30")),
+            ),
+        )
+    return _shared_fetcher
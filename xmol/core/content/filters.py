@@ -0,0 +1,160 @@
+"""
+XMol 搜索过滤与排序模块
+
+将发布日期、期刊、作者和影响因子上限转换为X-MOL高级检索的表单字段；
+除作者外，同样的条件作为本地过滤在解析出的文献上再检查一遍，并支持本地排序取前k篇
+"""
+
+import calendar
+import heapq
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from .paper import Paper
+
+
+# X-MOL高级检索最多接受的期刊数，超出时只在本地过滤
+MAX_JOURNALS = 5
+
+# 本地排序方式：空字符串保持上游顺序；搜索结果中的简要记录没有被引次数，不提供按被引次数排序
+RANK_FIELDS = ("", "impact", "pubdate")
+
+
+def _parse_bound(value, end: bool = False) -> Optional[date]:
+    """
+    解析日期边界，支持YYYY、YYYY-MM和YYYY-MM-DD；作为结束日期时补齐到年末/月末
+    """
+    if value is None or isinstance(value, date):
+        return value
+    text = str(value).strip().replace("/", "-")
+    if not text:
+        return None
+    parts = text.split("-")
+    try:
+        if len(parts) == 1:
+            return date(int(parts[0]), 12, 31) if end else date(int(parts[0]), 1, 1)
+        if len(parts) == 2:
+            year, month = int(parts[0]), int(parts[1])
+            return date(year, month, calendar.monthrange(year, month)[1] if end else 1)
+        return date.fromisoformat(f"{int(parts[0]):04d}-{int(parts[1]):02d}-{int(parts[2]):02d}")
+    except ValueError:
+        raise ValueError(f"无法解析日期: {value}，请使用YYYY、YYYY-MM或YYYY-MM-DD格式")
+
+
+def _clean(values) -> tuple:
+    if isinstance(values, str):
+        values = [values]
+    return tuple(dict.fromkeys(str(value).strip() for value in values or () if value and str(value).strip()))
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class SearchFilter():
+    """
+    搜索过滤条件
+
+    日期为闭区间；期刊按名称精确匹配（忽略大小写和多余空白）。
+    作者只随检索请求提交给X-MOL，由上游过滤：搜索结果和本地缓存中的简要记录没有作者，无法在本地检查
+    """
+
+    date_start: Optional[date] = None
+    date_end: Optional[date] = None
+    journals: tuple = ()
+    impact_max: Optional[float] = None
+    authors: tuple = ()
+
+    @classmethod
+    def create(cls, publish_date_start=None, publish_date_end=None, journals=None,
+               impact_factor_max=None, authors=None) -> "SearchFilter":
+        """
+        由工具参数构建过滤条件，参数无效时抛出ValueError
+        """
+        date_start = _parse_bound(publish_date_start)
+        date_end = _parse_bound(publish_date_end, end=True)
+        if date_start and date_end and date_start > date_end:
+            raise ValueError(f"开始日期{date_start}晚于结束日期{date_end}")
+        impact_max = None
+        if impact_factor_max is not None and str(impact_factor_max).strip():
+            try:
+                impact_max = float(impact_factor_max)
+            except ValueError:
+                raise ValueError(f"无法解析影响因子上限: {impact_factor_max}")
+        return cls(date_start, date_end, _clean(journals), impact_max, _clean(authors))
+
+    def __bool__(self) -> bool:
+        return any((self.date_start, self.date_end, self.journals, self.impact_max is not None, self.authors))
+
+    def post_fields(self) -> dict:
+        """
+        X-MOL高级检索表单中的过滤字段
+        """
+        fields = {}
+        for i, author in enumerate(self.authors or ("",)):
+            if i > 0:
+                fields[f"authorList[{i}].operator"] = "AND"
+            fields[f"authorList[{i}].option"] = author
+        journals = self.journals if len(self.journals) <= MAX_JOURNALS else ()
+        for i in range(MAX_JOURNALS):
+            fields[f"journals[{i}]"] = journals[i] if i < len(journals) else ""
+        fields["publishDateStart"] = self.date_start.isoformat() if self.date_start else ""
+        fields["publishDateEnd"] = self.date_end.isoformat() if self.date_end else ""
+        fields["impactFactorEnd"] = f"{self.impact_max:g}" if self.impact_max is not None else ""
+        return fields
+
+    def key(self) -> str:
+        """
+        缓存键片段，无过滤条件时为空字符串
+        """
+        if not self:
+            return ""
+        return "\x1d".join([
+            self.date_start.isoformat() if self.date_start else "",
+            self.date_end.isoformat() if self.date_end else "",
+            "\x1e".join(sorted(map(_fold, self.journals))),
+            f"{self.impact_max:g}" if self.impact_max is not None else "",
+            "\x1e".join(sorted(map(_fold, self.authors))),
+        ])
+
+    def matches(self, paper: Paper) -> bool:
+        """
+        本地检查文献是否满足过滤条件；缺少日期或影响因子的记录无法判断，视为通过，作者不在本地检查
+        """
+        if paper.pubdate is not None:
+            if self.date_start and paper.pubdate < self.date_start:
+                return False
+            if self.date_end and paper.pubdate > self.date_end:
+                return False
+        if self.impact_max is not None and paper.impact is not None and paper.impact > self.impact_max:
+            return False
+        if self.journals and _fold(paper.journal) not in {_fold(journal) for journal in self.journals}:
+            return False
+        return True
+
+
+def rank_papers(papers: list, rank_by: str = "", top_k: int = None) -> list:
+    """
+    本地排序并取前top_k篇
+
+    参数:
+    rank_by: ''保持上游顺序，'impact'按影响因子、'pubdate'按发布日期降序，
+             缺少该字段的文献排在最后，同值时保持原顺序
+    top_k: 保留的文献数，为空表示全部，否则至少为1
+    """
+    if rank_by not in RANK_FIELDS:
+        raise ValueError(f"不支持的排序方式: {rank_by}，可选值为{', '.join(repr(field) for field in RANK_FIELDS)}")
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k必须为正整数: {top_k}")
+    if not rank_by:
+        return papers[:top_k] if top_k else papers
+    missing = date.min if rank_by == "pubdate" else float("-inf")
+
+    def key(item):
+        value = getattr(item[1], rank_by)
+        return (value if value is not None else missing, -item[0])
+
+    ranked = heapq.nlargest(top_k or len(papers), enumerate(papers), key=key)
+    return [paper for _, paper in ranked]
@@ -0,0 +1,344 @@
+"""
+XMol 本地文献索引模块
+
+对已获取过的文献建立倒排索引（标题、期刊、摘要词项）和规范化DOI映射，
+支持BM25排序、前缀匹配和拼写容错，用于离线检索、DOI/标题定位和相近DOI的提示
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+
+from .paper import Paper
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.index")
+
+# 各字段的词频权重
+FIELD_WEIGHTS = {"title": 3.0, "journal": 1.5, "abstract": 1.0}
+
+# 前缀扩展和拼写容错匹配的得分折扣
+PREFIX_DISCOUNT = 0.8
+FUZZY_DISCOUNT = 0.5
+
+# 前缀扩展时每个查询词最多展开的词项数，以及参与前缀扩展的最短查询词
+MAX_EXPANSIONS = 50
+MIN_PREFIX = 2
+
+# 超过该数量的批量添加在完成后统一重建词表
+BULK_SIZE = 1000
+
+# 出现在超过该比例文献中的词项几乎不影响排序，查询中还有其他词项时跳过以免遍历过长的倒排表
+COMMON_RATIO = 0.5
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is", "of", "on", "or",
+    "the", "to", "via", "with",
+})
+
+WORD_RE = re.compile(r"[0-9a-z]+|[一-鿿]+")
+DOI_PREFIX_RE = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+DOI_RE = re.compile(r"^10\.\d{4,9}/\S+$")
+
+
+def normalize_doi(doi: str) -> str:
+    """
+    DOI规范化：去掉doi.org链接和doi:前缀、首尾空白与标点，转为小写
+    """
+    doi = DOI_PREFIX_RE.sub("", (doi or "").strip())
+    return doi.strip(" .;,").lower()
+
+
+def looks_like_doi(text: str) -> bool:
+    return bool(DOI_RE.match(normalize_doi(text)))
+
+
+def tokenize(text: str) -> list:
+    """
+    分词：英文和数字按单词切分并去掉停用词，中文按相邻两字切分（单字词保留单字）
+    """
+    tokens = []
+    for word in WORD_RE.findall((text or "").lower()):
+        if "一" <= word[0] <= "鿿":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(WORD_RE.findall((title or "").lower()))
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """
+    编辑距离是否不超过limit：先按字符集快速排除，再只计算对角线附近的带状区域，超出时提前结束
+    """
+    if abs(len(a) - len(b)) > limit or len(set(a) - set(b)) > limit:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    beyond = limit + 1
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else beyond] + [beyond] * len(b)
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+def _fuzzy_limit(term: str) -> int:
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+class PaperIndex():
+    """
+    文献倒排索引
+
+    以规范化DOI（无DOI时以规范化标题）作为文档键，重复添加同一文献会替换旧记录
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_docs: int = 100000):
+        self.k1 = k1
+        self.b = b
+        self.max_docs = max_docs
+        self._docs = {}  # 文档键 -> Paper
+        self._lengths = {}  # 文档键 -> 加权文档长度
+        self._terms = {}  # 文档键 -> 该文档的词项列表，删除时使用
+        self._postings = defaultdict(dict)  # 词项 -> {文档键: 加权词频}
+        self._dois = {}  # 规范化DOI -> 文档键
+        self._titles = {}  # 规范化标题 -> 文档键
+        self._total_length = 0.0
+        self._vocabulary = []  # 有序词表，用于前缀匹配；已删除的词项延迟清理
+        self._buckets = defaultdict(list)  # (首字符, 长度) -> 词项列表，用于拼写容错
+        self._vocabulary_dirty = False
+        self._stale_terms = 0
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    @staticmethod
+    def _key(paper: Paper) -> str:
+        return normalize_doi(paper.doi) if paper.has_doi else "title:" + _normalize_title(paper.title)
+
+    def add(self, paper: Paper) -> None:
+        """
+        添加或替换一篇文献；已有详情记录时不会被搜索结果中的简要记录覆盖
+        """
+        key = self._key(paper)
+        with self._lock:
+            existing = self._docs.get(key)
+            if existing is not None:
+                if (existing.authors or existing.citations is not None) and not paper.authors:
+                    return
+                self._remove(key)
+            elif len(self._docs) >= self.max_docs:
+                self._remove(next(iter(self._docs)))
+
+            frequencies = defaultdict(float)
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(getattr(paper, field)):
+                    frequencies[token] += weight
+                    length += weight
+            for token, frequency in frequencies.items():
+                postings = self._postings[token]
+                if not postings and not self._vocabulary_dirty:
+                    bisect.insort(self._vocabulary, token)
+                    self._buckets[token[0], len(token)].append(token)
+                postings[key] = frequency
+
+            self._docs[key] = paper
+            self._lengths[key] = length
+            self._terms[key] = list(frequencies)
+            self._total_length += length
+            if paper.has_doi:
+                self._dois[key] = key
+            self._titles.setdefault(_normalize_title(paper.title), key)
+
+    def add_many(self, papers) -> int:
+        """
+        批量添加；数量较多时不逐个插入有序词表，而是添加完成后统一重建
+        """
+        papers = list(papers)
+        if len(papers) > BULK_SIZE:
+            self._vocabulary_dirty = True
+        for paper in papers:
+            self.add(paper)
+        with self._lock:
+            self._ensure_vocabulary()
+        return len(papers)
+
+    def _remove(self, key: str) -> None:
+        paper = self._docs.pop(key)
+        for token in self._terms.pop(key):
+            postings = self._postings[token]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._stale_terms += 1
+        self._total_length -= self._lengths.pop(key)
+        self._dois.pop(key, None)
+        title = _normalize_title(paper.title)
+        if self._titles.get(title) == key:
+            del self._titles[title]
+
+    def _ensure_vocabulary(self) -> None:
+        """
+        批量添加后或已删除的词项过多时重建有序词表和容错分桶
+        """
+        if not self._vocabulary_dirty and self._stale_terms <= len(self._vocabulary) // 2:
+            return
+        self._vocabulary = sorted(self._postings)
+        self._buckets = defaultdict(list)
+        for token in self._vocabulary:
+            self._buckets[token[0], len(token)].append(token)
+        self._vocabulary_dirty = False
+        self._stale_terms = 0
+
+    def _expand(self, term: str, prefix: bool) -> list:
+        """
+        将查询词展开为[(词项, 折扣)]：精确匹配、前缀匹配，都没有时尝试拼写容错
+        """
+        self._ensure_vocabulary()
+        expansions = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+        if prefix and len(term) >= MIN_PREFIX:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for candidate in self._vocabulary[start:start + MAX_EXPANSIONS + 1]:
+                if not candidate.startswith(term):
+                    break
+                if candidate != term and candidate in self._postings:
+                    expansions.append((candidate, PREFIX_DISCOUNT))
+        if not expansions:
+            limit = _fuzzy_limit(term)
+            for length in range(len(term) - limit, len(term) + limit + 1) if limit else ():
+                expansions.extend((candidate, FUZZY_DISCOUNT) for candidate in self._buckets.get((term[0], length), ())
+                                  if candidate in self._postings and _within_distance(term, candidate, limit))
+        return expansions
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        BM25检索，最后一个查询词和以*结尾的查询词按前缀匹配
+
+        返回:
+        [(Paper, 得分, 命中的查询词比例), ...]，按得分降序
+        """
+        words = query.lower().split()
+        terms = []
+        for position, word in enumerate(words):
+            prefix = word.endswith("*") or position == len(words) - 1
+            for token in tokenize(word):
+                terms.append((token, prefix))
+        if not terms:
+            return []
+
+        with self._lock:
+            self.queries += 1
+            count = len(self._docs)
+            if not count:
+                return []
+            average = self._total_length / count or 1.0
+            expanded = [self._expand(term, prefix) for term, prefix in terms]
+            common = [bool(expansions) and all(len(self._postings[candidate]) > count * COMMON_RATIO
+                                               for candidate, _ in expansions)
+                      for expansions in expanded]
+            if all(common):
+                common = [False] * len(terms)
+            selective = len(terms) - sum(common)
+            scores = defaultdict(float)
+            matched = defaultdict(int)
+            lengths = self._lengths
+            base = self.k1 * (1 - self.b)
+            scale = self.k1 * self.b / average
+            for position, expansions in enumerate(expanded):
+                if common[position]:
+                    continue
+                # 同一查询词展开出的多个词项只取文档中得分最高的一个
+                best = {}
+                for candidate, discount in expansions:
+                    postings = self._postings[candidate]
+                    weight = discount * (self.k1 + 1) * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for key, frequency in postings.items():
+                        score = weight * frequency / (frequency + base + scale * lengths[key])
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+                for key, score in best.items():
+                    scores[key] += score
+                    matched[key] += 1
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(self._docs[key], score, matched[key] / selective) for key, score in ranked]
+
+    def lookup_doi(self, doi: str):
+        """
+        按DOI查找，只接受规范化形式（大小写、doi.org链接和doi:前缀、首尾空白）完全一致的文献
+        """
+        with self._lock:
+            key = self._dois.get(normalize_doi(doi))
+            return self._docs.get(key) if key is not None else None
+
+    def similar_dois(self, doi: str, limit: int = 3) -> list:
+        """
+        同一注册前缀下编辑距离1-2的已索引文献，按距离升序，只用作"您是否要找"的提示：
+        相邻的文章编号通常是另一篇真实存在的文献，不能替换调用方给出的DOI
+        """
+        normalized = normalize_doi(doi)
+        if "/" not in normalized:
+            return []
+        registrant = normalized.split("/", 1)[0] + "/"
+        max_distance = 1 if len(normalized) < 16 else 2
+        matches = []
+        with self._lock:
+            for candidate in self._dois:
+                if candidate == normalized or not candidate.startswith(registrant):
+                    continue
+                distance = next((distance for distance in range(1, max_distance + 1)
+                                 if _within_distance(normalized, candidate, distance)), None)
+                if distance is not None:
+                    matches.append((distance, candidate))
+            matches.sort()
+            return [self._docs[candidate] for _, candidate in matches[:limit]]
+
+    def resolve(self, text: str):
+        """
+        将DOI或标题解析为已索引的文献，找不到时返回None
+        """
+        if looks_like_doi(text):
+            return self.lookup_doi(text)
+        with self._lock:
+            key = self._titles.get(_normalize_title(text))
+            if key is not None:
+                return self._docs[key]
+        # 标题不完全一致时，只接受命中全部查询词且明显领先第二名的结果
+        results = self.search(text, limit=2)
+        if results and results[0][2] == 1.0 and (len(results) == 1 or results[0][1] >= 2 * results[1][1]):
+            return results[0][0]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._docs),
+            "terms": len(self._postings),
+            "dois": len(self._dois),
+            "queries": self.queries,
+        }
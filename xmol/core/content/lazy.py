@@ -0,0 +1,92 @@
+"""
+延迟初始化
+
+服务进程启动时只创建轻量的对象，缓存预热、本地索引和请求引擎等较重的初始化推迟到首次使用，
+或在握手之后由后台线程提前完成，客户端不必等这些工作结束才能收到initialize的响应。
+事件循环中的代码应通过aload()/load_all()获取对象：初始化在线程中进行（或等待后台线程完成），
+不在事件循环上等待初始化锁，否则一个调用等待初始化时所有会话都会停顿
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.lazy")
+
+
+class Lazy():
+    """
+    首次访问属性时才调用factory创建对象的代理；多个线程同时访问时只创建一次，其余线程等待创建完成
+
+    参数:
+    factory: 无参数的创建函数
+    name: 日志中显示的名称
+    """
+
+    def __init__(self, factory, name: str = None):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "对象")
+        self._value = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """是否已创建，用于指标等不应触发初始化的场合"""
+        return self._ready
+
+    def load(self):
+        """获取被代理的对象，尚未创建时创建"""
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    start = time.perf_counter()
+                    self._value = self._factory()
+                    self._ready = True
+                    logger.info(f"{self._name}已初始化, 耗时{time.perf_counter() - start:.2f}秒")
+        return self._value
+
+    async def aload(self):
+        """在事件循环中获取被代理的对象，尚未创建时在线程中创建或等待后台线程创建完成"""
+        if self._ready:
+            return self._value
+        return await asyncio.to_thread(self.load)
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def __contains__(self, item) -> bool:
+        return item in self.load()
+
+
+async def load_all(*objects: Lazy) -> None:
+    """
+    在事件循环中确保objects均已创建，之后可以直接访问其属性而不会阻塞事件循环
+    """
+    for lazy in objects:
+        await lazy.aload()
+
+
+def warm_in_background(*objects: Lazy, delay: float = 0.0) -> threading.Thread:
+    """
+    在后台线程中依次创建objects，delay秒后开始，让出握手阶段的CPU；单个对象创建失败不影响其他对象，
+    之后首次使用该对象时会再次尝试创建
+    """
+    def warm():
+        if delay > 0:
+            time.sleep(delay)
+        for lazy in objects:
+            try:
+                lazy.load()
+            except Exception as e:
+                logger.error(f"后台初始化{lazy._name}时出错: {str(e)}")
+
+    thread = threading.Thread(target=warm, name="xmol-warmup", daemon=True)
+    thread.start()
+    return thread
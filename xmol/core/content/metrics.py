@@ -0,0 +1,24 @@
+"""
+XMol 指标定义
+
+search_title_by_keywords一次调用的各阶段耗时（搜索POST、结果页GET、解析、限速等待、渲染）、
+上游状态码和重试；缓存命中率等已有统计在server中以回调指标导出
+"""
+
+from mcp_common.metrics import REGISTRY
+
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "xmol_stage_seconds", "各阶段耗时(秒)：search_post、result_get、detail_get、parse(建文档树)、extract(提取文献字段)、render", ("stage",),
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "xmol_rate_limit_wait_seconds", "限速器排队等待时间(秒)，不需要等待的请求记为0",
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "xmol_upstream_responses", "上游响应数，按方法和状态码统计", ("method", "status"),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "xmol_upstream_errors", "上游请求异常数：timeout、transport、circuit_open", ("kind",),
+)
+UPSTREAM_RETRIES = REGISTRY.counter("xmol_upstream_retries", "上游请求重试次数", ("method",))
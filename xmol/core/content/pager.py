@@ -0,0 +1,104 @@
+"""
+XMol 分页迭代模块
+
+跨页逐篇产出文献，消费第N页时在后台预取后续页面
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.pager")
+
+_PAGE_DONE = object()
+
+
+class PageIterator():
+    """
+    跨页文献异步迭代器
+
+    fetch_page(page, on_paper)为异步函数，返回该页的文献列表或错误字典，
+    并在解析出每篇文献时await on_paper(paper)。预取窗口为read_ahead页，
+    遇到错误页或空页、达到max_results或max_pages时停止，未消费的预取任务会被取消。
+    提供accept(paper)时只产出返回True的文献，被过滤掉的文献不计入max_results
+
+    用法:
+        async for paper in PageIterator(fetch_page, max_results=100):
+            ...
+    """
+
+    def __init__(self, fetch_page, start_page: int = 1, max_results: int = None, max_pages: int = 10,
+                 read_ahead: int = 2, accept=None):
+        self.fetch_page = fetch_page
+        self.start_page = start_page
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.read_ahead = max(0, read_ahead)
+        self.accept = accept
+        self.error = None  # 终止迭代的错误字典（第一页即出错时可据此提示用户）
+        self.pages_fetched = 0
+        self.yielded = 0
+        self.rejected = 0
+
+    async def _run_page(self, page: int, queue: asyncio.Queue):
+        try:
+            return await self.fetch_page(page, queue.put)
+        finally:
+            queue.put_nowait(_PAGE_DONE)
+
+    async def __aiter__(self):
+        window = deque()
+        next_page = self.start_page
+        last_page = self.start_page + self.max_pages - 1
+
+        def schedule():
+            nonlocal next_page
+            queue = asyncio.Queue()
+            task = asyncio.ensure_future(self._run_page(next_page, queue))
+            window.append((next_page, queue, task))
+            next_page += 1
+
+        try:
+            while True:
+                while len(window) < 1 + self.read_ahead and next_page <= last_page:
+                    schedule()
+                if not window:
+                    return
+                page, queue, task = window.popleft()
+
+                # 当前页边解析边产出
+                count = 0
+                while (paper := await queue.get()) is not _PAGE_DONE:
+                    count += 1
+                    if self.accept is not None and not self.accept(paper):
+                        self.rejected += 1
+                        continue
+                    self.yielded += 1
+                    yield paper
+                    if self.max_results is not None and self.yielded >= self.max_results:
+                        return
+
+                try:
+                    result = await task
+                except Exception as e:
+                    result = {"error": f"获取第{page}页失败: {str(e)}"}
+                self.pages_fetched += 1
+
+                if not isinstance(result, list) or not result:
+                    self.error = result if isinstance(result, dict) else {"error": "文献列表为空"}
+                    logger.info(f"第{page}页无更多结果，停止翻页")
+                    return
+                # 命中缓存等未回调的文献在此补齐
+                for paper in result[count:]:
+                    if self.accept is not None and not self.accept(paper):
+                        self.rejected += 1
+                        continue
+                    self.yielded += 1
+                    yield paper
+                    if self.max_results is not None and self.yielded >= self.max_results:
+                        return
+        finally:
+            for _, _, task in window:
+                task.cancel()
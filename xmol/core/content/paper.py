@@ -0,0 +1,115 @@
+"""
+XMol 文献记录模块
+"""
+
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+
+def _parse_impact(value) -> Optional[float]:
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(str(value).replace("IF:", "").strip())
+    except ValueError:
+        return None
+
+
+def _parse_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class Paper():
+    """
+    文献记录
+    使用__slots__减少每条记录的内存占用；影响因子和发布日期保存为数值/日期，便于过滤和排序，
+    期刊名会被驻留(intern)以便大量文献共享同一个字符串。
+    authors和citations只有从文献详情页获取的记录才有；
+    _markdown/_json缓存渲染好的片段，同一记录再次列出时直接复用
+    """
+
+    title: str
+    journal: str
+    impact: Optional[float]
+    pubdate: Optional[date]
+    doi: str
+    url: str
+    abstract: str
+    authors: tuple = ()
+    citations: Optional[int] = None
+    _markdown: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def create(cls, title: str = None, journal: str = None, impact=None, pubdate=None, doi: str = None,
+               url: str = None, abstract: str = None, authors=None, citations=None) -> "Paper":
+        """
+        由解析得到的原始字符串构建记录，缺失字段使用默认占位
+        """
+        return cls(
+            title=title or "未知标题",
+            journal=sys.intern(journal) if journal else "未知期刊",
+            impact=_parse_impact(impact),
+            pubdate=_parse_date(pubdate),
+            doi=doi or "未知DOI",
+            url=url or "未知URL",
+            abstract=abstract or "未知摘要",
+            authors=tuple(authors) if authors else (),
+            citations=int(citations) if citations is not None else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Paper":
+        """
+        从字典构建记录，兼容旧版缓存中的jounal/pubdata键
+        """
+        return cls.create(
+            title=data.get("title"),
+            journal=data.get("journal", data.get("jounal")),
+            impact=data.get("impact"),
+            pubdate=data.get("pubdate", data.get("pubdata")),
+            doi=data.get("doi"),
+            url=data.get("url"),
+            abstract=data.get("abstract", data.get("content")),
+            authors=data.get("authors"),
+            citations=data.get("citations"),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        转换为可JSON序列化的字典，没有作者和引用信息时省略这两个键
+        """
+        data = {
+            "title": self.title,
+            "journal": self.journal,
+            "impact": self.impact,
+            "pubdate": self.pubdate.isoformat() if self.pubdate else None,
+            "doi": self.doi,
+            "url": self.url,
+            "abstract": self.abstract,
+        }
+        if self.authors:
+            data["authors"] = list(self.authors)
+        if self.citations is not None:
+            data["citations"] = self.citations
+        return data
+
+    @property
+    def has_doi(self) -> bool:
+        return self.doi != "未知DOI"
+
+    @property
+    def impact_text(self) -> str:
+        return format(self.impact, "g") if self.impact is not None else "未知"
+
+    @property
+    def pubdate_text(self) -> str:
+        return self.pubdate.isoformat() if self.pubdate else "未知发布日期"
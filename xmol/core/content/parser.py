@@ -0,0 +1,361 @@
+"""
+XMol 结果页与详情页解析模块
+
+支持多种解析后端：selectolax(lexbor) > lxml > html.parser，按可用性自动选择。
+解析前先截取文献列表（或详情）所在的子树，正则表达式预编译
+"""
+
+import logging
+import os
+import re
+
+from .paper import Paper
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.parser")
+
+# 搜索结果列表页，类名沿用原有的解析代码（对应线上X-MOL的高级检索结果页）
+RESULTS_CLASS = "magazine-senior-search-results-list"
+TITLE_CLASS = "it-bold space-bottom-m10"
+INFO_CLASS = "div-text-line-one it-new-gary"
+JOURNAL_CLASS = "it-blue"
+ABSTRACT_CLASS = "div-text-line-three itsmlink"
+
+# 文献详情页
+# 这些类名没有对照真实的X-MOL详情页核实：仓库中没有详情页的抓取样本，类名是按结果列表页的命名方式拟定的，
+# 目前只与桩服务器生成的页面（benchmarks/stub_server.py中的make_detail_page及由它生成的fixtures/detail_page.html）一致。
+# 真实页面的结构不同时parse_detail_page返回None，get_literature_detail退回搜索结果中的简要记录（没有作者和被引次数）
+DETAIL_CLASS = "magazine-paper-detail"
+DETAIL_TITLE_CLASS = "paper-detail-title"
+DETAIL_AUTHORS_CLASS = "paper-detail-authors"
+DETAIL_INFO_CLASS = "paper-detail-info"
+DETAIL_ABSTRACT_CLASS = "paper-detail-abstract"
+DETAIL_CITATION_CLASS = "paper-detail-citation"
+
+DOI_RE = re.compile(r"DOI:(.*)")
+DATE_RE = re.compile(r"Pub Date\s*:\s*(\d{4}-\d{2}-\d{2})")
+CITATION_RE = re.compile(r"(\d+)")
+
+
+def _slice_results(html: str, marker: str = RESULTS_CLASS) -> str:
+    """
+    从文献列表所在的<div>开始截取，跳过页头、导航和脚本
+    """
+    index = html.find(marker)
+    if index < 0:
+        return ""
+    start = html.rfind("<div", 0, index)
+    if start < 0:
+        start = html.rfind("<DIV", 0, index)
+    return html[max(start, 0):]
+
+
+def _items_selectolax(fragment: str):
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:  # selectolax < 1.0
+        from selectolax.parser import HTMLParser
+
+    root = HTMLParser(fragment).css_first(f'div[class~="{RESULTS_CLASS}"]')
+    if root is None:
+        return None
+    return _iter_selectolax(root)
+
+
+def _iter_selectolax(root):
+    for li in root.css("li"):
+        title = li.css_first(f'div[class="{TITLE_CLASS}"]')
+        info = li.css_first(f'div[class="{INFO_CLASS}"]')
+        journal = info.css_first(f'em[class="{JOURNAL_CLASS}"]') if info is not None else None
+        impact = info.css_first("span") if info is not None else None
+        anchors = li.css("a")
+        abstract = li.css_first(f'div[class="{ABSTRACT_CLASS}"]')
+        yield (
+            title.text() if title is not None else None,
+            journal.text() if journal is not None else None,
+            impact.text() if impact is not None else None,
+            info.text() if info is not None else "",
+            (anchors[3].attributes.get("href") or "") if len(anchors) > 3 else None,
+            abstract.text() if abstract is not None else None,
+        )
+
+
+def _items_lxml(fragment: str):
+    import lxml.html
+
+    doc = lxml.html.fromstring(fragment)
+    roots = doc.xpath(f'//div[contains(concat(" ", normalize-space(@class), " "), " {RESULTS_CLASS} ")]')
+    if not roots:
+        return None
+    return _iter_lxml(roots[0])
+
+
+def _iter_lxml(root):
+    def first(node, xpath):
+        found = node.xpath(xpath)
+        return found[0] if found else None
+
+    for li in root.iter("li"):
+        title = first(li, f'.//div[@class="{TITLE_CLASS}"]')
+        info = first(li, f'.//div[@class="{INFO_CLASS}"]')
+        journal = first(info, f'.//em[@class="{JOURNAL_CLASS}"]') if info is not None else None
+        impact = first(info, ".//span") if info is not None else None
+        anchors = list(li.iter("a"))
+        abstract = first(li, f'.//div[@class="{ABSTRACT_CLASS}"]')
+        yield (
+            title.text_content() if title is not None else None,
+            journal.text_content() if journal is not None else None,
+            impact.text_content() if impact is not None else None,
+            info.text_content() if info is not None else "",
+            (anchors[3].get("href") or "") if len(anchors) > 3 else None,
+            abstract.text_content() if abstract is not None else None,
+        )
+
+
+def _items_html_parser(fragment: str):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # 只为文献列表子树构建节点
+    strainer = SoupStrainer("div", {"class": RESULTS_CLASS})
+    root = BeautifulSoup(fragment, "html.parser", parse_only=strainer).find("div", {"class": RESULTS_CLASS})
+    if root is None:
+        return None
+    return _iter_html_parser(root)
+
+
+def _iter_html_parser(root):
+    for li in root.find_all("li"):
+        title = li.find("div", {"class": TITLE_CLASS})
+        info = li.find("div", {"class": INFO_CLASS})
+        journal = info.find("em", {"class": JOURNAL_CLASS}) if info is not None else None
+        impact = info.find("span") if info is not None else None
+        anchors = li.find_all("a")
+        abstract = li.find("div", {"class": ABSTRACT_CLASS})
+        yield (
+            title.text if title is not None else None,
+            journal.text if journal is not None else None,
+            impact.text if impact is not None else None,
+            info.text if info is not None else "",
+            (anchors[3].get("href") or "") if len(anchors) > 3 else None,
+            abstract.text if abstract is not None else None,
+        )
+
+
+def _detail_selectolax(fragment: str):
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:  # selectolax < 1.0
+        from selectolax.parser import HTMLParser
+
+    root = HTMLParser(fragment).css_first(f'div[class~="{DETAIL_CLASS}"]')
+    if root is None:
+        return None
+
+    def text(selector):
+        node = root.css_first(selector)
+        return node.text() if node is not None else None
+
+    return (
+        text(f'[class="{DETAIL_TITLE_CLASS}"]'),
+        text(f'div[class="{DETAIL_INFO_CLASS}"] em[class="{JOURNAL_CLASS}"]'),
+        text(f'div[class="{DETAIL_INFO_CLASS}"] span'),
+        text(f'div[class="{DETAIL_INFO_CLASS}"]') or "",
+        [node.text() for node in root.css(f'div[class="{DETAIL_AUTHORS_CLASS}"] span')],
+        text(f'div[class="{DETAIL_ABSTRACT_CLASS}"]'),
+        text(f'div[class="{DETAIL_CITATION_CLASS}"]'),
+    )
+
+
+def _detail_lxml(fragment: str):
+    import lxml.html
+
+    doc = lxml.html.fromstring(fragment)
+    roots = doc.xpath(f'//div[contains(concat(" ", normalize-space(@class), " "), " {DETAIL_CLASS} ")]')
+    if not roots:
+        return None
+    root = roots[0]
+
+    def text(xpath):
+        found = root.xpath(xpath)
+        return found[0].text_content() if found else None
+
+    return (
+        text(f'.//*[@class="{DETAIL_TITLE_CLASS}"]'),
+        text(f'.//div[@class="{DETAIL_INFO_CLASS}"]//em[@class="{JOURNAL_CLASS}"]'),
+        text(f'.//div[@class="{DETAIL_INFO_CLASS}"]//span'),
+        text(f'.//div[@class="{DETAIL_INFO_CLASS}"]') or "",
+        [node.text_content() for node in root.xpath(f'.//div[@class="{DETAIL_AUTHORS_CLASS}"]//span')],
+        text(f'.//div[@class="{DETAIL_ABSTRACT_CLASS}"]'),
+        text(f'.//div[@class="{DETAIL_CITATION_CLASS}"]'),
+    )
+
+
+def _detail_html_parser(fragment: str):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    strainer = SoupStrainer("div", {"class": DETAIL_CLASS})
+    root = BeautifulSoup(fragment, "html.parser", parse_only=strainer).find("div", {"class": DETAIL_CLASS})
+    if root is None:
+        return None
+    info = root.find("div", {"class": DETAIL_INFO_CLASS})
+    authors = root.find("div", {"class": DETAIL_AUTHORS_CLASS})
+
+    def text(node):
+        return node.text if node is not None else None
+
+    return (
+        text(root.find(class_=DETAIL_TITLE_CLASS)),
+        text(info.find("em", {"class": JOURNAL_CLASS})) if info is not None else None,
+        text(info.find("span")) if info is not None else None,
+        info.text if info is not None else "",
+        [node.text for node in authors.find_all("span")] if authors is not None else [],
+        text(root.find("div", {"class": DETAIL_ABSTRACT_CLASS})),
+        text(root.find("div", {"class": DETAIL_CITATION_CLASS})),
+    )
+
+
+BACKENDS = {
+    "selectolax": _items_selectolax,
+    "lxml": _items_lxml,
+    "html.parser": _items_html_parser,
+}
+DETAIL_BACKENDS = {
+    "selectolax": _detail_selectolax,
+    "lxml": _detail_lxml,
+    "html.parser": _detail_html_parser,
+}
+_PROBES = {
+    "selectolax": ("selectolax.lexbor", "selectolax.parser"),
+    "lxml": ("lxml.html",),
+    "html.parser": ("bs4",),
+}
+
+
+def available_backends() -> list:
+    """
+    返回当前环境可用的解析后端，按优先级排列
+    """
+    import importlib.util
+
+    found = []
+    for name, modules in _PROBES.items():
+        for module in modules:
+            try:
+                if importlib.util.find_spec(module) is not None:
+                    found.append(name)
+                    break
+            except ImportError:
+                continue
+    return found
+
+
+_default_backend = None
+
+
+def default_backend() -> str:
+    """
+    默认解析后端，可通过环境变量XMOL_PARSER指定
+    """
+    global _default_backend
+    if _default_backend is None:
+        available = available_backends()
+        wanted = os.getenv("XMOL_PARSER", "").strip()
+        if wanted and wanted not in available:
+            logger.warning(f"解析后端{wanted}不可用，可用后端: {available}")
+            wanted = ""
+        _default_backend = wanted or (available[0] if available else "html.parser")
+        logger.info(f"使用解析后端: {_default_backend}")
+    return _default_backend
+
+
+def _build_paper(item: tuple, baseurl: str) -> Paper:
+    title, journal, impact, info_text, href, abstract = item
+    doi_match = DOI_RE.search(info_text)
+    date_match = DATE_RE.search(info_text)
+    if href is None:
+        logger.warning("未找到URL元素")
+        href = ""
+    return Paper.create(
+        title=title.strip() if title else None,
+        journal=journal.strip() if journal else None,
+        impact=impact.strip() if impact else None,
+        pubdate=date_match.group(1).strip() if date_match else None,
+        doi=doi_match.group(1).strip() if doi_match else None,
+        url=baseurl + href.strip(),
+        abstract=abstract.strip() if abstract else None,
+    )
+
+
+def iter_result_page(html: str, baseurl: str, backend: str = None):
+    """
+    逐条解析搜索结果页，每解析出一篇文献即产出一次
+
+    返回:
+    Paper记录的生成器；未找到文献列表时返回None
+    """
+    backend = backend or default_backend()
+    fragment = _slice_results(html)
+    items = BACKENDS[backend](fragment) if fragment else None
+    if items is None:
+        return None
+    return (_build_paper(item, baseurl) for item in items)
+
+
+def parse_result_page(html: str, baseurl: str, backend: str = None):
+    """
+    解析搜索结果页
+
+    参数:
+    html: 结果页HTML
+    baseurl: 文献链接的前缀
+    backend: 解析后端，默认自动选择
+
+    返回:
+    Paper列表，或包含error的字典
+    """
+    papers = iter_result_page(html, baseurl, backend)
+    if papers is None:
+        logger.warning("未找到文献列表元素")
+        return {"error": "未找到文献列表"}
+    paper_all = list(papers)
+    if not paper_all:
+        logger.warning("文献列表为空")
+        return {"error": "文献列表为空"}
+
+    logger.info(f"成功获取文献: {len(paper_all)}篇")
+    return paper_all
+
+
+def parse_detail_page(html: str, url: str, backend: str = None):
+    """
+    解析文献详情页
+
+    参数:
+    html: 详情页HTML
+    url: 详情页地址，作为文献链接
+    backend: 解析后端，默认自动选择
+
+    返回:
+    包含作者和被引次数的Paper记录；不是详情页时返回None
+    """
+    backend = backend or default_backend()
+    fragment = _slice_results(html, DETAIL_CLASS)
+    fields = DETAIL_BACKENDS[backend](fragment) if fragment else None
+    if fields is None:
+        return None
+    title, journal, impact, info_text, authors, abstract, citation = fields
+    doi_match = DOI_RE.search(info_text)
+    date_match = DATE_RE.search(info_text)
+    citation_match = CITATION_RE.search(citation) if citation else None
+    return Paper.create(
+        title=title.strip() if title else None,
+        journal=journal.strip() if journal else None,
+        impact=impact.strip() if impact else None,
+        pubdate=date_match.group(1).strip() if date_match else None,
+        doi=doi_match.group(1).strip() if doi_match else None,
+        url=url,
+        abstract=abstract.strip() if abstract else None,
+        authors=[author.strip() for author in authors if author.strip()],
+        citations=citation_match.group(1) if citation_match else None,
+    )
@@ -0,0 +1,224 @@
+"""
+XMol 请求限速模块
+
+基于令牌桶实现进程内共享的限速器，支持全局速率、按主机速率和按会话（账号）速率；
+多进程部署时令牌桶状态可保存在SQLite中，各工作进程共用同一份上游请求预算
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .metrics import RATE_LIMIT_WAIT_SECONDS
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.ratelimit")
+
+
+class TokenBucket():
+    """
+    令牌桶
+    rate为每秒补充的令牌数，burst为桶容量。令牌不足时允许预支，
+    调用方按返回的等待时间排队，从而保证先到先得
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self, now: float = None) -> float:
+        """
+        预订一个令牌，返回需要等待的秒数（0表示立即可用）
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class SharedTokenBucket():
+    """
+    跨进程共享的令牌桶，状态保存在SQLite（WAL模式）的一行中，每次预订在一个写事务内完成；
+    进程间没有共同的单调时钟，因此使用系统时间
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock, key: str, rate: float, burst: float):
+        self._conn = conn
+        self._lock = lock
+        self.key = key
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+    def reserve(self, now: float = None) -> float:
+        """
+        预订一个令牌，返回需要等待的秒数；now为调用方的单调时钟，共享桶不使用
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (self.key,)).fetchone()
+                tokens, updated = row if row else (self.burst, now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate) - 1
+                self._conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                                   (self.key, tokens, max(now, updated)))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+
+class RateLimiter():
+    """
+    限速器
+    所有请求先经过全局令牌桶，如配置了按主机速率，再经过对应主机的令牌桶；
+    如配置了按会话速率，带会话名的请求还要经过该会话的令牌桶，总吞吐随会话数增加。
+    指定shared_path时各令牌桶保存在该SQLite文件中，使用同一文件的所有进程共享速率
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4.0, host_rate: float = 0.0, host_burst: float = 0.0,
+                 session_rate: float = 0.0, session_burst: float = 0.0, shared_path=None):
+        self.rate = rate
+        self.burst = burst
+        self.host_rate = host_rate
+        self.host_burst = host_burst or burst
+        self.session_rate = session_rate
+        self.session_burst = session_burst or burst
+        self.shared_path = shared_path
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        if shared_path is not None:
+            Path(shared_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(shared_path), check_same_thread=False, isolation_level=None,
+                                         timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                               "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        self._global = self._bucket("global", rate, burst) if rate > 0 else None
+        self._hosts = {}
+        self._sessions = {}
+
+        # 指标
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.last_wait = 0.0
+
+    def _bucket(self, key: str, rate: float, burst: float):
+        if self._conn is not None:
+            return SharedTokenBucket(self._conn, self._conn_lock, key, rate, burst)
+        return TokenBucket(rate, burst)
+
+    def _host_bucket(self, host: str):
+        if self.host_rate <= 0 or not host:
+            return None
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            bucket = self._hosts[host] = self._bucket(f"host:{host}", self.host_rate, self.host_burst)
+        return bucket
+
+    def _session_bucket(self, session: str):
+        if self.session_rate <= 0 or not session:
+            return None
+        bucket = self._sessions.get(session)
+        if bucket is None:
+            bucket = self._sessions[session] = self._bucket(f"session:{session}", self.session_rate,
+                                                            self.session_burst)
+        return bucket
+
+    def reserve(self, host: str = None, session: str = None) -> float:
+        """
+        同时在全局、主机和会话令牌桶中预订令牌，返回需要等待的秒数
+        """
+        now = time.monotonic()
+        wait = 0.0
+        for bucket in (self._global, self._host_bucket(host), self._session_bucket(session)):
+            if bucket is not None:
+                wait = max(wait, bucket.reserve(now))
+        return wait
+
+    async def acquire(self, host: str = None, session: str = None) -> float:
+        """
+        获取一次请求许可；预算充足时立即返回，否则异步排队等待，不阻塞事件循环。
+        共享令牌桶的预订需要跨进程的写锁，在线程中完成
+        """
+        if self._conn is not None:
+            wait = await asyncio.to_thread(self.reserve, host, session)
+        else:
+            wait = self.reserve(host, session)
+        self.acquired += 1
+        self.last_wait = wait
+        RATE_LIMIT_WAIT_SECONDS.observe(max(wait, 0.0))
+        if wait <= 0:
+            return 0.0
+
+        self.waited += 1
+        self.total_wait += wait
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        logger.debug(f"限速排队: host={host}, 等待{wait:.3f}秒, 队列深度{self.queue_depth}")
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self.queue_depth -= 1
+        return wait
+
+    def metrics(self) -> dict:
+        """
+        返回限速器指标
+        """
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "host_rate": self.host_rate,
+            "host_burst": self.host_burst,
+            "session_rate": self.session_rate,
+            "session_burst": self.session_burst,
+            "shared": str(self.shared_path) if self.shared_path is not None else None,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "total_wait_seconds": round(self.total_wait, 6),
+            "avg_wait_seconds": round(self.total_wait / self.waited, 6) if self.waited else 0.0,
+            "last_wait_seconds": round(self.last_wait, 6),
+        }
+
+
+_shared_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    获取进程内共享的限速器，速率可通过环境变量配置；设置XMOL_RATE_LIMIT_DB时与使用同一文件的其他进程共享速率
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter(
+            rate=float(os.getenv("XMOL_RATE", "2")),
+            burst=float(os.getenv("XMOL_BURST", "4")),
+            host_rate=float(os.getenv("XMOL_HOST_RATE", "0")),
+            host_burst=float(os.getenv("XMOL_HOST_BURST", "0")),
+            session_rate=float(os.getenv("XMOL_SESSION_RATE", "0")),
+            session_burst=float(os.getenv("XMOL_SESSION_BURST", "0")),
+            shared_path=os.getenv("XMOL_RATE_LIMIT_DB") or None,
+        )
+    return _shared_limiter
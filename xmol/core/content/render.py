@@ -0,0 +1,149 @@
+"""
+XMol 输出渲染模块
+
+模板在导入时绑定为str.format，输出用join拼接；每篇文献渲染好的Markdown/JSON片段缓存在记录上，
+同一文献再次列出时直接复用。支持markdown和紧凑的json两种输出格式
+"""
+
+import functools
+import json
+
+from .metrics import STAGE_SECONDS
+from .paper import Paper
+
+
+FORMATS = ("markdown", "json")
+
+DETAIL_HINT = "\n请继续使用 `get_literature_detail` 工具获取特定文献的详细信息，提供DOI作为参数。"
+
+
+# 模板为str.format的绑定方法，按关键字参数渲染，字段中的{p.title}等在渲染时取属性
+PAPER_MARKDOWN = (
+    "**{p.title}**\n"
+    "   - 期刊: {p.journal}\n"
+    "   - 影响因子: {p.impact_text}\n"
+    "   - 发布日期: {p.pubdate_text}\n"
+    "   - DOI: {p.doi}\n"
+    "   - [文献链接]({p.url})\n"
+).format
+PAPER_LINE = "{i}. {p.title} | {p.journal} | IF {p.impact_text} | {p.pubdate_text} | DOI: {p.doi}".format
+DETAIL_HEAD = "### {p.title}\n\n**DOI**: {doi}\n\n".format
+DETAIL_AUTHORS = "**作者**: {authors}\n\n".format
+DETAIL_META = "**期刊**: {p.journal}\n\n**发布日期**: {p.pubdate_text}\n\n**影响因子**: {p.impact_text}\n\n".format
+DETAIL_CITATIONS = "**被引次数**: {p.citations}\n\n".format
+DETAIL_TAIL = "**摘要**: {p.abstract}\n\n**链接**: [{doi}]({p.url})".format
+ERROR_MARKDOWN = "### {title}\n\n{error}\n\n{suggestion}".format
+GROUPS_MARKDOWN = "   - 命中关键词组: {groups}\n\n".format
+FAILED_GROUP_MARKDOWN = "- {keywords} (第{page}页): {error}\n".format
+
+
+def _timed(fn):
+    """
+    记录渲染耗时
+    """
+    stage = STAGE_SECONDS.labels(stage="render")
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage.time():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def paper_markdown(paper: Paper) -> str:
+    """
+    单篇文献的Markdown片段（不含序号），首次渲染后缓存在记录上
+    """
+    fragment = paper._markdown
+    if fragment is None:
+        fragment = paper._markdown = PAPER_MARKDOWN(p=paper)
+    return fragment
+
+
+def paper_json(paper: Paper, **extra) -> str:
+    """
+    单篇文献的紧凑JSON片段，首次渲染后缓存在记录上；extra中的键追加到对象末尾
+    """
+    fragment = paper._json
+    if fragment is None:
+        fragment = paper._json = _dumps(paper.to_dict())
+    if extra:
+        return fragment[:-1] + "," + _dumps(extra)[1:]
+    return fragment
+
+
+def paper_line(index: int, paper: Paper) -> str:
+    """
+    单篇文献的单行摘要，用于流式推送
+    """
+    return PAPER_LINE(i=index, p=paper)
+
+
+def render_error(error: dict, output_format: str = "markdown", title: str = "搜索错误") -> str:
+    if output_format == "json":
+        return _dumps(error)
+    return ERROR_MARKDOWN(title=title, error=error.get("error", ""), suggestion=error.get("suggestion", ""))
+
+
+@_timed
+def render_papers(papers, output_format: str = "markdown", title: str = "搜索结果") -> str:
+    """
+    渲染文献列表；papers为包含error的字典时渲染错误信息
+    """
+    if isinstance(papers, dict):
+        return render_error(papers, output_format)
+    if output_format == "json":
+        return "".join(['{"results":[', ",".join(map(paper_json, papers)), '],"count":', str(len(papers)), "}"])
+    parts = [f"### {title}\n\n"]
+    for i, paper in enumerate(papers, 1):
+        parts += (str(i), ". ", paper_markdown(paper), "\n")
+    parts.append(DETAIL_HINT)
+    return "".join(parts)
+
+
+@_timed
+def render_batch(results: list, errors: list, output_format: str = "markdown") -> str:
+    """
+    渲染批量搜索结果
+
+    参数:
+    results: [(文献, 命中的关键词组列表), ...]
+    errors: 未返回结果的关键词组 [{"keywords", "page", "error"}, ...]
+    """
+    if output_format == "json":
+        return "".join([
+            '{"results":[', ",".join(paper_json(paper, groups=groups) for paper, groups in results),
+            '],"errors":', _dumps(errors), "}",
+        ])
+    parts = [f"### 批量搜索结果（去重后共{len(results)}篇）\n\n"]
+    for i, (paper, groups) in enumerate(results, 1):
+        parts += (str(i), ". ", paper_markdown(paper),
+                  GROUPS_MARKDOWN(groups="；".join(", ".join(group) for group in groups)))
+    if errors:
+        parts.append("#### 未返回结果的关键词组\n\n")
+        parts += (FAILED_GROUP_MARKDOWN(keywords=", ".join(error["keywords"]), page=error["page"],
+                                        error=error["error"])
+                  for error in errors)
+    parts.append(DETAIL_HINT)
+    return "".join(parts)
+
+
+@_timed
+def render_detail(doi: str, paper: Paper, output_format: str = "markdown") -> str:
+    """
+    渲染文献详情
+    """
+    if output_format == "json":
+        return paper_json(paper)
+    parts = [DETAIL_HEAD(doi=doi, p=paper)]
+    if paper.authors:
+        parts.append(DETAIL_AUTHORS(authors=", ".join(paper.authors)))
+    parts.append(DETAIL_META(p=paper))
+    if paper.citations is not None:
+        parts.append(DETAIL_CITATIONS(p=paper))
+    parts.append(DETAIL_TAIL(doi=doi, p=paper))
+    return "".join(parts)
@@ -0,0 +1,162 @@
+"""
+XMol 搜索结果缓存模块
+
+以规范化的查询为键缓存搜索结果，支持过期后后台刷新(stale-while-revalidate)
+和相同查询的并发合并
+"""
+
+import asyncio
+import logging
+import time
+
+from .coalesce import SingleFlight
+from .paper import Paper
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.search_cache")
+
+
+def search_key(keywords: list, impact, lang: str, sort: str, page: int, filters: str = "") -> str:
+    """
+    生成搜索缓存键
+    关键词去重、去空白、忽略大小写和顺序（X-MOL对关键词取AND）；
+    filters为过滤条件的键片段（SearchFilter.key()），为空时与不带过滤条件的键一致
+    """
+    terms = sorted({str(keyword).strip().casefold() for keyword in keywords if str(keyword).strip()})
+    parts = [
+        "\x1e".join(terms),
+        str(impact).strip(),
+        (lang or "").strip().lower(),
+        (sort or "").strip(),
+        str(int(page)),
+    ]
+    if filters:
+        parts.append(filters)
+    return "\x1f".join(parts)
+
+
+def encode_entry(entry: dict) -> dict:
+    """
+    缓存条目转换为可JSON序列化的字典
+    """
+    return {"value": [paper.to_dict() for paper in entry["value"]], "fetched": entry["fetched"]}
+
+
+def decode_entry(data: dict) -> dict:
+    """
+    从JSON恢复缓存条目
+    """
+    return {"value": [Paper.from_dict(item) for item in data["value"]], "fetched": data["fetched"]}
+
+
+class SearchCache():
+    """
+    搜索结果缓存
+
+    ttl内的结果直接返回；超过ttl但在stale_ttl窗口内的结果先返回旧值，
+    同时在后台刷新；更旧的结果同步重新获取。出错的结果不会被缓存。
+    重新获取失败（上游超时、熔断等）时，仍保留在fallback_ttl窗口内的旧结果会作为兜底返回
+    """
+
+    def __init__(self, store, ttl: float = 600.0, stale_ttl: float = 3600.0, fallback_ttl: float = 86400.0):
+        self.store = store  # 需提供aget/aset(key, value, ttl)，例如使用encode_entry/decode_entry的TieredCache
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fallback_ttl = fallback_ttl
+        self.flight = SingleFlight()
+        self._background = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _is_error(value) -> bool:
+        return isinstance(value, dict) and bool(value.get("error"))
+
+    async def _fetch_and_store(self, key: str, fetch):
+        value = await fetch()
+        if value and not self._is_error(value):
+            await self.store.aset(key, {"value": value, "fetched": time.time()},
+                                  ttl=self.ttl + max(self.stale_ttl, self.fallback_ttl))
+        return value
+
+    def _refresh(self, key: str, fetch) -> None:
+        """
+        后台刷新，已有相同刷新在执行时跳过
+        """
+        if self.flight.in_flight(key):
+            return
+        self.refreshes += 1
+        task = asyncio.ensure_future(self.flight.do(key, lambda: self._fetch_and_store(key, fetch)))
+        self._background.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"后台刷新搜索结果失败: {task.exception()!r}")
+
+    async def refresh(self, key: str, fetch):
+        """
+        不论缓存是否新鲜都重新获取并写入缓存，供热门查询预热使用；相同查询正在获取时合并到该请求
+        """
+        self.refreshes += 1
+        return await self.flight.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    async def peek(self, key: str, reload: bool = False):
+        """
+        不触发获取，返回缓存条目(值, 已缓存秒数)或None；reload为True时跳过内存层重新读取持久层
+        """
+        entry = await (self.store.areload(key) if reload else self.store.aget(key))
+        if entry is None:
+            return None
+        return entry["value"], time.time() - entry["fetched"]
+
+    async def get_or_fetch(self, key: str, fetch):
+        """
+        获取缓存结果，必要时调用fetch()获取
+        fetch为无参协程函数，返回文献列表或错误字典
+        """
+        entry = await self.peek(key)
+        if entry is not None and entry[1] >= self.ttl and hasattr(self.store, "areload"):
+            # 多进程共享持久层时，其他进程（例如运行预热的进程）可能已写入更新的结果
+            entry = await self.peek(key, reload=True) or entry
+        if entry is not None:
+            value, age = entry
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, fetch)
+                return value
+            if age >= self.ttl + self.fallback_ttl:
+                entry = None
+        self.misses += 1
+        try:
+            value = await self.flight.do(key, lambda: self._fetch_and_store(key, fetch))
+        except Exception as e:
+            if entry is None:
+                raise
+            value = {"error": str(e)}
+        if entry is not None and self._is_error(value):
+            # 上游不可用时返回旧结果，比直接报错更有用
+            self.fallbacks += 1
+            logger.warning(f"获取搜索结果失败({value['error']})，返回{entry[1]:.0f}秒前的缓存结果")
+            return entry[0]
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+            "refreshes": self.refreshes,
+            "fallbacks": self.fallbacks,
+            "single_flight": self.flight.stats(),
+        }
@@ -0,0 +1,225 @@
+"""
+XMol 会话池模块
+
+加载多个X-MOL账号的Cookie（只解析一次），按最少并发或轮询分派请求，
+记录每个会话的请求数、错误数和延迟；搜索被重定向且没有searchLogId的会话（Cookie失效）会被隔离一段时间
+"""
+
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.session")
+
+# 需要发送给X-MOL的Cookie键
+COOKIE_KEYS = ("UM_distinctid", "atk0210", "rtk0210")
+
+STRATEGIES = ("least_loaded", "round_robin")
+
+# 连续被隔离时隔离时长翻倍的上限倍数
+MAX_QUARANTINE_FACTOR = 8
+
+
+def parse_cookie(ck: str) -> dict:
+    """
+    将Cookie字符串转换为字典，只保留X-MOL需要的键
+    """
+    ck_dic = {}
+    for cookie in (ck or "").split(";"):
+        try:
+            key, value = cookie.strip().split("=", 1)
+            if key in COOKIE_KEYS:
+                ck_dic[key.strip()] = value.strip()
+        except ValueError:
+            logger.warning(f"无法解析Cookie部分: {cookie}")
+    return ck_dic
+
+
+def load_cookies(environ=None) -> list:
+    """
+    从环境变量读取Cookie列表：Cookie，以及Cookie_1、Cookie_2...（按编号排序），忽略空值和重复值
+    """
+    environ = os.environ if environ is None else environ
+    numbered = sorted(
+        (int(match.group(1)), value) for key, value in environ.items()
+        if (match := re.fullmatch(r"Cookie_(\d+)", key))
+    )
+    values = [environ.get("Cookie", "")] + [value for _, value in numbered]
+    return list(dict.fromkeys(value.strip() for value in values if value and value.strip()))
+
+
+class Session():
+    """
+    单个账号会话及其健康统计
+    """
+
+    def __init__(self, name: str, cookie: str):
+        self.name = name
+        self.cookies = parse_cookie(cookie)
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.last_error = None
+        self.strikes = 0  # 连续被隔离的次数
+        self.quarantined_until = 0.0
+        self.quarantines = 0
+
+    def available(self, now: float = None) -> bool:
+        return (time.monotonic() if now is None else now) >= self.quarantined_until
+
+    def record(self, latency: float, error: str = None) -> None:
+        self.requests += 1
+        self.total_latency += latency
+        if error:
+            self.errors += 1
+            self.last_error = error
+        else:
+            self.strikes = 0
+
+    def stats(self, now: float = None) -> dict:
+        now = time.monotonic() if now is None else now
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.total_latency / self.requests * 1000, 3) if self.requests else 0.0,
+            "quarantined": not self.available(now),
+            "quarantine_remaining_seconds": round(max(0.0, self.quarantined_until - now), 3),
+            "quarantines": self.quarantines,
+            "last_error": self.last_error,
+        }
+
+
+class SessionPool():
+    """
+    会话池
+
+    参数:
+    cookies: Cookie字符串列表，每个对应一个账号会话
+    strategy: 'least_loaded'选择当前并发最少的会话（并发相同时轮流），'round_robin'依次轮询
+    quarantine: Cookie失效时的隔离秒数，连续失效时翻倍，最多为8倍
+    """
+
+    def __init__(self, cookies: list, strategy: str = "least_loaded", quarantine: float = 300.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"不支持的会话分派策略: {strategy}")
+        self.strategy = strategy
+        self.quarantine_seconds = quarantine
+        self.sessions = [Session(f"session-{i + 1}", cookie) for i, cookie in enumerate(cookies)]
+        self._pinned = {}  # 调用方直接提供的Cookie -> Session，不参与轮换
+        self._next = 0
+        self.exhausted = 0  # 全部会话都在隔离中时仍需分派的次数
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __bool__(self) -> bool:
+        return bool(self.sessions)
+
+    def pin(self, ck: str) -> Session:
+        """
+        获取指定Cookie对应的会话；与池中会话相同时复用，否则单独创建并缓存，只解析一次
+        """
+        session = self._pinned.get(ck)
+        if session is None:
+            cookies = parse_cookie(ck)
+            session = next((item for item in self.sessions if item.cookies == cookies), None)
+            if session is None:
+                session = Session(f"pinned-{len(self._pinned) + 1}", ck)
+            self._pinned[ck] = session
+        return session
+
+    def acquire(self, exclude=()) -> Session:
+        """
+        选择一个会话；全部处于隔离期时选择最早解除隔离的会话，不让请求直接失败
+        """
+        if not self.sessions:
+            raise RuntimeError("会话池中没有可用的Cookie")
+        now = time.monotonic()
+        count = len(self.sessions)
+        order = [self.sessions[(self._next + i) % count] for i in range(count)]
+        candidates = [session for session in order if session.available(now) and session not in exclude]
+        if not candidates:
+            self.exhausted += 1
+            session = min([session for session in order if session not in exclude] or order,
+                          key=lambda session: session.quarantined_until)
+            logger.warning(f"所有会话均处于隔离期，使用{session.name}")
+        elif self.strategy == "least_loaded":
+            session = min(candidates, key=lambda session: session.in_flight)
+        else:
+            session = candidates[0]
+        self._next = (self.sessions.index(session) + 1) % count
+        return session
+
+    @asynccontextmanager
+    async def lease(self, ck: str = None, exclude=()):
+        """
+        租用一个会话，统计并发数和延迟；代码块抛出异常时记为错误
+
+        用法:
+            async with pool.lease() as session:
+                ...
+        """
+        session = self.pin(ck) if ck else self.acquire(exclude)
+        session.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield session
+        except Exception as e:
+            session.record(time.perf_counter() - start, str(e) or type(e).__name__)
+            raise
+        else:
+            session.record(time.perf_counter() - start)
+        finally:
+            session.in_flight -= 1
+
+    def quarantine(self, session: Session, reason: str) -> None:
+        """
+        隔离会话，连续失效时隔离时长翻倍；已在隔离期的会话不重复计数
+        """
+        if not session.available():
+            return
+        factor = min(2 ** session.strikes, MAX_QUARANTINE_FACTOR)
+        session.strikes += 1
+        session.quarantines += 1
+        session.last_error = reason
+        session.quarantined_until = time.monotonic() + self.quarantine_seconds * factor
+        logger.warning(f"会话{session.name}已隔离{self.quarantine_seconds * factor:.0f}秒: {reason}")
+
+    def available_count(self) -> int:
+        now = time.monotonic()
+        return sum(session.available(now) for session in self.sessions)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "sessions": len(self.sessions),
+            "available": self.available_count(),
+            "exhausted": self.exhausted,
+            "per_session": {session.name: session.stats(now) for session in self.sessions},
+            "pinned": {session.name: session.stats(now) for session in self._pinned.values()
+                       if session not in self.sessions},
+        }
+
+
+_shared_pool = None
+
+
+def get_session_pool() -> SessionPool:
+    """
+    获取进程内共享的会话池，Cookie和分派策略通过环境变量配置
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SessionPool(
+            load_cookies(),
+            strategy=os.getenv("XMOL_SESSION_STRATEGY", "least_loaded"),
+            quarantine=float(os.getenv("XMOL_SESSION_QUARANTINE", "300")),
+        )
+    return _shared_pool
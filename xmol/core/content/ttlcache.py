@@ -0,0 +1,58 @@
+"""
+XMol 内存TTL缓存模块
+"""
+
+import time
+from collections import OrderedDict
+
+
+class TTLCache():
+    """
+    带过期时间和容量上限的内存缓存
+    超出容量时淘汰最久未使用的条目
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        获取未过期的值，过期条目会被删除
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        写入缓存，ttl为空时使用默认过期时间
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """
+        删除并返回条目
+        """
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,166 @@
+"""
+XMol 热门查询预热模块
+
+统计search_title_by_keywords的规范化查询频次（按半衰期衰减，近期的查询权重更高），
+定时在后台重新获取最热门查询的第一页，写入搜索结果缓存和文献缓存，交互调用因此大多直接命中新鲜的缓存。
+预热只使用空闲的上游配额：限速器有排队或熔断器打开时本轮停止
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+
+# 获取日志记录器
+logger = logging.getLogger("文献检索助手.warmer")
+
+
+class CacheWarmer():
+    """
+    热门查询的后台预热
+
+    参数:
+    refresh: 异步函数refresh(query)，重新获取查询的第一页并写入缓存
+    age: 异步函数age(key)，返回该查询第一页缓存的已缓存秒数，未缓存时返回None
+    busy: 函数busy()，上游配额正被交互调用占用或不可用时返回True
+    interval: 预热周期(秒)，0表示不预热
+    top: 每轮最多预热的查询数
+    min_hits: 查询次数达到该值才参与预热
+    half_life: 频次衰减的半衰期(秒)
+    refresh_after: 缓存结果超过该秒数才重新获取，通常为搜索缓存ttl减去interval，保证下一轮之前不会过期
+    max_tracked: 统计的查询数上限，超出时移除频次最低的一半
+    """
+
+    def __init__(self, refresh, age, busy=None, interval: float = 300.0, top: int = 20, min_hits: int = 2,
+                 half_life: float = 3600.0, refresh_after: float = 0.0, max_tracked: int = 1000):
+        self.refresh = refresh
+        self.age = age
+        self.busy = busy or (lambda: False)
+        self.interval = interval
+        self.top = top
+        self.min_hits = min_hits
+        self.half_life = half_life
+        self.refresh_after = refresh_after
+        self.max_tracked = max_tracked
+        self._queries = {}  # key -> [衰减后频次, 最后更新时间, 查询参数, 查询次数]
+        self._task = None
+
+        # 统计
+        self.cycles = 0
+        self.refreshed = 0
+        self.skipped_fresh = 0
+        self.skipped_busy = 0
+        self.errors = 0
+        self.last_cycle = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and self.top > 0
+
+    def _score(self, entry: list, now: float) -> float:
+        if self.half_life <= 0:
+            return entry[0]
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def record(self, key: str, query: dict) -> None:
+        """
+        记录一次查询；key为第一页的搜索缓存键，query为重新获取时使用的参数。首次记录时启动后台预热
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        entry = self._queries.get(key)
+        if entry is None:
+            if len(self._queries) >= self.max_tracked:
+                self._evict(now)
+            self._queries[key] = [1.0, now, query, 1]
+        else:
+            entry[0] = self._score(entry, now) + 1.0
+            entry[1] = now
+            entry[3] += 1
+        self.ensure_started()
+
+    def _evict(self, now: float) -> None:
+        ranked = sorted(self._queries, key=lambda key: self._score(self._queries[key], now))
+        for key in ranked[:len(ranked) // 2 or 1]:
+            del self._queries[key]
+
+    def hot(self, n: int = None) -> list:
+        """
+        返回频次最高的n个查询[(key, 衰减后频次, 查询参数), ...]，只包含达到min_hits的查询
+        """
+        now = time.time()
+        scored = ((self._score(entry, now), key, entry[2]) for key, entry in self._queries.items()
+                  if entry[3] >= self.min_hits)
+        ranked = heapq.nlargest(n or self.top, scored, key=lambda item: item[0])
+        return [(key, score, query) for score, key, query in ranked]
+
+    async def run_once(self) -> int:
+        """
+        预热一轮，返回重新获取的查询数
+        """
+        self.cycles += 1
+        self.last_cycle = time.time()
+        refreshed = 0
+        for key, score, query in self.hot():
+            age = await self.age(key)
+            if age is not None and age < self.refresh_after:
+                self.skipped_fresh += 1
+                continue
+            if self.busy():
+                # 交互调用优先，剩余的查询留到下一轮
+                self.skipped_busy += 1
+                break
+            try:
+                await self.refresh(query)
+                refreshed += 1
+                self.refreshed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"预热查询失败: {query.get('keywords')}: {str(e)}")
+        if refreshed:
+            logger.info(f"已预热{refreshed}个热门查询")
+        return refreshed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"预热热门查询时出错: {str(e)}")
+
+    def ensure_started(self) -> None:
+        """
+        在当前事件循环中启动后台预热；已在运行时不重复启动
+        """
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+            logger.info(f"热门查询预热已启动，周期{self.interval:.0f}秒，每轮最多{self.top}个查询")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "tracked": len(self._queries),
+            "hot": [{"keywords": query.get("keywords"), "score": round(score, 2)}
+                    for _, score, query in self.hot(5)],
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "skipped_fresh": self.skipped_fresh,
+            "skipped_busy": self.skipped_busy,
+            "errors": self.errors,
+            "last_cycle": self.last_cycle,
+        }
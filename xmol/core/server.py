@@ -5,40 +5,61 @@ XMol MCP服务器
 """
 
 from mcp.server.fastmcp import FastMCP, Context
-from core.content import get_content
+from .content import (get_content, get_rate_limiter, create_cache, SearchCache, search_key, Paper,
+                          encode_entry, decode_entry, PaperIndex, looks_like_doi, paper_json, paper_line,
+                          render_batch, render_detail, render_error, render_papers, SearchFilter, rank_papers,
+                          get_session_pool, Lazy, load_all, warm_in_background, CacheWarmer)
+from mcp_common.admission import AdmissionControl, ToolLimits, install_metadata
+from mcp_common.metrics import REGISTRY, instrument_tool, run_sse
 from dotenv import load_dotenv
 import os
 import sys
 from typing import List, Dict, Any, Optional
 import logging
 import traceback
-import json
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("文献检索助手")
 
-# 文献缓存目录
-CACHE_DIR = Path("./cache")
-CACHE_DIR.mkdir(exist_ok=True)
-
 # 加载环境变量
 load_dotenv()
 
+# 文献缓存目录，默认为工作目录下的cache，首次打开缓存时创建
+CACHE_DIR = Path(os.getenv("XMOL_CACHE_DIR", "./cache"))
+
+# 握手后开始后台初始化前的等待时间(秒)，为负数时不在后台初始化，首次使用时再初始化
+WARMUP_DELAY = float(os.getenv("XMOL_WARMUP_DELAY", "0.2"))
+
 # 获取环境变量
-cookie = os.getenv('Cookie', "")
 impact = os.getenv('Impact', "8")
 lang = os.getenv('lang', "zh")
 
+# 账号会话池：Cookie以及Cookie_1、Cookie_2...中的每个Cookie对应一个会话
+session_pool = get_session_pool()
+
 
 # 检查必要的配置
-if not cookie:
+if not session_pool:
     logger.error("错误：请在.env文件中设置Cookie")
     sys.exit(1)
+logger.info(f"已加载{len(session_pool)}个账号会话，分派策略: {session_pool.strategy}")
+
+# 文献获取工具：请求引擎和解析后端在首次使用时初始化
+content_tool = Lazy(get_content, "文献获取工具")
+
+
+@asynccontextmanager
+async def _lifespan(server):
+    """会话开始后在后台完成缓存预热和建立索引，不阻塞initialize的响应"""
+    if WARMUP_DELAY >= 0:
+        _start_warmup()
+    yield {}
 
-# 初始化文献获取工具
-content_tool = get_content()
 
 # 创建MCP服务器 - 从环境变量获取配置
 mcp = FastMCP(
@@ -47,11 +68,196 @@ mcp = FastMCP(
     port=int(os.getenv("FASTMCP_port", "8000")),
     sse_path=os.getenv("FASTMCP_sse_path", "/sse"),
     debug=os.getenv("FASTMCP_debug", "").lower() == "true",
-    log_level=os.getenv("FASTMCP_log_level", "INFO")
+    log_level=os.getenv("FASTMCP_log_level", "INFO"),
+    lifespan=_lifespan,
+)
+
+# 批量搜索的关键词组数上限，以及单次调用可获取的页数上限
+MAX_BATCH_GROUPS = 8
+MAX_PAGE_COUNT = 5
+
+# 按文献数获取时的上限，以及后台预取的页数
+MAX_RESULTS = 200
+MAX_RESULT_PAGES = 10
+READ_AHEAD = int(os.getenv("XMOL_READ_AHEAD", "2"))
+
+# 本地检索单次返回的文献数上限
+MAX_LOCAL_RESULTS = 50
+
+def _busy(tool: str, kwargs: dict, shed) -> str:
+    """准入控制拒绝调用时的返回内容，格式与工具的其他错误一致"""
+    return render_error({
+        "error": f"服务繁忙（{shed}），{tool}暂时无法处理",
+        "suggestion": f"请在{shed.retry_after:g}秒后重试",
+        "retry_after": shed.retry_after,
+    }, kwargs.get("output_format", "markdown"), title="服务繁忙")
+
+
+# 准入控制：按工具限制并发，超出的调用在有界队列中排队；队列已满、预计或实际排队超时的调用立即返回繁忙，
+# 各工具的参数可通过XMOL_ADMISSION_<工具名大写>_CONCURRENCY/QUEUE/TIMEOUT调整
+admission = AdmissionControl(
+    "xmol",
+    on_busy=_busy,
+    env_prefix="XMOL_ADMISSION",
+    limits={
+        "search_title_by_keywords": ToolLimits(concurrency=16, queue=64, timeout=10.0),
+        "batch_search_by_keywords": ToolLimits(concurrency=4, queue=16, timeout=20.0),
+        "get_literature_detail": ToolLimits(concurrency=16, queue=64, timeout=10.0),
+        # 本地检索不访问上游，毫秒级返回，不限制
+        "search_local_literature": ToolLimits(concurrency=0),
+    },
 )
 
-# 文献缓存
-literature_cache = {}
+# 工具响应的_meta.admission中返回排队时间和准入结果
+install_metadata(mcp)
+
+# 搜索结果缓存的新鲜期(秒)
+SEARCH_CACHE_TTL = float(os.getenv("XMOL_SEARCH_CACHE_TTL", "600"))
+
+# 热门查询预热周期(秒)，0表示不预热；多进程模式下只有0号工作进程预热，
+# 其他进程的搜索结果缓存与其共享，不必重复请求同一批热门查询
+WARMER_INTERVAL = float(os.getenv("XMOL_WARMER_INTERVAL", "300")) if os.getenv("MCP_WORKER_ID", "0") == "0" else 0.0
+
+# 以下缓存和索引均在首次使用或后台初始化时才打开持久层、预热和建立索引
+
+# 文献缓存：内存LRU层 + 持久层，重启后从持久层预热
+literature_cache = Lazy(lambda: create_cache(
+    "literature",
+    CACHE_DIR,
+    backend=os.getenv("XMOL_CACHE_BACKEND", "sqlite"),
+    max_entries=int(os.getenv("XMOL_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("XMOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("XMOL_CACHE_TTL", str(7 * 24 * 3600))),
+    encode=Paper.to_dict,
+    decode=Paper.from_dict,
+), "文献缓存")
+
+# 文献详情缓存：详情页内容很少变化，使用较长的过期时间
+detail_cache = Lazy(lambda: create_cache(
+    "detail",
+    CACHE_DIR,
+    backend=os.getenv("XMOL_CACHE_BACKEND", "sqlite"),
+    max_entries=int(os.getenv("XMOL_DETAIL_CACHE_MAX_ENTRIES", "2000")),
+    ttl=float(os.getenv("XMOL_DETAIL_CACHE_TTL", str(30 * 24 * 3600))),
+    encode=Paper.to_dict,
+    decode=Paper.from_dict,
+), "文献详情缓存")
+
+# 搜索结果缓存：相同查询在ttl内直接返回，过期后先返回旧结果并在后台刷新；上游不可用时以更旧的结果兜底
+search_cache = Lazy(lambda: SearchCache(
+    create_cache(
+        "search",
+        CACHE_DIR,
+        backend=os.getenv("XMOL_CACHE_BACKEND", "sqlite"),
+        max_entries=int(os.getenv("XMOL_SEARCH_CACHE_MAX_ENTRIES", "2000")),
+        encode=encode_entry,
+        decode=decode_entry,
+    ),
+    ttl=SEARCH_CACHE_TTL,
+    stale_ttl=float(os.getenv("XMOL_SEARCH_CACHE_STALE_TTL", "3600")),
+    fallback_ttl=float(os.getenv("XMOL_SEARCH_CACHE_FALLBACK_TTL", "86400")),
+), "搜索结果缓存")
+
+
+def _build_index() -> PaperIndex:
+    """从持久层加载已获取过的文献建立索引，详情记录在后，覆盖同一文献的简要记录"""
+    index = PaperIndex(max_docs=int(os.getenv("XMOL_INDEX_MAX_DOCS", "100000")))
+    start = time.perf_counter()
+    try:
+        for cache in (literature_cache, detail_cache):
+            index.add_many(reversed(cache.values(index.max_docs)))
+        logger.info(f"本地文献索引已建立: {len(index)}篇, 耗时{time.perf_counter() - start:.2f}秒")
+    except Exception as e:
+        logger.error(f"建立本地文献索引时出错: {str(e)}")
+    return index
+
+
+# 本地文献索引：覆盖所有获取过的文献，支持离线检索和DOI/标题的模糊定位
+paper_index = Lazy(_build_index, "本地文献索引")
+
+
+async def _warm_query(query: dict) -> None:
+    """重新获取热门查询的第一页，写入搜索结果缓存和文献缓存"""
+    await load_all(content_tool, search_cache, literature_cache, paper_index)
+    filters = query["filters"]
+    result = await search_cache.refresh(
+        search_key(query["keywords"], query["impact"], lang, query["sort"], 1, filters.key() if filters else ""),
+        lambda: content_tool.get_page_content(
+            keywordList=query["keywords"],
+            impact=query["impact"],
+            lang=lang,
+            pageindex=1,
+            searchSort=query["sort"],
+            filters=filters,
+        ),
+    )
+    if isinstance(result, dict) and result.get("error"):
+        raise RuntimeError(result["error"])
+    if result:
+        await _save_to_cache(result)
+
+
+async def _cached_age(key: str) -> Optional[float]:
+    if not search_cache.ready:
+        return None
+    entry = await search_cache.peek(key)
+    return entry[1] if entry is not None else None
+
+
+def _upstream_busy() -> bool:
+    """限速器有排队（交互调用正在使用配额）或上游熔断时不预热"""
+    breaker = content_tool.fetcher.breaker if content_tool.ready else None
+    return get_rate_limiter().queue_depth > 0 or (breaker is not None and breaker.state != "closed")
+
+
+# 热门查询预热：定时重新获取最常用查询的第一页，在缓存过期前刷新，交互调用直接命中缓存
+cache_warmer = CacheWarmer(
+    _warm_query,
+    _cached_age,
+    _upstream_busy,
+    interval=WARMER_INTERVAL,
+    top=int(os.getenv("XMOL_WARMER_TOP", "20")),
+    min_hits=int(os.getenv("XMOL_WARMER_MIN_HITS", "2")),
+    half_life=float(os.getenv("XMOL_WARMER_HALF_LIFE", "3600")),
+    refresh_after=max(0.0, SEARCH_CACHE_TTL - WARMER_INTERVAL),
+)
+
+
+def _start_warmup() -> None:
+    """后台依次初始化请求引擎、各缓存和本地索引；只启动一次"""
+    global _warmup
+    if _warmup is None:
+        _warmup = warm_in_background(content_tool, literature_cache, detail_cache, search_cache, paper_index,
+                                     delay=WARMUP_DELAY)
+
+
+_warmup = None
+
+
+def _cache_stat(field: str) -> dict:
+    # 指标采集不触发初始化，尚未初始化的缓存不输出
+    return {name: cache.stats()[field] for name, cache in
+            (("literature", literature_cache), ("detail", detail_cache), ("search", search_cache)) if cache.ready}
+
+
+# 已有的统计在采集指标时读取，不在热路径上重复计数
+REGISTRY.callback("xmol_cache_hits", "缓存命中数（搜索缓存含过期后先返回的旧结果）",
+                  lambda: {**_cache_stat("hits"),
+                           "search": search_cache.hits + search_cache.stale_hits if search_cache.ready else None},
+                  ("cache",), type="counter")
+REGISTRY.callback("xmol_cache_misses", "缓存未命中数", lambda: _cache_stat("misses"), ("cache",), type="counter")
+REGISTRY.callback("xmol_cache_hit_ratio", "缓存命中率", lambda: _cache_stat("hit_ratio"), ("cache",))
+REGISTRY.callback("xmol_search_cache_fallbacks", "上游不可用时以旧结果兜底的次数",
+                  lambda: search_cache.fallbacks if search_cache.ready else None, type="counter")
+REGISTRY.callback("xmol_rate_limit_queue_depth", "限速器当前排队数", lambda: get_rate_limiter().queue_depth)
+REGISTRY.callback("xmol_breaker_open", "上游熔断器是否处于熔断或半开状态",
+                  lambda: content_tool.fetcher.breaker is not None and content_tool.fetcher.breaker.state != "closed"
+                  if content_tool.ready else None)
+REGISTRY.callback("xmol_sessions_available", "未被隔离的账号会话数", lambda: session_pool.available_count())
+REGISTRY.callback("xmol_warmer_refreshes", "后台预热重新获取的热门查询数", lambda: cache_warmer.refreshed,
+                  type="counter")
+REGISTRY.callback("xmol_index_documents", "本地文献索引的文献数",
+                  lambda: len(paper_index) if paper_index.ready else None)
 
 
 # 定义自定义运行方法
@@ -62,8 +268,11 @@ def run(transport="stdio"):
         logger.info(f"运行SSE服务器，监听地址: {mcp.settings.host}:{mcp.settings.port}")
         logger.info(f"SSE路径: {mcp.settings.sse_path}")
         logger.info(f"消息路径: {mcp.settings.message_path}")
-    else:
-        logger.info("运行STDIO服务器")
+        logger.info("指标路径: /metrics")
+        # 与mcp.run("sse")相同，另外提供/metrics指标端点
+        run_sse(mcp)
+        return
+    logger.info("运行STDIO服务器")
     
     # 直接调用mcp的run方法
     mcp.run(transport=transport)
@@ -87,7 +296,9 @@ def system_prompt() -> str:
     - 当用户提出学术问题时，首先分析问题并提取1-3个关键词，使用3-5组关键词进行搜索
     - 每个关键词应该使用专业术语，不要使用通用术语，如果文献较少，则使用通用术语
     - 使用search_title_by_keywords工具搜索文献，它将返回文献标题列表
+    - 需要同时搜索多组关键词时，使用batch_search_by_keywords工具一次提交所有关键词组
     - 如果用户对某篇文献感兴趣，使用get_literature_detail工具获取详情
+    - 追问之前搜索过的文献时，先使用search_local_literature工具在本地检索，无需重新联网搜索
     - 根据文献内容回答用户问题，并提供专业见解
 
     注意事项:
@@ -98,66 +309,97 @@ def system_prompt() -> str:
     - 使用页码参数浏览更多搜索结果
     """
 
-def _save_to_cache(literature_list: List[Dict]) -> None:
-    """将文献保存到缓存中"""
+async def _save_to_cache(literature_list: List[Paper]) -> None:
+    """将文献保存到缓存中，持久层在线程中写入"""
     try:
-        for item in literature_list:
-            if 'doi' in item and item['doi'] != "未知DOI":
-                # 使用DOI作为唯一标识
-                # cache_file = CACHE_DIR / f"{item['doi'].replace('/', '_')}.json"
-                # with open(cache_file, 'w', encoding='utf-8') as f:
-                #     json.dump(item, f, ensure_ascii=False, indent=2)
-                # 同时保存到内存缓存
-                literature_cache[item['doi']] = item
-        logger.info(f"已缓存{len(literature_list)}篇文献")
+        # 使用DOI作为唯一标识
+        items = [(paper.doi, paper) for paper in literature_list if paper.has_doi]
+        await literature_cache.aset_many(items)
+        paper_index.add_many(literature_list)
+        logger.info(f"已缓存{len(items)}篇文献")
     except Exception as e:
         logger.error(f"缓存文献时出错: {str(e)}")
 
-def _get_from_cache(doi: str) -> Optional[Dict]:
-    """从缓存中获取文献"""
+async def _get_from_cache(doi: str, cache=literature_cache) -> Optional[Paper]:
+    """从缓存中获取文献，内存层未命中时在线程中查询持久层"""
     try:
-        # 先尝试从内存缓存获取
-        if doi in literature_cache:
-            return literature_cache[doi]
-            
-        # # 再尝试从文件缓存获取
-        # cache_file = CACHE_DIR / f"{doi.replace('/', '_')}.json"
-        # if cache_file.exists():
-        #     with open(cache_file, 'r', encoding='utf-8') as f:
-        #         data = json.load(f)
-        #         literature_cache[doi] = data  # 更新内存缓存
-        #         return data
-        return None
+        return await cache.aget(doi)
     except Exception as e:
         logger.error(f"从缓存获取文献时出错: {str(e)}")
         return None
 
-def _convert_to_markdown(literature_list: List[Dict]) -> str:
-    """将文献列表转换为Markdown格式"""
-    if isinstance(literature_list, dict) and literature_list.get('error'):
-        return f"### 搜索错误\n\n{literature_list['error']}\n\n{literature_list.get('suggestion', '')}"
-        
-    try:
-        markdown = "### 搜索结果\n\n"
-        
-        for i, paper in enumerate(literature_list):
-            doi = paper.get('doi', '未知DOI')
-            markdown += f"{i+1}. **{paper.get('title', '未知标题')}**\n"
-            markdown += f"   - 期刊: {paper.get('jounal', '未知期刊')}\n"
-            markdown += f"   - 影响因子: {paper.get('impact', '未知')}\n"
-            markdown += f"   - 发布日期: {paper.get('pubdata', '未知发布日期')}\n"
-            markdown += f"   - DOI: {doi}\n"
-            markdown += f"   - [文献链接]({paper.get('url', '#')})\n\n"
-            
-        markdown += "\n请继续使用 `get_literature_detail` 工具获取特定文献的详细信息，提供DOI作为参数。"
-        return markdown
-    except Exception as e:
-        logger.error(f"转换为Markdown时出错: {str(e)}")
-        return f"### 错误\n\n转换搜索结果时出错: {str(e)}"
+async def _search(keywords: List[str], impact_value: str, page_index: int, searchSort: str, on_paper=None,
+                  filters: SearchFilter = None):
+    """
+    搜索一页文献，优先使用搜索结果缓存，相同的并发查询只请求一次
+    filters提交给上游，缓存的是上游返回的整页结果，本地过滤由调用方完成
+
+    on_paper: 可选的异步回调，文献解析出来后逐篇回调；命中缓存或合并到其他请求时，
+    在结果返回后补齐回调，保证每篇文献恰好回调一次
+    """
+    emitted = 0
+
+    async def forward(paper):
+        nonlocal emitted
+        emitted += 1
+        try:
+            await on_paper(paper)
+        except Exception as e:
+            # 客户端断开等推送失败不能影响共享的上游请求
+            logger.debug(f"推送文献失败: {str(e)}")
+
+    result = await search_cache.get_or_fetch(
+        search_key(keywords, impact_value, lang, searchSort, page_index, filters.key() if filters else ""),
+        lambda: content_tool.get_page_content(
+            keywordList=keywords,
+            impact=impact_value,
+            lang=lang,
+            pageindex=page_index,
+            searchSort=searchSort,
+            on_paper=forward if on_paper is not None else None,
+            filters=filters,
+        ),
+    )
+    if on_paper is not None and isinstance(result, list):
+        for paper in result[emitted:]:
+            await forward(paper)
+    return result
 
+def _suggest_dois(doi: str, error: dict) -> dict:
+    """在未找到文献的错误中附上本地索引里相近的DOI，供调用方确认是否输错；不会自动替换"""
+    similar = paper_index.similar_dois(doi)
+    if not similar:
+        return error
+    hint = "\n".join(f"- {paper.doi} {paper.title}" for paper in similar)
+    return {**error, "suggestion": f"{error.get('suggestion', '')}\n\n您是否要找:\n{hint}".strip(),
+            "did_you_mean": [paper.doi for paper in similar]}
+
+def _merge_results(group_results: List[tuple]) -> List[tuple]:
+    """
+    合并多组关键词的搜索结果
+    按DOI去重（无DOI时按标题），排序依据：命中的关键词组数、在各组中的最佳名次、影响因子
+    返回[(文献, 命中的关键词组列表), ...]
+    """
+    merged = {}
+    for group_index, keywords, papers in group_results:
+        for rank, paper in enumerate(papers):
+            key = paper.doi.lower() if paper.has_doi else paper.title.strip().lower()
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {"paper": paper, "groups": [], "best_rank": rank}
+            if keywords not in entry["groups"]:
+                entry["groups"].append(keywords)
+            entry["best_rank"] = min(entry["best_rank"], rank)
+    ranked = sorted(
+        merged.values(),
+        key=lambda entry: (-len(entry["groups"]), entry["best_rank"], -(entry["paper"].impact or 0.0)),
+    )
+    return [(entry["paper"], entry["groups"]) for entry in ranked]
 
 @mcp.tool()
-def search_title_by_keywords(keywords: List[str], impact_factor: str = None, page_index: int = 1, searchSort: str = '') -> str:
+@admission.tool()
+@instrument_tool("xmol")
+async def search_title_by_keywords(keywords: List[str], impact_factor: str = None, page_index: int = 1, searchSort: str = '', page_count: int = 1, max_results: int = None, publish_date_start: str = None, publish_date_end: str = None, journals: List[str] = None, authors: List[str] = None, impact_factor_max: str = None, rank_by: str = '', top_k: int = None, output_format: str = 'markdown', ctx: Context = None) -> str:
     """
     使用关键词列表搜索文献标题，返回Markdown格式的文献标题列表
     
@@ -166,110 +408,306 @@ def search_title_by_keywords(keywords: List[str], impact_factor: str = None, pag
     impact_factor: 影响因子下限，默认使用配置中的值
     page_index: 页码，默认为1
     searchSort: 排序方式，默认为'',为空代表相关性排序，可选值为'publishDate'、publishDate代表按照发布日期排序，'citation'代表按照引用次数排序，'default'代表按照默认排序
+    page_count: 从page_index开始连续获取的页数，默认为1，最多5页
+    max_results: 需要的文献总数（最多200篇），设置后自动跨页获取并忽略page_count
+    publish_date_start: 发布日期下限，格式为YYYY、YYYY-MM或YYYY-MM-DD
+    publish_date_end: 发布日期上限，格式同上，只写年份或月份时包含整年或整月
+    journals: 限定的期刊名列表，例如["Nature", "JACS"]，最多5个时由X-MOL过滤，超过5个时只在本地过滤
+    authors: 作者名列表，多个作者取AND；只由X-MOL过滤，搜索结果和本地缓存中的记录没有作者，无法在本地核对
+    impact_factor_max: 影响因子上限
+    rank_by: 本地排序方式，''(默认)保持X-MOL返回的顺序，'impact'、'pubdate'分别按影响因子、发布日期降序
+    top_k: 排序后只返回前k篇，至少为1
+    output_format: 输出格式，'markdown'(默认)或'json'
 
     返回:
-    Markdown格式的文献标题列表，包含标题、期刊名、影响因子和DOI
+    Markdown格式的文献标题列表，包含标题、期刊名、影响因子和DOI；json格式时返回紧凑的JSON
+    客户端支持时，每解析出一篇文献即通过日志通知推送，并通过进度通知报告已推送的篇数
 
     注意事项:
     - 关键词应该是学术术语，数量不超过3个以获得最佳结果，应该使用多组关键词进行搜索
     - 每个关键词应该使用专业术语，不要使用通用术语，如果文献较少，则使用通用术语
     - 关键词应该使用专业术语，不要使用通用术语
     - 可以调整影响因子阈值以过滤文献质量
+    - 需要特定时间段、期刊或作者的文献时使用过滤参数，不要获取多页后自行筛选
     - 使用页码参数浏览更多搜索结果
     """
     try:
         # 使用用户提供的影响因子或默认值
         impact_value = impact_factor if impact_factor is not None else impact
+        await load_all(content_tool, search_cache, literature_cache, paper_index)
+        try:
+            filters = SearchFilter.create(publish_date_start, publish_date_end, journals, impact_factor_max, authors)
+            rank_papers([], rank_by, top_k)
+        except ValueError as e:
+            return render_error({
+                "error": f"过滤参数无效: {str(e)}",
+                "suggestion": "日期使用YYYY、YYYY-MM或YYYY-MM-DD格式，rank_by可选值为''、'impact'、'pubdate'，top_k至少为1"
+            }, output_format)
         
-        logger.info(f"搜索关键词: {keywords}, 影响因子: {impact_value}")
+        logger.info(f"搜索关键词: {keywords}, 影响因子: {impact_value}" + (f", 过滤条件: {filters}" if filters else ""))
+
+        # 统计查询频次，热门查询的第一页由后台定时刷新
+        cache_warmer.record(
+            search_key(keywords, impact_value, lang, searchSort, 1, filters.key() if filters else ""),
+            {"keywords": keywords, "impact": impact_value, "sort": searchSort, "filters": filters},
+        )
         
-        # 获取文献内容
-        literature_list = content_tool.get_page_content(
-            keywordList=keywords,
-            ck=cookie,
-            impact=impact_value,
-            lang=lang,
-            pageindex=page_index,
-            searchSort=searchSort
+        if max_results:
+            limit, max_pages = min(max_results, MAX_RESULTS), MAX_RESULT_PAGES
+        else:
+            limit, max_pages = None, max(1, min(page_count, MAX_PAGE_COUNT))
+
+        # 跨页逐篇获取：当前页边解析边推送，同时在后台预取后续页面
+        papers = content_tool.iter_papers(
+            keywords, impact=impact_value, searchSort=searchSort, lang=lang,
+            start_page=page_index, max_results=limit, max_pages=max_pages, read_ahead=READ_AHEAD,
+            fetch_page=lambda page, on_paper: _search(keywords, impact_value, page, searchSort, on_paper, filters),
+            filters=filters,
         )
+        literature_list = []
+        async for paper in papers:
+            literature_list.append(paper)
+            if ctx is not None:
+                try:
+                    await ctx.info(paper_line(len(literature_list), paper))
+                    await ctx.report_progress(len(literature_list), limit)
+                except Exception as e:
+                    logger.debug(f"推送文献失败: {str(e)}")
+        if papers.rejected:
+            logger.info(f"本地过滤掉{papers.rejected}篇不满足条件的文献")
+        if not literature_list and papers.error:
+            literature_list = papers.error
         
         # 检查文献内容是否为空或缺少关键信息
         if isinstance(literature_list, dict) and literature_list.get('error'):
             logger.warning(f"搜索文献返回错误: {literature_list.get('error')}")
-            return _convert_to_markdown(literature_list)
+            return render_papers(literature_list, output_format)
             
         if not literature_list or len(literature_list) == 0:
             logger.warning(f"未找到与关键词相关的文献: {keywords}")
-            return _convert_to_markdown({
+            return render_error({
                 "error": "未找到相关文献",
                 "keywords": keywords,
                 "suggestion": "尝试使用不同的关键词或降低关键词长度或降低影响因子要求或减少关键词数量，关键词数量建议最多3个"
-            })
+                              + ("，或放宽发布日期、期刊和作者等过滤条件" if filters else "")
+            }, output_format)
         
         # 保存到缓存
-        _save_to_cache(literature_list)
+        await _save_to_cache(literature_list)
+
+        # 本地排序并取前top_k篇
+        literature_list = rank_papers(literature_list, rank_by, top_k)
         
-        # 转换为Markdown格式
-        return _convert_to_markdown(literature_list)
+        # 按请求的格式输出
+        return render_papers(literature_list, output_format)
         
     except Exception as e:
         logger.error(f"使用关键词搜索文献时发生错误: {str(e)}")
         logger.error(traceback.format_exc())
-        return _convert_to_markdown({
+        return render_error({
             "error": f"搜索文献时出错: {str(e)}",
             "keywords": keywords,
             "suggestion": "请检查网络连接或Cookie是否有效"
-        })
+        }, output_format)
+
+@mcp.tool()
+@admission.tool()
+@instrument_tool("xmol")
+async def batch_search_by_keywords(keyword_groups: List[List[str]], impact_factor: str = None, page_index: int = 1, page_count: int = 1, searchSort: str = '', output_format: str = 'markdown', ctx: Context = None) -> str:
+    """
+    使用多组关键词并发搜索文献，合并去重后返回一份按相关度排序的结果
+
+    参数:
+    keyword_groups: 关键词组列表，例如[["量子计算", "药物发现"], ["药物发现", "分子模拟"]]，建议3-5组，每组最多3个关键词
+    impact_factor: 影响因子下限，默认使用配置中的值
+    page_index: 起始页码，默认为1
+    page_count: 每组关键词获取的页数，默认为1，最多5页
+    searchSort: 排序方式，取值同search_title_by_keywords
+    output_format: 输出格式，'markdown'(默认)或'json'
+
+    返回:
+    按DOI去重后的文献列表，命中关键词组越多的文献排名越靠前
+    客户端支持时，每完成一组关键词的一页即通过进度通知报告
+    """
+    try:
+        impact_value = impact_factor if impact_factor is not None else impact
+        await load_all(content_tool, search_cache, literature_cache, paper_index)
+        groups = [[k for k in group if k and str(k).strip()] for group in keyword_groups][:MAX_BATCH_GROUPS]
+        groups = [group for group in groups if group]
+        if not groups:
+            return render_error({"error": "未提供有效的关键词组", "suggestion": "请至少提供一组关键词"}, output_format)
+        pages = range(page_index, page_index + max(1, min(page_count, MAX_PAGE_COUNT)))
+        jobs = [(i, group, page) for i, group in enumerate(groups) for page in pages]
+
+        logger.info(f"批量搜索关键词组: {groups}, 页码: {list(pages)}, 影响因子: {impact_value}")
+
+        # 所有关键词组和页码并发执行，统一受连接池和限速器约束
+        async def run_job(group, page):
+            try:
+                response = await _search(group, impact_value, page, searchSort)
+            except Exception as e:
+                response = e
+            if ctx is not None:
+                nonlocal done
+                done += 1
+                try:
+                    await ctx.report_progress(done, len(jobs))
+                    await ctx.info(f"已完成关键词组 {', '.join(group)} 第{page}页 ({done}/{len(jobs)})")
+                except Exception as e:
+                    logger.debug(f"推送进度失败: {str(e)}")
+            return response
+
+        done = 0
+        responses = await asyncio.gather(*(run_job(group, page) for _, group, page in jobs))
+
+        group_results = []
+        errors = []
+        for (group_index, group, page), response in zip(jobs, responses):
+            if isinstance(response, Exception):
+                errors.append({"keywords": group, "page": page, "error": f"搜索文献时出错: {str(response)}"})
+            elif isinstance(response, dict) and response.get('error'):
+                errors.append({"keywords": group, "page": page, "error": response['error']})
+            elif not response:
+                errors.append({"keywords": group, "page": page, "error": "未找到相关文献"})
+            else:
+                await _save_to_cache(response)
+                group_results.append((group_index, group, response))
+
+        results = _merge_results(group_results)
+        if not results and output_format != 'json':
+            return render_error({
+                "error": "所有关键词组均未找到相关文献",
+                "suggestion": "尝试使用不同的关键词或降低影响因子要求或减少每组关键词数量"
+            })
+        return render_batch(results, errors, output_format)
+
+    except Exception as e:
+        logger.error(f"批量搜索文献时发生错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return render_error({
+            "error": f"批量搜索文献时出错: {str(e)}",
+            "suggestion": "请检查网络连接或Cookie是否有效"
+        }, output_format)
 
 @mcp.tool()
-def get_literature_detail(doi: str) -> str:
+@admission.tool()
+@instrument_tool("xmol")
+async def get_literature_detail(doi: str, output_format: str = 'markdown') -> str:
     """
     根据DOI获取文献的详细信息，包括摘要、作者、引用等
     
     参数:
     doi: 文献的DOI标识符
+    output_format: 输出格式，'markdown'(默认)或'json'
     
     返回:
     Markdown格式的文献详细信息
     """
     try:
-        # 尝试从缓存获取
-        cached_literature = _get_from_cache(doi)
-        if cached_literature:
-            logger.info(f"从缓存获取文献: {doi}")
-            return f"### {cached_literature.get('title', '未知标题')}\n\n" + \
-                   f"**DOI**: {doi}\n\n" + \
-                   f"**期刊**: {cached_literature.get('jounal', '未知期刊')}\n\n" + \
-                   f"**发布日期**: {cached_literature.get('pubdata', '未知发布日期')}\n\n" + \
-                   f"**影响因子**: {cached_literature.get('impact', '未知')}\n\n" + \
-                   f"**摘要**: {cached_literature.get('content', '暂无摘要')}\n\n" + \
-                   f"**链接**: [{doi}]({cached_literature.get('url', '#')})"
-        
-        # 从API获取详细信息
+        doi = doi.strip()
+        await load_all(content_tool, literature_cache, detail_cache, paper_index)
+        # 大小写、doi.org/doi:前缀不同的DOI以及文献标题，先通过本地索引解析为已知文献；
+        # 只有个别字符不同的DOI可能是另一篇文献，不替换，仍按原DOI请求
+        indexed = paper_index.resolve(doi)
+        if indexed is not None:
+            if not indexed.has_doi:
+                return render_detail(doi, indexed, output_format)
+            if indexed.doi != doi:
+                logger.info(f"通过本地索引将{doi}解析为{indexed.doi}")
+                doi = indexed.doi
+
+        # 优先使用已缓存的详情
+        detail = await _get_from_cache(doi, detail_cache)
+        if detail:
+            logger.info(f"从缓存获取文献详情: {doi}")
+            return render_detail(doi, detail, output_format)
+
+        # 搜索结果中出现过的文献直接请求其详情页，否则通过DOI检索
+        summary = await _get_from_cache(doi)
         logger.info(f"从API获取文献: {doi}")
-        detail = content_tool.get_literature_detail(doi=doi, ck=cookie, lang=lang)
-        
+        detail = await content_tool.get_literature_detail(
+            doi=doi, lang=lang, url=summary.url if summary and summary.url != "未知URL" else None,
+        )
+
         if isinstance(detail, dict) and detail.get('error'):
             logger.warning(f"获取文献详情返回错误: {detail.get('error')}")
-            return f"### 获取文献详情失败\n\n{detail['error']}\n\n{detail.get('suggestion', '')}"
-            
+            if summary:
+                # 详情页不可用时退回搜索结果中的摘要信息
+                return render_detail(doi, summary, output_format)
+            return render_error(_suggest_dois(doi, detail), output_format, title="获取文献详情失败")
+
         if not detail:
+            if summary:
+                return render_detail(doi, summary, output_format)
             logger.warning(f"未找到指定DOI的文献: {doi}")
-            return f"### 未找到文献\n\nDOI: {doi}\n\n可能的原因:\n- DOI不正确\n- 文献数据库中不存在该文献\n- 网络连接问题"
-        
-        # 转换为Markdown格式并返回
-        return f"### {detail.get('title', '未知标题')}\n\n" + \
-               f"**DOI**: {doi}\n\n" + \
-               f"**期刊**: {detail.get('jounal', '未知期刊')}\n\n" + \
-               f"**发布日期**: {detail.get('pubdata', '未知发布日期')}\n\n" + \
-               f"**影响因子**: {detail.get('impact', '未知')}\n\n" + \
-               f"**摘要**: {detail.get('content', '暂无摘要')}\n\n" + \
-               f"**链接**: [{doi}]({detail.get('url', '#')})"
-               
+            return render_error(_suggest_dois(doi, {
+                "error": f"DOI: {doi}",
+                "suggestion": "可能的原因:\n- DOI不正确\n- 文献数据库中不存在该文献\n- 网络连接问题"
+            }), output_format, title="未找到文献")
+
+        try:
+            await detail_cache.aset(doi, detail)
+            paper_index.add(detail)
+        except Exception as e:
+            logger.error(f"缓存文献详情时出错: {str(e)}")
+
+        # 按请求的格式输出
+        return render_detail(doi, detail, output_format)
+
     except Exception as e:
         logger.error(f"获取文献详情时发生错误: {str(e)}")
         logger.error(traceback.format_exc())
-        return f"### 错误\n\n获取文献详情时出错: {str(e)}\n\nDOI: {doi}"
+        return render_error({"error": f"获取文献详情时出错: {str(e)}", "suggestion": f"DOI: {doi}"},
+                            output_format, title="错误")
+
+@mcp.tool()
+@admission.tool()
+@instrument_tool("xmol")
+async def search_local_literature(query: str, limit: int = 10, output_format: str = 'markdown') -> str:
+    """
+    在本地已获取过的文献中离线检索，不访问X-MOL，毫秒级返回
+
+    参数:
+    query: 检索词，可以是标题片段、期刊名、摘要中的术语或DOI；最后一个词和以*结尾的词按前缀匹配，支持少量拼写错误
+    limit: 返回的文献数，默认为10，最多50
+    output_format: 输出格式，'markdown'(默认)或'json'
+
+    返回:
+    按BM25相关度排序的文献列表；本地没有相关文献时，请改用search_title_by_keywords联网搜索
+    """
+    try:
+        limit = max(1, min(limit, MAX_LOCAL_RESULTS))
+        await load_all(paper_index)
+        start = time.perf_counter()
+        # DOI只按规范化形式精确定位，找不到时列出相近的DOI作为提示；其他检索词按词项检索
+        if looks_like_doi(query):
+            paper = paper_index.lookup_doi(query)
+            if paper is None:
+                logger.info(f"本地检索: 未找到DOI {query}")
+                return render_error(_suggest_dois(query, {
+                    "error": f"本地{len(paper_index)}篇文献中没有DOI为{query}的文献",
+                    "suggestion": "请使用get_literature_detail工具按该DOI联网获取"
+                }), output_format)
+            results = [(paper, 1.0, 1.0)]
+        else:
+            results = paper_index.search(query, limit=limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"本地检索: {query}, 命中{len(results)}篇, 耗时{elapsed:.1f}毫秒")
+
+        if output_format == 'json':
+            results = ",".join(paper_json(paper, score=round(score, 4)) for paper, score, _ in results)
+            return f'{{"results":[{results}],"indexed":{len(paper_index)}}}'
+        if not results:
+            return render_error({
+                "error": f"本地{len(paper_index)}篇文献中未找到与“{query}”相关的文献",
+                "suggestion": "请使用search_title_by_keywords工具联网搜索"
+            }, output_format)
+        return render_papers([paper for paper, _, _ in results], title="本地检索结果")
+
+    except Exception as e:
+        logger.error(f"本地检索文献时发生错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return render_error({"error": f"本地检索文献时出错: {str(e)}"}, output_format)
 
 @mcp.resource(uri="file:///help.txt")
 def help() -> str:
@@ -289,7 +727,9 @@ def help() -> str:
     
     ## 可用工具
     - search_title_by_keywords: 根据关键词搜索文献，返回标题列表
+    - batch_search_by_keywords: 多组关键词并发搜索，合并去重后返回
     - get_literature_detail: 根据DOI获取文献的详细信息
+    - search_local_literature: 在已获取过的文献中离线检索，无需联网
     
     ## 搜索技巧
     - 提供1-3个精确的关键词可以获得更好的搜索结果
@@ -303,4 +743,32 @@ def help() -> str:
     
     问题: "量子计算在药物发现中的应用前景？"
     关键词: ["量子计算", "药物发现"]、["药物发现", "分子模拟"]、["量子计算", "分子模拟"]
-    """ 
\ No newline at end of file
+    """ 
+
+@mcp.resource("status://")
+async def status() -> Dict[str, Any]:
+    """获取服务状态信息，包括限速器的排队深度和等待时间、上游重试与熔断状态"""
+    await load_all(content_tool, literature_cache, detail_cache, search_cache, paper_index)
+    return {
+        "status": "ok",
+        "service": "文献检索助手",
+        "tools": ["search_title_by_keywords", "batch_search_by_keywords", "get_literature_detail",
+                  "search_local_literature"],
+        "resources": ["file:///help.txt", "status://", "metrics://"],
+        "cache": {
+            "literature": literature_cache.stats(),
+            "detail": detail_cache.stats(),
+            "search": search_cache.stats(),
+        },
+        "index": paper_index.stats(),
+        "admission": admission.stats(),
+        "warmer": cache_warmer.stats(),
+        "rate_limiter": get_rate_limiter().metrics(),
+        "upstream": content_tool.fetcher.metrics(),
+        "sessions": session_pool.stats(),
+    }
+
+@mcp.resource("metrics://", mime_type="text/plain")
+def metrics() -> str:
+    """Prometheus文本格式的指标：各阶段耗时直方图、缓存命中率、上游状态码、进行中的工具调用和限速等待"""
+    return REGISTRY.render()
@@ -10,7 +10,8 @@ import argparse
 import os
 import sys
 import logging
-from core.server import mcp, run
+from core.server import CACHE_DIR, mcp, run
+from mcp_common.workers import serve_workers
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -28,12 +29,13 @@ def main():
         default="stdio",
         help="传输协议: stdio(标准IO)或sse(服务器发送事件)"
     )
+    parser.add_argument("--workers", type=int, default=1, help="SSE模式下的工作进程数，大于1时以多进程方式运行")
 
     args = parser.parse_args()
     
     # 输出可用功能
     print("启动XMol文献检索服务...")
-    print("可用工具: search_title_by_keywords, get_literature_detail")
+    print("可用工具: search_title_by_keywords, batch_search_by_keywords, get_literature_detail, search_local_literature")
     
     # 设置环境变量以配置SSE服务器
     if args.transport == "sse":
@@ -48,7 +50,15 @@ def main():
         print(f"使用SSE模式启动服务器，地址: {args.host}:{args.port}")
         print(f"SSE路径: {args.ssepath}")
         print(f"消息路径: {mcp.settings.message_path}")
-        
+
+        if args.workers > 1:
+            # 工作进程通过CACHE_DIR下的SQLite持久层共享缓存，通过同一个令牌桶文件共享上游速率
+            env = {"XMOL_RATE_LIMIT_DB": os.getenv("XMOL_RATE_LIMIT_DB") or str(CACHE_DIR.resolve() / "ratelimit.sqlite3")}
+            if os.getenv("XMOL_CACHE_BACKEND", "sqlite") != "sqlite":
+                logger.warning("缓存后端不是sqlite，各工作进程的缓存互不共享")
+            print(f"工作进程数: {args.workers}，共享限速: {env['XMOL_RATE_LIMIT_DB']}")
+            serve_workers("xmol.core.server", args.workers, args.host, args.port, args.ssepath, env=env)
+            return 0
 
     else:
         print("使用STDIO模式启动服务器")
@@ -0,0 +1,43 @@
+"""
+测试公共夹具
+
+xmol目录（core包）和benchmarks目录（桩服务器）加入导入路径。
+需要MCP服务器的测试通过server夹具获取core.server：导入前启动桩服务器并设置环境变量，
+整个测试会话共用一个桩服务器和服务器模块
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+XMOL_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(XMOL_DIR / "benchmarks"))
+sys.path.insert(0, str(XMOL_DIR))
+
+from stub_server import StubServer  # noqa: E402
+
+# 桩服务器按DOI快速检索时找不到的DOI
+MISSING_DOI = "10.1038/s41586-024-07011-2"
+
+
+@pytest.fixture(scope="session")
+def stub():
+    server = StubServer(missing_dois=[MISSING_DOI]).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def server(stub, tmp_path_factory):
+    os.environ.update({
+        "XMOL_BASE_URL": stub.base_url,
+        "Cookie": "atk0210=stub",
+        "XMOL_RATE": "0",
+        "XMOL_CACHE_DIR": str(tmp_path_factory.mktemp("cache")),
+        "XMOL_WARMUP_DELAY": "-1",
+        "XMOL_WARMER_INTERVAL": "0",
+    })
+    from core import server as module
+    return module
@@ -0,0 +1,104 @@
+"""
+工具准入控制：并发名额、有界等待队列和各类拒绝原因
+"""
+
+import asyncio
+
+import pytest
+
+import core  # noqa: F401  导入core时把仓库根目录加入导入路径
+from mcp_common.admission import (PREDICTED_TIMEOUT, QUEUE_FULL, QUEUE_TIMEOUT, AdmissionControl, Shed,
+                                  ToolGate, ToolLimits)
+
+
+def test_unlimited_gate_admits_immediately():
+    gate = ToolGate("test", "tool", ToolLimits(concurrency=0))
+
+    async def run():
+        return [await gate.acquire() for _ in range(100)]
+
+    assert asyncio.run(run()) == [0.0] * 100
+    assert gate.active == 100
+
+
+def test_queue_full_is_shed():
+    gate = ToolGate("test", "tool", ToolLimits(concurrency=1, queue=1, timeout=5))
+
+    async def run():
+        await gate.acquire()
+        queued = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Shed) as shed:
+            await gate.acquire()
+        gate.release()
+        await queued
+        return shed.value
+
+    shed = asyncio.run(run())
+    assert shed.reason == QUEUE_FULL and shed.retry_after >= 1.0
+    assert gate.shed[QUEUE_FULL] == 1 and gate.active == 1
+
+
+def test_queue_timeout_is_shed():
+    gate = ToolGate("test", "tool", ToolLimits(concurrency=1, queue=4, timeout=0.05))
+
+    async def run():
+        await gate.acquire()
+        with pytest.raises(Shed) as shed:
+            await gate.acquire()
+        return shed.value
+
+    assert asyncio.run(run()).reason == QUEUE_TIMEOUT
+    assert gate.waiting == 0
+
+
+def test_predicted_timeout_is_shed_without_queueing():
+    gate = ToolGate("test", "tool", ToolLimits(concurrency=1, queue=10, timeout=1.0))
+    gate.service_time = 2.0
+
+    async def run():
+        await gate.acquire()
+        with pytest.raises(Shed) as shed:
+            await gate.acquire()
+        return shed.value
+
+    shed = asyncio.run(run())
+    assert shed.reason == PREDICTED_TIMEOUT and shed.retry_after == 2.0
+    assert gate.queued == 0
+
+
+def test_release_hands_slot_to_first_waiter():
+    gate = ToolGate("test", "tool", ToolLimits(concurrency=1, queue=4, timeout=5))
+    order = []
+
+    async def worker(name: str):
+        await gate.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        gate.release()
+
+    async def run():
+        await asyncio.gather(*(worker(name) for name in "abc"))
+
+    asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    assert gate.active == 0 and gate.queued == 2
+
+
+def test_tool_decorator_returns_busy_result():
+    control = AdmissionControl("test", on_busy=lambda tool, kwargs, shed: {"error": shed.reason, "tool": tool},
+                               default=ToolLimits(concurrency=1, queue=0, timeout=1))
+
+    @control.tool()
+    async def slow(delay: float = 0.05):
+        await asyncio.sleep(delay)
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(slow(), slow())
+
+    assert asyncio.run(run()) == ["ok", {"error": QUEUE_FULL, "tool": "slow"}]
+    assert control.stats()["slow"]["admitted"] == 1
+
+    with pytest.raises(TypeError):
+        control.tool()(lambda: None)
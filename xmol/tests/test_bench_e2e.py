@@ -0,0 +1,26 @@
+"""
+端到端基准测试与基线的比较
+"""
+
+import json
+from pathlib import Path
+
+from bench_e2e import compare
+
+BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baseline_e2e.json"
+
+
+def test_baseline_compares_clean_against_itself():
+    baseline = json.loads(BASELINE.read_text(encoding="utf-8"))
+    assert baseline["results"]
+    assert compare(baseline["results"], baseline, 0.25) == []
+
+
+def test_regressions_beyond_tolerance_are_reported():
+    base = {"transport": "stdio", "concurrency": 8, "throughput_rps": 100.0, "p95_ms": 50.0, "errors": 0,
+            "peak_rss_mb": 80.0}
+    current = dict(base, throughput_rps=70.0, p95_ms=70.0, errors=1, peak_rss_mb=90.0)
+    regressions = compare([current], {"results": [base]}, 0.25)
+    assert len(regressions) == 3
+    assert any("吞吐量" in item for item in regressions) and any("错误数" in item for item in regressions)
+    assert compare([dict(base, transport="sse")], {"results": [base]}, 0.25) == []
@@ -0,0 +1,124 @@
+"""
+上游故障处理：熔断器状态转换、GET重试、熔断后直接失败和被取消的探测请求
+"""
+
+import asyncio
+
+import pytest
+
+from core.content import AsyncFetcher, CircuitBreaker, CircuitOpenError
+from core.content.breaker import CLOSED, HALF_OPEN, OPEN
+from stub_server import StubServer
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.before()
+        breaker.record_failure()
+    breaker.before()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+    for _ in range(3):
+        breaker.before()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    assert breaker.rejected == 1
+
+
+def test_half_open_allows_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.before()
+    breaker.record_failure()
+    breaker.before()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    breaker.before()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_disabled_breaker_never_rejects():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        breaker.record_failure()
+        breaker.before()
+    assert breaker.state == CLOSED
+
+
+def test_get_retries_transient_errors():
+    stub = StubServer(error_rate=0.5, seed=1).start()
+    fetcher = AsyncFetcher(base_url=stub.base_url, retries=5, backoff=0.001)
+
+    async def run():
+        try:
+            return [(await fetcher.get("paper/search/result", params={"searchLogId": str(i)})).status_code
+                    for i in range(10)]
+        finally:
+            await fetcher.aclose()
+
+    try:
+        statuses = asyncio.run(run())
+    finally:
+        stub.stop()
+    assert statuses == [200] * 10
+    assert fetcher.retried > 0
+
+
+def test_open_breaker_fails_fast_without_upstream_requests():
+    stub = StubServer(error_rate=1.0).start()
+    fetcher = AsyncFetcher(base_url=stub.base_url, retries=0,
+                           breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    async def run():
+        try:
+            statuses = [(await fetcher.get("paper/search/result")).status_code for _ in range(2)]
+            with pytest.raises(CircuitOpenError):
+                await fetcher.get("paper/search/result")
+            return statuses
+        finally:
+            await fetcher.aclose()
+
+    try:
+        assert asyncio.run(run()) == [503, 503]
+    finally:
+        stub.stop()
+    assert stub.counters["get"] == 2
+
+
+def test_cancelled_probe_waiting_on_limiter_releases_probe():
+    class BlockingLimiter():
+        def __init__(self):
+            self.waiting = asyncio.Event()
+
+        async def acquire(self, host, session=None):
+            self.waiting.set()
+            await asyncio.Event().wait()
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.before()
+    breaker.record_failure()
+    limiter = BlockingLimiter()
+    fetcher = AsyncFetcher(base_url="http://127.0.0.1:9/", limiter=limiter, breaker=breaker)
+
+    async def run():
+        try:
+            probe = asyncio.ensure_future(fetcher.get("paper/search/result"))
+            await limiter.waiting.wait()
+            assert breaker.state == HALF_OPEN
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+        finally:
+            await fetcher.aclose()
+
+    asyncio.run(run())
+    assert fetcher.requests == 0
+    # 探测名额已释放，下一个请求可以继续探测
+    breaker.before()
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,95 @@
+"""
+分层文献缓存：内存LRU层的容量与过期、SQLite持久层、异步读写
+"""
+
+import asyncio
+import time
+
+from core.content import LRUCache, Paper, SQLiteCache, TieredCache, create_cache
+
+
+def make_paper(i: int) -> Paper:
+    return Paper.create(f"Paper {i}", "Nature", "10", "2024-01-01", f"10.1000/test.{i}", None, "abstract")
+
+
+def create_paper_cache(cache_dir, **options) -> TieredCache:
+    return create_cache("literature", cache_dir, encode=Paper.to_dict, decode=Paper.from_dict, **options)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.keys() == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_lru_respects_byte_limit():
+    cache = LRUCache(max_entries=100, max_bytes=20)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert "a" not in cache and "b" in cache
+    assert cache.bytes <= 20
+
+
+def test_entries_expire():
+    cache = LRUCache(ttl=60)
+    cache.set("a", 1, expires=time.time() - 1)
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    cache = create_paper_cache(tmp_path)
+    cache.set_many([(paper.doi, paper) for paper in map(make_paper, range(3))])
+    cache.persistent.close()
+
+    reopened = create_paper_cache(tmp_path, warm=False)
+    assert len(reopened.memory) == 0
+    assert reopened.get("10.1000/test.1") == make_paper(1)
+    # 持久层命中后回填内存层
+    assert "10.1000/test.1" in reopened.memory
+
+
+def test_warm_loads_recent_entries(tmp_path):
+    cache = create_paper_cache(tmp_path)
+    cache.set_many([(paper.doi, paper) for paper in map(make_paper, range(5))])
+    cache.persistent.close()
+
+    warmed = create_paper_cache(tmp_path, max_entries=3)
+    assert len(warmed.memory) == 3
+    assert len(warmed) == 5
+
+
+def test_expired_persistent_entries_are_not_returned(tmp_path):
+    cache = TieredCache(LRUCache(), SQLiteCache(tmp_path / "c.sqlite3"))
+    cache.set("old", {"v": 1}, ttl=-1)
+    cache.memory.clear()
+    assert cache.get("old") is None
+
+
+def test_async_access_reads_and_writes_persistent_tier(tmp_path):
+    cache = create_cache("detail", tmp_path, encode=Paper.to_dict, decode=Paper.from_dict)
+
+    async def run():
+        await cache.aset("10.1000/test.9", make_paper(9))
+        await cache.aset_many([("10.1000/test.8", make_paper(8))])
+        cache.memory.clear()
+        return await cache.aget("10.1000/test.9"), await cache.aget("10.1000/test.8"), await cache.aget("none")
+
+    assert asyncio.run(run()) == (make_paper(9), make_paper(8), None)
+    assert len(cache.persistent) == 2
+
+
+def test_areload_reads_values_written_by_other_processes(tmp_path):
+    mine = TieredCache(LRUCache(), SQLiteCache(tmp_path / "shared.sqlite3"))
+    other = TieredCache(LRUCache(), SQLiteCache(tmp_path / "shared.sqlite3"))
+    mine.set("key", "old")
+    other.set("key", "new")
+
+    async def run():
+        return await mine.aget("key"), await mine.areload("key"), await mine.aget("key")
+
+    assert asyncio.run(run()) == ("old", "new", "new")
@@ -0,0 +1,160 @@
+"""
+文献内容获取：对桩服务器的搜索和详情请求、searchLogId按会话缓存和失效判断
+"""
+
+import asyncio
+
+from core.content import AsyncFetcher, SessionPool, get_content
+from stub_server import StubServer
+
+
+def make_tool(stub, cookies=("atk0210=stub",)):
+    fetcher = AsyncFetcher(base_url=stub.base_url)
+    return get_content(fetcher=fetcher, sessions=SessionPool(list(cookies), strategy="round_robin")), fetcher
+
+
+def test_search_reads_search_id_from_redirect(stub):
+    tool, fetcher = make_tool(stub)
+
+    async def run():
+        try:
+            before = dict(stub.counters)
+            papers = await tool.get_page_content(["redirect"], "atk0210=stub")
+            return papers, {key: stub.counters[key] - before[key] for key in before}
+        finally:
+            await fetcher.aclose()
+
+    papers, requests = asyncio.run(run())
+    assert len(papers) == stub.papers
+    assert all(paper.doi.startswith("10.") for paper in papers)
+    # 不跟随searchPaper的重定向，每次搜索只有一次POST和一次结果页GET
+    assert requests == {"post": 1, "get": 1}
+
+
+def test_search_id_is_reused_across_pages_and_sort_orders(stub):
+    tool, fetcher = make_tool(stub)
+
+    async def run():
+        try:
+            before = stub.counters["post"]
+            for page, sort in ((1, ""), (2, ""), (1, "publishDate")):
+                papers = await tool.get_page_content(["reuse"], "atk0210=stub", searchSort=sort, pageindex=page)
+                assert len(papers) == stub.papers
+            return stub.counters["post"] - before
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(run()) == 1
+
+
+def test_expired_search_id_is_refreshed():
+    stub = StubServer(id_ttl=0.1).start()
+    tool, fetcher = make_tool(stub)
+
+    async def run():
+        try:
+            await tool.get_page_content(["expire"], "atk0210=stub")
+            await asyncio.sleep(0.2)
+            return await tool.get_page_content(["expire"], "atk0210=stub", pageindex=2)
+        finally:
+            await fetcher.aclose()
+
+    try:
+        papers = asyncio.run(run())
+    finally:
+        stub.stop()
+    assert len(papers) == stub.papers
+    assert stub.counters["post"] == 2
+
+
+
+def test_page_without_results_does_not_refresh_search_id():
+    stub = StubServer().start()
+    # 没有文献列表的结果页（查询无结果），与searchLogId过期无关
+    stub.result_page = lambda seed: b"<html><body><div class=\"no-result\"></div></body></html>"
+    tool, fetcher = make_tool(stub)
+
+    async def run():
+        try:
+            return [await tool.get_page_content(["empty"], "atk0210=stub", pageindex=page) for page in (1, 2)]
+        finally:
+            await fetcher.aclose()
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        stub.stop()
+    assert all("error" in result for result in results)
+    assert stub.counters == {"post": 1, "get": 2}
+    assert tool.sessions.sessions[0].quarantines == 0
+
+def test_search_id_is_reused_within_a_session_only(stub):
+    tool, fetcher = make_tool(stub, ["atk0210=one", "atk0210=two"])
+
+    async def run():
+        try:
+            before = stub.counters["post"]
+            await tool.get_page_content(["session key"], "atk0210=one")
+            await tool.get_page_content(["session key"], "atk0210=one", pageindex=2)
+            same_session = stub.counters["post"] - before
+            await tool.get_page_content(["session key"], "atk0210=two")
+            return same_session, stub.counters["post"] - before
+        finally:
+            await fetcher.aclose()
+
+    # searchLogId属于创建它的账号，其他会话不能复用
+    assert asyncio.run(run()) == (1, 2)
+    assert len(tool.search_ids) == 2
+
+
+def test_concurrent_pages_share_one_search_post(stub):
+    tool, fetcher = make_tool(stub)
+
+    async def run():
+        try:
+            before = stub.counters["post"]
+            pages = await asyncio.gather(*(tool.get_page_content(["coalesced"], pageindex=page) for page in (1, 2, 3)))
+            return pages, stub.counters["post"] - before
+        finally:
+            await fetcher.aclose()
+
+    pages, posts = asyncio.run(run())
+    assert posts == 1
+    assert all(len(page) == stub.papers for page in pages)
+
+
+def test_papers_are_streamed_as_they_are_parsed(stub):
+    tool, fetcher = make_tool(stub)
+    streamed = []
+
+    async def on_paper(paper):
+        streamed.append(paper)
+
+    async def run():
+        try:
+            return await tool.get_page_content(["stream"], "atk0210=stub", on_paper=on_paper)
+        finally:
+            await fetcher.aclose()
+
+    papers = asyncio.run(run())
+    assert streamed == papers and len(papers) == stub.papers
+
+
+def test_detail_against_stub(stub):
+    tool, fetcher = make_tool(stub)
+    doi = "10.1038/s41586-024-07001-1"
+
+    async def run():
+        try:
+            before = stub.counters["get"]
+            details = await asyncio.gather(*(tool.get_literature_detail(doi, "atk0210=stub") for _ in range(3)))
+            return details, stub.counters["get"] - before
+        finally:
+            await fetcher.aclose()
+
+    details, requests = asyncio.run(run())
+    paper = details[0]
+    assert paper.doi == doi and paper.authors and paper.citations is not None
+    assert all(detail is paper for detail in details)
+    # 同一DOI的并发请求只访问一次上游（DOI快速检索重定向到详情页）
+    assert requests == 2
@@ -0,0 +1,68 @@
+"""
+搜索过滤条件与本地排序
+"""
+
+from datetime import date
+
+import pytest
+
+from core.content import Paper, SearchFilter, rank_papers
+
+
+def make_papers() -> list:
+    return [
+        Paper.create("a", "Nature", "30", "2021-06-01", "10.1/a", None, None),
+        Paper.create("b", "Science", None, "2023-01-01", "10.1/b", None, None),
+        Paper.create("c", "Cell", "45", None, "10.1/c", None, None),
+        Paper.create("d", "JACS", "30", "2022-02-02", "10.1/d", None, None),
+    ]
+
+
+def test_rank_by_impact_keeps_order_for_ties_and_puts_missing_last():
+    assert [paper.title for paper in rank_papers(make_papers(), "impact")] == ["c", "a", "d", "b"]
+
+
+def test_rank_by_pubdate_with_top_k():
+    assert [paper.title for paper in rank_papers(make_papers(), "pubdate", 2)] == ["b", "d"]
+
+
+def test_default_order_with_top_k():
+    assert [paper.title for paper in rank_papers(make_papers(), "", 3)] == ["a", "b", "c"]
+    assert len(rank_papers(make_papers())) == 4
+
+
+@pytest.mark.parametrize("rank_by, top_k", [("citations", None), ("title", None), ("", 0), ("impact", -1)])
+def test_invalid_rank_arguments(rank_by, top_k):
+    with pytest.raises(ValueError):
+        rank_papers(make_papers(), rank_by, top_k)
+
+
+def test_filter_bounds_and_matching():
+    filters = SearchFilter.create("2022", "2022-06", ["nature", "JACS"], "40")
+    assert filters.date_start == date(2022, 1, 1) and filters.date_end == date(2022, 6, 30)
+    assert [paper.title for paper in make_papers() if filters.matches(paper)] == ["d"]
+    assert filters.post_fields()["journals[1]"] == "JACS"
+    assert SearchFilter.create("2022", "2022-06", ["JACS", "Nature"], "40").key() == filters.key()
+    assert not SearchFilter.create()
+    assert SearchFilter.create().key() == ""
+
+
+def test_invalid_filters():
+    with pytest.raises(ValueError):
+        SearchFilter.create("2024", "2023")
+    with pytest.raises(ValueError):
+        SearchFilter.create("yesterday")
+    with pytest.raises(ValueError):
+        SearchFilter.create(impact_factor_max="high")
+
+
+def test_authors_are_sent_upstream_but_not_checked_locally():
+    filters = SearchFilter.create(authors=["Zhang San", " Li Si "])
+    fields = filters.post_fields()
+    assert fields["authorList[0].option"] == "Zhang San"
+    assert (fields["authorList[1].operator"], fields["authorList[1].option"]) == ("AND", "Li Si")
+    assert SearchFilter.create().post_fields()["authorList[0].option"] == ""
+    # 作者是否满足只能由上游判断，本地记录全部通过，但缓存键与无作者条件时不同
+    assert all(filters.matches(paper) for paper in make_papers())
+    assert filters.key() != SearchFilter.create().key()
+    assert SearchFilter.create(authors=["li si", "zhang  san"]).key() == filters.key()
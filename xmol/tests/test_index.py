@@ -0,0 +1,66 @@
+"""
+本地文献索引：BM25检索、DOI和标题定位、相近DOI提示
+"""
+
+from core.content import Paper, PaperIndex, looks_like_doi, normalize_doi
+
+
+def make_index() -> PaperIndex:
+    index = PaperIndex()
+    index.add_many([
+        Paper.create("Single-atom catalysts for oxygen reduction", "Nature Catalysis", "40", "2024-01-01",
+                     "10.1038/s41586-024-07001-1", None, "Platinum single atoms on carbon supports"),
+        Paper.create("Perovskite solar cells with improved stability", "Science", "50", "2023-05-01",
+                     "10.1126/science.abc1234", None, "Encapsulation strategy for perovskite devices"),
+        Paper.create("Machine learning for catalyst discovery", "JACS", "15", "2022-03-01",
+                     "10.1021/jacs.2c01234", None, "Graph neural networks predict adsorption energies"),
+    ])
+    return index
+
+
+def test_normalize_doi():
+    assert normalize_doi(" https://doi.org/10.1038/ABC. ") == "10.1038/abc"
+    assert normalize_doi("doi: 10.1038/abc") == "10.1038/abc"
+    assert looks_like_doi("DOI:10.1021/jacs.2c01234")
+    assert not looks_like_doi("perovskite stability")
+
+
+def test_search_ranks_by_relevance_with_prefix_and_typos():
+    index = make_index()
+    assert index.search("perovskite stability")[0][0].doi == "10.1126/science.abc1234"
+    assert index.search("catal")[0][0].title.startswith(("Single-atom", "Machine"))
+    assert index.search("perovskit solar")[0][0].doi == "10.1126/science.abc1234"
+    assert index.search("graphene") == []
+
+
+def test_resolve_doi_variants_and_titles():
+    index = make_index()
+    expected = "10.1038/s41586-024-07001-1"
+    for text in (expected, expected.upper(), f"https://doi.org/{expected}", f"doi:{expected}", f" {expected} "):
+        assert index.resolve(text).doi == expected
+    assert index.resolve("Machine Learning for Catalyst Discovery").doi == "10.1021/jacs.2c01234"
+    assert index.resolve("completely unrelated title words") is None
+
+
+def test_resolve_never_substitutes_neighbouring_doi():
+    index = make_index()
+    assert index.resolve("10.1038/s41586-024-07002-1") is None
+    assert index.resolve("10.1038/s41586-024-07011-2") is None
+    assert index.lookup_doi("10.1038/s41586-024-07002-1") is None
+
+
+def test_similar_dois_are_hints_within_the_same_registrant():
+    index = make_index()
+    assert [paper.doi for paper in index.similar_dois("10.1038/s41586-024-07002-1")] == ["10.1038/s41586-024-07001-1"]
+    assert index.similar_dois("10.9999/s41586-024-07002-1") == []
+    assert index.similar_dois("10.1038/s41586-024-07001-1") == []
+
+
+def test_detail_record_is_not_replaced_by_summary():
+    index = make_index()
+    doi = "10.1021/jacs.2c01234"
+    index.add(Paper.create("Machine learning for catalyst discovery", "JACS", "15", None, doi, None, "full",
+                           authors=["A. Author"], citations=12))
+    index.add(Paper.create("Machine learning for catalyst discovery", "JACS", "15", None, doi, None, "short"))
+    assert index.lookup_doi(doi).citations == 12
+    assert len(index) == 3
@@ -0,0 +1,68 @@
+"""
+Lazy延迟初始化：首次访问时只创建一次，后台初始化失败后首次使用时再次尝试，异步等待不阻塞事件循环
+"""
+
+import asyncio
+import threading
+import time
+
+from core.content.lazy import Lazy, load_all, warm_in_background
+
+
+def test_created_once_on_first_access():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return {"a": 1}
+
+    lazy = Lazy(factory)
+    assert not lazy.ready and not calls
+
+    def use():
+        barrier.wait()
+        assert "a" in lazy
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert lazy.ready and len(calls) == 1
+    assert lazy.get("a") == 1 and len(lazy) == 1
+
+
+def test_failed_background_warmup_retries_on_use():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("磁盘暂时不可用")
+        return [1, 2, 3]
+
+    broken = Lazy(factory)
+    other = Lazy(lambda: [4])
+    warm_in_background(broken, other).join()
+    assert not broken.ready and other.ready
+    assert len(broken) == 3 and len(attempts) == 2
+
+
+def test_aload_does_not_block_the_loop():
+    lazy = Lazy(lambda: time.sleep(0.2) or {"value": 1}, name="slow")
+    ticks = []
+
+    async def ticker():
+        while not lazy.ready:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        task = asyncio.ensure_future(ticker())
+        await load_all(lazy)
+        await task
+        return await lazy.aload()
+
+    assert asyncio.run(run()) == {"value": 1}
+    assert len(ticks) > 5
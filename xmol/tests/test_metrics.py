@@ -0,0 +1,60 @@
+"""
+共享指标：Prometheus文本格式输出、工具调用统计和metrics://资源
+"""
+
+import asyncio
+
+import pytest
+
+import core  # noqa: F401  导入core时把仓库根目录加入导入路径
+from mcp_common.metrics import REGISTRY, Registry, instrument_tool
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    calls = registry.counter("test_calls", "调用次数", ("tool",))
+    calls.labels("search").inc()
+    calls.labels(tool="search").inc(2)
+    registry.gauge("test_depth", "队列深度").set(4)
+    seconds = registry.histogram("test_seconds", "耗时", buckets=(0.1, 1.0))
+    seconds.observe(0.05)
+    seconds.observe(0.5)
+    registry.callback("test_callback", "回调", lambda: {("a",): 1}, labelnames=("name",))
+    text = registry.render()
+    assert "# TYPE test_calls counter\n" in text and 'test_calls_total{tool="search"} 3\n' in text
+    assert "test_depth 4\n" in text
+    assert 'test_seconds_bucket{le="0.1"} 1\n' in text and 'test_seconds_bucket{le="+Inf"} 2\n' in text
+    assert "test_seconds_count 2\n" in text
+    assert 'test_callback{name="a"} 1\n' in text
+
+
+def test_failing_callback_does_not_break_render():
+    registry = Registry()
+    registry.callback("test_broken", "出错", lambda: 1 / 0)
+    registry.gauge("test_ok", "正常").set(1)
+    text = registry.render()
+    assert "test_broken 采集失败" in text and "test_ok 1\n" in text
+
+
+def test_instrument_tool_counts_calls_and_errors():
+    @instrument_tool("test")
+    async def tool_ok():
+        return "ok"
+
+    @instrument_tool("test")
+    def tool_fail():
+        raise RuntimeError("失败")
+
+    assert asyncio.run(tool_ok()) == "ok"
+    with pytest.raises(RuntimeError):
+        tool_fail()
+    text = REGISTRY.render()
+    assert 'mcp_tool_calls_total{server="test",tool="tool_ok",status="ok"} 1' in text
+    assert 'mcp_tool_calls_total{server="test",tool="tool_fail",status="exception"} 1' in text
+
+
+def test_metrics_resource_reports_search_stages(server):
+    asyncio.run(server.search_title_by_keywords(["metrics"]))
+    text = server.metrics()
+    assert 'mcp_tool_calls_total{server="xmol",tool="search_title_by_keywords",status="ok"}' in text
+    assert "xmol_stage_seconds" in text
@@ -0,0 +1,62 @@
+"""
+跨页文献迭代：按页序产出、预取窗口、达到上限或遇到错误页时停止
+"""
+
+import asyncio
+
+from core.content import AsyncFetcher, PageIterator, SessionPool, get_content
+
+
+def make_fetch(pages: dict, started: list, per_page: int = 3):
+    async def fetch_page(page: int, on_paper):
+        started.append(page)
+        result = pages.get(page, [f"p{page}-{i}" for i in range(per_page)])
+        if isinstance(result, list):
+            for paper in result:
+                await asyncio.sleep(0)
+                await on_paper(paper)
+        return result
+    return fetch_page
+
+
+def collect(iterator) -> list:
+    async def run():
+        return [paper async for paper in iterator]
+    return asyncio.run(run())
+
+
+def test_papers_are_yielded_in_page_order():
+    started = []
+    papers = collect(PageIterator(make_fetch({}, started), max_pages=3, read_ahead=2))
+    assert papers == [f"p{page}-{i}" for page in (1, 2, 3) for i in range(3)]
+    assert started == [1, 2, 3]
+
+
+def test_max_results_stops_before_fetching_more_pages():
+    started = []
+    iterator = PageIterator(make_fetch({}, started), max_results=4, max_pages=10, read_ahead=1)
+    assert collect(iterator) == ["p1-0", "p1-1", "p1-2", "p2-0"]
+    assert max(started) <= 3
+
+
+def test_error_page_ends_iteration():
+    started = []
+    iterator = PageIterator(make_fetch({2: {"error": "文献列表为空"}}, started), max_pages=5, read_ahead=0)
+    assert collect(iterator) == ["p1-0", "p1-1", "p1-2"]
+    assert iterator.error == {"error": "文献列表为空"}
+    assert started == [1, 2]
+
+
+def test_iterates_pages_against_stub(stub):
+    fetcher = AsyncFetcher(base_url=stub.base_url)
+    tool = get_content(fetcher=fetcher, sessions=SessionPool(["atk0210=stub"]))
+
+    async def run():
+        try:
+            return [paper async for paper in tool.iter_papers(["pager"], "atk0210=stub", max_results=45)]
+        finally:
+            await fetcher.aclose()
+
+    papers = asyncio.run(run())
+    assert len(papers) == 45
+    assert len({paper.doi for paper in papers}) == 45
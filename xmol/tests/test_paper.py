@@ -0,0 +1,34 @@
+"""
+文献记录：原始字符串解析、字典往返和旧版缓存格式兼容
+"""
+
+from datetime import date
+
+from core.content import Paper
+
+
+def test_create_parses_raw_strings():
+    paper = Paper.create("Title", "Nature", "IF: 12.5", "2024-03-01", "10.1/x", "https://x", "abs")
+    assert paper.impact == 12.5 and paper.pubdate == date(2024, 3, 1)
+    assert paper.impact_text == "12.5" and paper.pubdate_text == "2024-03-01"
+
+
+def test_missing_fields_use_placeholders():
+    paper = Paper.create(impact="未知影响因子", pubdate="未知发布日期")
+    assert paper.impact is None and paper.pubdate is None
+    assert not paper.has_doi
+    assert (paper.impact_text, paper.pubdate_text) == ("未知", "未知发布日期")
+
+
+def test_dict_roundtrip_and_legacy_keys():
+    paper = Paper.create("Title", "Nature", "8", "2024-03-01", "10.1/x", "https://x", "abs")
+    assert Paper.from_dict(paper.to_dict()) == paper
+    legacy = {"title": "Title", "jounal": "Nature", "impact": "8", "pubdata": "2024-03-01", "doi": "10.1/x",
+              "url": "https://x", "content": "abs"}
+    assert Paper.from_dict(legacy) == paper
+
+
+def test_journal_names_are_interned():
+    first = Paper.create(journal="".join(["Nature ", "Materials"]))
+    second = Paper.create(journal="".join(["Nature", " Materials"]))
+    assert first.journal is second.journal
@@ -0,0 +1,49 @@
+"""
+结果页解析：各解析后端在保存的结果页上输出一致
+"""
+
+from pathlib import Path
+
+import pytest
+
+from core.content.parser import available_backends, parse_detail_page, parse_result_page
+from stub_server import make_detail_page
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+BASEURL = "https://www.x-mol.com/"
+
+
+@pytest.mark.parametrize("name, count", [("result_page_20.html", 20), ("result_page_50.html", 50)])
+def test_backends_agree_on_saved_pages(name, count):
+    html = (FIXTURES / name).read_text(encoding="utf-8")
+    expected = parse_result_page(html, BASEURL, "html.parser")
+    assert len(expected) == count
+    assert all(paper.doi.startswith("10.") and paper.url.startswith(BASEURL) for paper in expected)
+    for backend in available_backends():
+        assert parse_result_page(html, BASEURL, backend) == expected, backend
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_missing_and_empty_result_lists(backend):
+    assert parse_result_page("<html><body>登录</body></html>", BASEURL, backend) == {"error": "未找到文献列表"}
+    empty = '<div class="magazine-senior-search-results-list"><ul></ul></div>'
+    assert parse_result_page(empty, BASEURL, backend) == {"error": "文献列表为空"}
+
+
+def test_backends_agree_on_detail_page():
+    html = make_detail_page("10.1021/jacs.test")
+    expected = parse_detail_page(html, BASEURL + "paper/1", "html.parser")
+    assert expected.doi == "10.1021/jacs.test" and len(expected.authors) == 5
+    assert expected.citations is not None and expected.abstract.startswith("Full abstract")
+    for backend in available_backends():
+        assert parse_detail_page(html, BASEURL + "paper/1", backend) == expected, backend
+        assert parse_detail_page("<html><body>登录</body></html>", BASEURL, backend) is None
+
+
+def test_backends_agree_on_detail_fixture():
+    # fixtures/detail_page.html由桩服务器生成，不是真实X-MOL页面的抓取，只用于检查各后端结果一致
+    html = (FIXTURES / "detail_page.html").read_text(encoding="utf-8")
+    expected = parse_detail_page(html, BASEURL + "paper/1", "html.parser")
+    assert expected is not None and expected.authors and expected.citations is not None
+    for backend in available_backends():
+        assert parse_detail_page(html, BASEURL + "paper/1", backend) == expected, backend
@@ -0,0 +1,61 @@
+"""
+输出渲染：Markdown/JSON格式和每篇文献的片段缓存
+"""
+
+import json
+
+from core.content import Paper, render_batch, render_detail, render_papers
+
+
+def make_papers() -> list:
+    return [Paper.create(f"Title {i}", "Nature", "10.5", "2024-01-02", f"10.1/{i}", f"https://x/{i}", "abstract")
+            for i in range(3)]
+
+
+def test_markdown_lists_numbered_papers():
+    markdown = render_papers(make_papers())
+    assert markdown.startswith("### 搜索结果\n\n1. **Title 0**\n")
+    assert "3. **Title 2**" in markdown and "   - 影响因子: 10.5\n" in markdown
+    assert markdown.endswith("提供DOI作为参数。")
+
+
+def test_json_matches_paper_dicts():
+    papers = make_papers()
+    result = json.loads(render_papers(papers, "json"))
+    assert result == {"results": [paper.to_dict() for paper in papers], "count": 3}
+
+
+def test_fragments_are_cached_on_the_record():
+    papers = make_papers()
+    render_papers(papers)
+    render_papers(papers, "json")
+    assert all(paper._markdown and paper._json for paper in papers)
+    assert render_papers(papers) == render_papers(make_papers())
+
+
+def test_batch_and_errors():
+    papers = make_papers()
+    errors = [{"keywords": ["a", "b"], "page": 2, "error": "未找到相关文献"}]
+    markdown = render_batch([(papers[0], [["a"], ["c"]])], errors)
+    assert "   - 命中关键词组: a；c\n" in markdown and "- a, b (第2页): 未找到相关文献\n" in markdown
+    result = json.loads(render_batch([(papers[0], [["a"]])], errors, "json"))
+    assert result["results"][0]["groups"] == [["a"]] and result["errors"] == errors
+    assert render_papers({"error": "失败", "suggestion": "重试"}) == "### 搜索错误\n\n失败\n\n重试"
+
+
+def test_detail_includes_authors_and_citations():
+    paper = Paper.create("Title", "Nature", "10", "2024-01-02", "10.1/x", "https://x", "abstract",
+                         authors=["A", "B"], citations=7)
+    markdown = render_detail(paper.doi, paper)
+    assert markdown.startswith("### Title\n\n**DOI**: 10.1/x\n\n**作者**: A, B\n\n")
+    assert "**被引次数**: 7" in markdown and markdown.endswith("[10.1/x](https://x)")
+    assert json.loads(render_detail(paper.doi, paper, "json"))["citations"] == 7
+
+
+def test_render_keeps_braces_in_fields():
+    paper = Paper.create("{title} with {0} braces", "J {x}", "5", "2024-01-01", "10.1/{doi}", None, "abstract {p}")
+    markdown = render_papers([paper])
+    assert "**{title} with {0} braces**" in markdown and "J {x}" in markdown
+    detail = render_detail(paper.doi, paper)
+    assert "abstract {p}" in detail and "10.1/{doi}" in detail
+    assert render_papers({"error": "失败", "suggestion": "{retry}"}).endswith("{retry}")
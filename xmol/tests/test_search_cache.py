@@ -0,0 +1,79 @@
+"""
+搜索结果缓存：查询规范化、过期后后台刷新、并发合并
+"""
+
+import asyncio
+
+from core.content import LRUCache, SearchCache, TieredCache, search_key
+
+
+def make_cache(**options) -> SearchCache:
+    return SearchCache(TieredCache(LRUCache()), **options)
+
+
+def counting_fetch(results: list):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return results[min(len(calls), len(results)) - 1]
+    return fetch, calls
+
+
+def test_search_key_ignores_case_order_and_blanks():
+    assert search_key(["CRISPR", " gene "], 8, "zh", "", 1) == search_key(["gene", "crispr", ""], "8", "ZH", "", "1")
+    assert search_key(["crispr"], 8, "zh", "", 1) != search_key(["crispr"], 8, "zh", "", 2)
+
+
+def test_fresh_entries_are_returned_without_fetching():
+    cache = make_cache(ttl=60)
+    fetch, calls = counting_fetch([["a"]])
+
+    async def run():
+        return [await cache.get_or_fetch("k", fetch) for _ in range(3)]
+
+    assert asyncio.run(run()) == [["a"]] * 3
+    assert len(calls) == 1 and cache.hits == 2
+
+
+def test_stale_entries_are_returned_while_refreshing():
+    cache = make_cache(ttl=0, stale_ttl=60)
+    fetch, calls = counting_fetch([["old"], ["new"]])
+
+    async def run():
+        first = await cache.get_or_fetch("k", fetch)
+        stale = await cache.get_or_fetch("k", fetch)
+        await asyncio.sleep(0.05)
+        return first, stale, await cache.get_or_fetch("k", fetch)
+
+    assert asyncio.run(run()) == (["old"], ["old"], ["new"])
+    assert cache.stale_hits == 2 and cache.refreshes == 2
+
+
+def test_concurrent_misses_share_one_fetch_and_errors_are_not_cached():
+    cache = make_cache()
+    fetch, calls = counting_fetch([{"error": "失败"}, ["ok"]])
+
+    async def run():
+        errors = await asyncio.gather(*(cache.get_or_fetch("k", fetch) for _ in range(5)))
+        return errors, await cache.get_or_fetch("k", fetch)
+
+    errors, value = asyncio.run(run())
+    assert errors == [{"error": "失败"}] * 5
+    assert value == ["ok"] and len(calls) == 2
+
+
+def test_old_results_are_returned_when_upstream_fails():
+    cache = make_cache(ttl=0, stale_ttl=0, fallback_ttl=60)
+    fetch, calls = counting_fetch([["old"], {"error": "上游不可用"}])
+
+    async def failing():
+        raise RuntimeError("熔断中")
+
+    async def run():
+        await cache.get_or_fetch("k", fetch)
+        return await cache.get_or_fetch("k", fetch), await cache.get_or_fetch("k", failing)
+
+    assert asyncio.run(run()) == (["old"], ["old"])
+    assert cache.fallbacks == 2
@@ -0,0 +1,80 @@
+"""
+通过桩服务器调用MCP工具：搜索、详情和本地检索
+"""
+
+import asyncio
+import json
+
+from core.content import Paper
+
+from conftest import MISSING_DOI
+
+CACHED_DOI = "10.1038/s41586-024-07001-1"
+
+
+def test_search_returns_papers_from_stub(server, stub):
+    result = asyncio.run(server.search_title_by_keywords(["catalysis", "test search"]))
+    assert result.startswith("### 搜索结果")
+    assert result.count("   - DOI: 10.") == stub.papers
+
+
+def test_repeated_search_is_served_from_cache(server, stub):
+    keywords = ["cache", "repeat"]
+    first = asyncio.run(server.search_title_by_keywords(keywords))
+    requests = dict(stub.counters)
+    second = asyncio.run(server.search_title_by_keywords(list(reversed(keywords))))
+    assert second == first
+    assert stub.counters == requests
+
+
+def test_search_rejects_invalid_top_k(server):
+    result = json.loads(asyncio.run(server.search_title_by_keywords(["top k"], top_k=0, output_format="json")))
+    assert "top_k" in result["error"]
+
+
+def test_batch_search_merges_groups_by_doi(server, stub):
+    result = json.loads(asyncio.run(server.batch_search_by_keywords(
+        [["batch alpha"], ["BATCH ALPHA"], ["batch beta"]], page_count=2, output_format="json")))
+    assert result["errors"] == []
+    assert len(result["results"]) == 4 * stub.papers
+    # 相同查询的两组命中同一批文献，排在前面
+    assert [len(paper["groups"]) for paper in result["results"]][:2 * stub.papers] == [2] * (2 * stub.papers)
+
+
+def test_detail_fetches_and_caches(server, stub):
+    doi = "10.1021/jacs.test-detail"
+    first = asyncio.run(server.get_literature_detail(doi))
+    assert first.startswith("### ") and f"**DOI**: {doi}" in first
+    assert "**作者**" in first and "**被引次数**" in first
+    requests = stub.counters["get"]
+    assert asyncio.run(server.get_literature_detail(doi)) == first
+    assert stub.counters["get"] == requests
+
+
+def test_detail_does_not_substitute_neighbouring_doi(server):
+    server.paper_index.add(Paper.create("Cached neighbour", "Nature", "50", "2024-01-01", CACHED_DOI, None, "x"))
+    neighbour = "10.1038/s41586-024-07002-1"
+    result = json.loads(asyncio.run(server.get_literature_detail(neighbour, output_format="json")))
+    assert result["doi"] == neighbour
+
+
+def test_detail_not_found_suggests_similar_doi(server):
+    server.paper_index.add(Paper.create("Cached neighbour", "Nature", "50", "2024-01-01", CACHED_DOI, None, "x"))
+    result = json.loads(asyncio.run(server.get_literature_detail(MISSING_DOI, output_format="json")))
+    assert result["error"]
+    assert CACHED_DOI in result["did_you_mean"]
+
+def test_local_search_finds_fetched_papers(server):
+    asyncio.run(server.search_title_by_keywords(["local", "index"]))
+    result = json.loads(asyncio.run(server.search_local_literature("stub catalysis", output_format="json")))
+    assert result["results"] and result["indexed"] >= len(result["results"])
+
+
+def test_local_doi_lookup_is_exact(server):
+    server.paper_index.add(Paper.create("Cached neighbour", "Nature", "50", "2024-01-01", CACHED_DOI, None, "x"))
+    found = json.loads(asyncio.run(server.search_local_literature(f"https://doi.org/{CACHED_DOI.upper()}",
+                                                                    output_format="json")))
+    assert [paper["doi"] for paper in found["results"]] == [CACHED_DOI]
+    missing = json.loads(asyncio.run(server.search_local_literature("10.1038/s41586-024-07009-1",
+                                                                      output_format="json")))
+    assert CACHED_DOI in missing["did_you_mean"]
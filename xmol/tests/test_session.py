@@ -0,0 +1,60 @@
+"""
+账号会话池：Cookie读取、分派策略、失效隔离与换用其他会话
+"""
+
+import asyncio
+
+from core.content import AsyncFetcher, SessionPool, get_content
+from core.content.session import load_cookies
+
+
+def test_load_cookies_orders_numbered_and_skips_duplicates():
+    environ = {"Cookie": "a=1", "Cookie_2": "c=3", "Cookie_1": "b=2", "Cookie_10": "a=1", "Cookie_3": " "}
+    assert load_cookies(environ) == ["a=1", "b=2", "c=3"]
+
+
+def test_least_loaded_and_round_robin_dispatch():
+    pool = SessionPool(["a=1", "b=2", "c=3"])
+    first = pool.acquire()
+    first.in_flight += 1
+    assert pool.acquire() is not first
+
+    rotating = SessionPool(["a=1", "b=2"], strategy="round_robin")
+    assert [rotating.acquire().name for _ in range(3)] == ["session-1", "session-2", "session-1"]
+
+
+def test_quarantine_skips_session_and_backs_off():
+    pool = SessionPool(["a=1", "b=2"], quarantine=10)
+    bad = pool.sessions[0]
+    pool.quarantine(bad, "expired")
+    assert all(pool.acquire() is pool.sessions[1] for _ in range(3))
+    first_until = bad.quarantined_until
+    bad.quarantined_until = 0.0
+    pool.quarantine(bad, "expired")
+    assert bad.quarantined_until - first_until > 5
+    assert pool.stats()["available"] == 1
+
+
+def test_all_quarantined_uses_first_to_recover():
+    pool = SessionPool(["a=1", "b=2"], quarantine=10)
+    pool.quarantine(pool.sessions[0], "expired")
+    pool.quarantine(pool.sessions[1], "expired")
+    pool.sessions[1].quarantined_until -= 5
+    assert pool.acquire() is pool.sessions[1]
+    assert pool.exhausted == 1
+
+
+def test_expired_cookie_fails_over_to_another_session(stub):
+    fetcher = AsyncFetcher(base_url=stub.base_url)
+    pool = SessionPool(["atk0210=expired", "atk0210=ok"], strategy="round_robin")
+    tool = get_content(fetcher=fetcher, sessions=pool)
+
+    async def run():
+        try:
+            return await tool.get_page_content(["failover"])
+        finally:
+            await fetcher.aclose()
+
+    papers = asyncio.run(run())
+    assert len(papers) == stub.papers
+    assert not pool.sessions[0].available() and pool.sessions[1].available()
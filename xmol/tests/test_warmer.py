@@ -0,0 +1,40 @@
+"""
+热门查询预热：只预热达到次数的查询，跳过仍新鲜的缓存，上游繁忙时停止本轮
+"""
+
+import asyncio
+
+from core.content.warmer import CacheWarmer
+
+
+def make_warmer(ages, busy=lambda: False):
+    refreshed = []
+
+    async def refresh(query):
+        refreshed.append(query["keywords"])
+
+    async def age(key):
+        return ages.get(key)
+
+    warmer = CacheWarmer(refresh, age, busy=busy, interval=60, top=5, min_hits=2, refresh_after=100)
+    return warmer, refreshed
+
+
+def test_refreshes_hot_stale_queries_only():
+    warmer, refreshed = make_warmer({"fresh": 10, "stale": 500})
+    for key, hits in (("fresh", 3), ("stale", 2), ("missing", 4), ("once", 1)):
+        for _ in range(hits):
+            warmer.record(key, {"keywords": key})
+    assert [key for key, _, _ in warmer.hot()] == ["missing", "fresh", "stale"]
+
+    assert asyncio.run(warmer.run_once()) == 2
+    assert refreshed == ["missing", "stale"]
+    assert warmer.skipped_fresh == 1
+
+
+def test_stops_when_upstream_busy():
+    warmer, refreshed = make_warmer({}, busy=lambda: True)
+    warmer.record("q", {"keywords": "q"})
+    warmer.record("q", {"keywords": "q"})
+    assert asyncio.run(warmer.run_once()) == 0
+    assert refreshed == [] and warmer.skipped_busy == 1